@@ -0,0 +1,88 @@
+# --- ANALISIS PMGD (SIN GRAFICOS NI PDF) ---
+# Constantes de negocio, fechas, preparacion y diagnostico: lo que la app necesita al arrancar, sin plotly ni fpdf.
+import pandas as pd
+from motor_diagnostico import TOLERANCIA_CRITICA, diagnosticar_mediciones  # la tolerancia se define en el motor
+from metricas import etapa
+from esquemas import ESQUEMA_FALLAS, ESQUEMA_MEDICIONES, aplicar_esquema
+
+# --- CONSTANTES DE NEGOCIO ---
+VOLTAJE_DC = 1500
+PRECIO_MWH = 40
+HORAS_SOL_REP = 10
+
+# --- UTILS FECHA ---
+def obtener_nombre_mes(mes_num):
+    meses = {1:"Enero", 2:"Febrero", 3:"Marzo", 4:"Abril", 5:"Mayo", 6:"Junio", 
+             7:"Julio", 8:"Agosto", 9:"Septiembre", 10:"Octubre", 11:"Noviembre", 12:"Diciembre"}
+    return meses.get(mes_num, "")
+
+def periodo_mes(anio, mes):
+    # [desde, hasta) del mes calendario y su etiqueta
+    desde = pd.Timestamp(int(anio), int(mes), 1)
+    return desde, desde + pd.offsets.MonthBegin(1), f"{obtener_nombre_mes(mes)} {anio}"
+
+# --- PREPARACION DE DATOS ---
+COLUMNAS_MEDICIONES = ['Fecha', 'Planta', 'Equipo', 'String ID', 'Amperios']
+
+# errores: lista opcional donde se agregan las filas invalidas de la hoja (frame de esquemas.COLUMNAS_ERRORES)
+def preparar_fallas(df, errores=None):
+    if df.empty: return pd.DataFrame()
+    with etapa("datos.parseo", hoja="Sheet1", filas=len(df)): df, malas = aplicar_esquema(df, ESQUEMA_FALLAS, "Sheet1")
+    if errores is not None and len(malas): errores.append(malas)
+    return df
+
+def preparar_mediciones(df, errores=None):
+    if df.empty: return pd.DataFrame(columns=COLUMNAS_MEDICIONES)
+    with etapa("datos.parseo", hoja="DB_MEDICIONES", filas=len(df)): df, malas = aplicar_esquema(df, ESQUEMA_MEDICIONES, "DB_MEDICIONES")
+    if errores is not None and len(malas): errores.append(malas)
+    return df
+
+# --- LOGICA ANALISIS MEDICIONES ---
+def generar_diagnostico_mediciones_pro_local(df):
+    if df.empty: return "NORMAL", "success", df
+    with etapa("diagnostico", filas=len(df)): return "OK", "success", diagnosticar_mediciones(df, TOLERANCIA_CRITICA)
+
+# --- NUEVO: MOTOR DE NARRATIVA INTELIGENTE ---
+def generar_narrativa_ia(df, planta):
+    # Calcular estadisticas
+    total_str = len(df)
+    prom_global = df['Amperios'].mean()
+    cortes = len(df[df['Diagnostico'] == "CORTE (0A)"])
+    bajos = len(df[df['Diagnostico'] == "BAJA CORRIENTE"])
+    
+    # Encontrar mejor y peor caja
+    df_cajas = df.groupby('Equipo', observed=True)['Amperios'].mean().reset_index()
+    mejor_caja = df_cajas.loc[df_cajas['Amperios'].idxmax()]
+    peor_caja = df_cajas.loc[df_cajas['Amperios'].idxmin()]
+    
+    # Construir el texto
+    texto = (
+        f"Durante la inspeccion tecnica realizada en la planta {planta}, se evaluaron {total_str} strings. "
+        f"El rendimiento promedio global fue de {prom_global:.1f} Amperios. "
+    )
+    
+    if cortes == 0 and bajos == 0:
+        texto += "La planta opera en condiciones optimas, sin deteccion de anomalias criticas. "
+    else:
+        texto += f"Se detectaron oportunidades de mejora: {cortes} strings sin generacion (Cortes) y {bajos} strings con bajo rendimiento operativo. "
+    
+    texto += (
+        f"Analizando la consistencia por equipos, la caja {mejor_caja['Equipo']} presento el mejor desempeño "
+        f"({mejor_caja['Amperios']:.1f}A), mientras que la unidad {peor_caja['Equipo']} registro el promedio mas bajo "
+        f"({peor_caja['Amperios']:.1f}A), sugiriendo una posible necesidad de limpieza o revision focalizada en ese sector."
+    )
+    
+    return texto
+
+# --- HELPERS ---
+def generar_analisis_auto(df, perdida_total):
+    texto = f"Resumen Ejecutivo:\n- Pérdida Económica Est: {perdida_total} USD."
+    if df.empty or 'Perdida' not in df.columns: return texto
+    # Columnas de perdidas.perdidas_fallas: ventana fuera de servicio de cada falla
+    abiertas = int(df['Reparacion'].isna().sum()) if 'Reparacion' in df.columns else len(df)
+    texto += f"\n- {abiertas} de {len(df)} fallas sin reparación registrada (siguen sumando pérdida hasta hoy)."
+    if 'Dias_Fuera' in df.columns: texto += f"\n- Tiempo medio fuera de servicio: {df['Dias_Fuera'].mean():.1f} días."
+    if 'Equipo_Full' in df.columns:
+        por_equipo = df.groupby('Equipo_Full', observed=True)['Perdida'].sum()
+        texto += f"\n- Mayor pérdida acumulada: {por_equipo.idxmax()} ({por_equipo.max():.1f} USD)."
+    return texto
@@ -0,0 +1,148 @@
+# --- BENCHMARK DE ANALISIS E INFORMES (OFFLINE, PLANTAS SINTETICAS) ---
+# Mide tiempo y memoria pico de las funciones de analisis y reportes en plantas de distinto tamaño.
+#   python bench_pmgd.py                                  # tamaños por defecto; guarda .bench/<commit>.json
+#   python bench_pmgd.py --tamanos 4x10x24x3 40x100x24x6 --sin-pdf
+#   python bench_pmgd.py --comparar <commit | archivo.json>
+import argparse
+import io
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Cache de PNG aparte y vacia en cada repeticion: se mide el render real de kaleido.
+DIR_GRAFICOS = tempfile.mkdtemp(prefix="bench_graficos_")
+os.environ["PMGD_CACHE_GRAFICOS"] = DIR_GRAFICOS
+
+import pandas as pd
+
+from herramientas.datos_sinteticos import planta_sintetica
+from herramientas.resultados import commit_actual, cargar_resultados, guardar_resultados, comparar, ratio
+from informes import (preparar_fallas, preparar_mediciones, generar_diagnostico_mediciones_pro_local,
+                      generar_narrativa_ia, generar_reporte_completo_pdf, generar_excel_pro, periodo_mes)
+from motor_diagnostico import obtener_topologia
+from rollups_fallas import RollupFallas
+from reincidencias import IndiceReincidencia
+from importador import analizar, sugerir_mapeo
+from perdidas import MotorPerdidas
+
+TAMANOS = ["4x10x24x3", "10x40x24x4", "20x100x24x6"]  # inversores x cajas x strings x campañas
+DIR_RESULTADOS = ".bench"
+PLANTA = "Planta Bench"
+
+
+def parsear_tamano(texto):
+    inv, cajas, strings, campanas = (int(x) for x in texto.lower().split("x"))
+    return {'inversores': inv, 'cajas': cajas, 'strings': strings, 'campanas': campanas}
+
+
+def limpiar_graficos():
+    shutil.rmtree(DIR_GRAFICOS, ignore_errors=True)
+
+
+# --- CASOS ---
+def construir_casos(tam, con_pdf=True):
+    # (nombre, filas, preparar() -> args, funcion)
+    crudo = planta_sintetica(PLANTA, tam['inversores'], tam['cajas'], tam['strings'], tam['campanas'],
+                             fallas_mes=max(10, tam['inversores'] * tam['cajas'] // 2))
+    df_f = preparar_fallas(crudo['Sheet1'].copy())
+    df_m = preparar_mediciones(crudo['DB_MEDICIONES'].copy())
+    df_c = df_m[df_m['Fecha'] >= df_m['Fecha'].max() - pd.Timedelta(days=15)]  # ultima campaña
+    _, _, df_diag = generar_diagnostico_mediciones_pro_local(df_c)
+    hasta = df_f['Fecha'].max()
+    desde, fin, _ = periodo_mes(hasta.year, hasta.month)
+
+    def kpis_fallas():
+        r = RollupFallas().reconstruir(df_f)
+        return r.kpis(PLANTA, desde, fin, mensual=True), r.por_equipo(r.rango(PLANTA))
+
+    def perdidas():
+        m = MotorPerdidas({}).reconstruir(df_f)
+        return m.totales(), m.total(PLANTA, desde, fin)
+
+    # Archivo de terreno: todas las campañas, la mitad ya cargada en la base
+    archivo_csv = crudo['DB_MEDICIONES'].drop(columns='ID').to_csv(index=False).encode()
+    mapeo_csv = sugerir_mapeo(list(crudo['DB_MEDICIONES'].columns))
+
+    def importacion():
+        return analizar(io.BytesIO(archivo_csv), "bench.csv", mapeo_csv, existentes=df_m.iloc[:len(df_m) // 2])
+
+    def reincidencia():
+        ix = IndiceReincidencia().reconstruir(df_f)
+        return ix.top(PLANTA, 20, dias=30), ix.top(PLANTA, 20, desde, fin, dias=7)
+
+    casos = [
+        ("parseo_mediciones", len(df_m), lambda: (crudo['DB_MEDICIONES'].copy(),), preparar_mediciones),
+        ("diagnostico", len(df_c), lambda: (df_c,), generar_diagnostico_mediciones_pro_local),
+        ("narrativa", len(df_diag), lambda: (df_diag, PLANTA), generar_narrativa_ia),
+        ("topologia", len(df_m), lambda: (df_m, PLANTA), obtener_topologia),
+        ("kpis_fallas", len(df_f), lambda: (), kpis_fallas),
+        ("reincidencia", len(df_f), lambda: (), reincidencia),
+        ("perdidas", len(df_f), lambda: (), perdidas),
+        ("importacion_csv", len(df_m), lambda: (), importacion),
+        ("excel_fallas", len(df_f), lambda: (df_f, PLANTA, "Benchmark", ""), generar_excel_pro),
+    ]
+    if con_pdf:
+        def preparar_pdf():
+            limpiar_graficos(); return (PLANTA, df_c)
+        casos.append(("pdf_auditoria", len(df_c), preparar_pdf, generar_reporte_completo_pdf))
+    return casos
+
+
+def medir_caso(preparar, funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        args = preparar()
+        t0 = time.perf_counter(); funcion(*args); tiempos.append((time.perf_counter() - t0) * 1000)
+    # Memoria en una corrida aparte (tracemalloc agrega overhead al tiempo).
+    args = preparar()
+    tracemalloc.start()
+    try: funcion(*args); _, pico = tracemalloc.get_traced_memory()
+    finally: tracemalloc.stop()
+    return {'ms_min': round(min(tiempos), 2), 'ms_mediana': round(statistics.median(tiempos), 2), 'pico_mb': round(pico / 1e6, 2)}
+
+
+# --- COMPARACION ---
+def lineas_comparacion(r, p):
+    x = ratio(r['ms_mediana'], p['ms_mediana'])
+    yield (f"  {r['tamano']:<14} {r['caso']:<18} {p['ms_mediana']:>10.1f} -> {r['ms_mediana']:>10.1f} ms  x{x:.2f}"
+           f"   mem {p['pico_mb']:.1f} -> {r['pico_mb']:.1f} MB", x, True)
+
+
+# --- CLI ---
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark offline de analisis e informes PMGD.")
+    ap.add_argument("--tamanos", nargs="*", default=TAMANOS, help="IxCxSxK: inversores x cajas x strings x campañas")
+    ap.add_argument("--repeticiones", type=int, default=3)
+    ap.add_argument("--sin-pdf", action="store_true", help="omitir el PDF (kaleido)")
+    ap.add_argument("--casos", nargs="*", help="solo estos casos")
+    ap.add_argument("--salida", default=DIR_RESULTADOS, help="directorio de resultados")
+    ap.add_argument("--comparar", help="commit o archivo .json previo")
+    args = ap.parse_args(argv)
+    previo = cargar_resultados(args.comparar, args.salida) if args.comparar else None  # antes de sobrescribir
+
+    resultado = {'commit': commit_actual(), 'fecha': pd.Timestamp.now().isoformat(timespec="seconds"),
+                 'python': platform.python_version(), 'pandas': pd.__version__, 'repeticiones': args.repeticiones, 'resultados': []}
+    try:
+        for texto in args.tamanos:
+            tam = parsear_tamano(texto)
+            print(f"Tamaño {texto} ({tam['inversores'] * tam['cajas'] * tam['strings']} strings x {tam['campanas']} campañas)")
+            for nombre, filas, preparar, funcion in construir_casos(tam, con_pdf=not args.sin_pdf):
+                if args.casos and nombre not in args.casos: continue
+                r = {'tamano': texto, 'caso': nombre, 'filas': filas, **medir_caso(preparar, funcion, args.repeticiones)}
+                resultado['resultados'].append(r)
+                print(f"  {nombre:<18} {filas:>9} filas  {r['ms_mediana']:>10.1f} ms (min {r['ms_min']:.1f})  pico {r['pico_mb']:>8.1f} MB")
+    finally: limpiar_graficos()
+
+    print(f"\nResultados en {guardar_resultados(resultado, args.salida)}")
+    if previo is not None:
+        return 1 if comparar(resultado, previo, 'resultados', lambda r: (r['tamano'], r['caso']), lineas_comparacion) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# --- CACHE EN DISCO POR CONTENIDO ---
+# Un archivo por clave (hash del contenido) dentro de un directorio: escritura atomica (tmp + os.replace, sin lectores
+# a medio escribir entre hilos o procesos) y expulsion de lo usado hace mas tiempo al pasar del limite.
+# La usan los PNG de render_graficos y los JPEG de fotos, cada uno con su directorio y su sufijo.
+import hashlib
+import os
+import threading
+
+_lock = threading.Lock()
+
+
+def clave(*partes):
+    h = hashlib.sha256()
+    for p in partes: h.update(p.encode("utf-8") if isinstance(p, str) else p)
+    return h.hexdigest()
+
+
+def ruta(directorio, clave, sufijo):
+    return os.path.join(directorio, f"{clave}{sufijo}")
+
+
+def leer(directorio, clave, sufijo):
+    archivo = ruta(directorio, clave, sufijo)
+    try:
+        with open(archivo, "rb") as f: datos = f.read()
+        os.utime(archivo)  # marca de uso para la expulsion LRU
+        return datos
+    except OSError: return None
+
+
+def escribir(directorio, clave, datos, sufijo, max_mb):
+    # Sin disco (permisos, lleno) se sigue sin cache.
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        archivo = ruta(directorio, clave, sufijo); tmp = archivo + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f: f.write(datos)
+        os.replace(tmp, archivo)
+        podar(directorio, max_mb, sufijo)
+    except OSError: pass
+
+
+def podar(directorio, max_mb, sufijo):
+    # Expulsa los archivos usados hace mas tiempo hasta quedar bajo el limite.
+    limite = max_mb * 1024 * 1024
+    with _lock:
+        try: entradas = [e for e in os.scandir(directorio) if e.name.endswith(sufijo)]
+        except OSError: return
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entradas]
+        total = sum(s for _, s, _ in stats)
+        for _, tam, archivo in sorted(stats):
+            if total <= limite: break
+            try: os.remove(archivo); total -= tam
+            except OSError: pass
@@ -0,0 +1,157 @@
+# --- INDICE DE CAMPAÑAS DE INSPECCION ---
+# Una campaña = planta + ventana de fechas de medicion contiguas. Las estadisticas por caja y por string
+# se calculan una vez por campaña y solo se recalculan las campañas que reciben filas nuevas.
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from motor_diagnostico import TOLERANCIA_CRITICA, diagnosticar_strings
+
+BRECHA_DIAS = 15  # dias sin mediciones que separan una campaña de la siguiente
+MAX_VERSIONES = 4  # indices guardados por IndicesPorVersion
+
+
+def agrupar_fechas(fechas, brecha_dias=BRECHA_DIAS):
+    # fechas ordenadas y unicas -> lista de (inicio, fin)
+    if len(fechas) == 0: return []
+    f = pd.DatetimeIndex(fechas)
+    cortes = np.flatnonzero(np.diff(f.values).astype('timedelta64[D]').astype(int) > brecha_dias) + 1
+    return [(g[0], g[-1]) for g in np.split(f, cortes)]
+
+
+def id_campana(planta, inicio):
+    return f"{planta}|{inicio:%Y-%m-%d}"
+
+
+def etiqueta_campana(inicio, fin):
+    return f"{inicio:%d/%m/%Y}" if inicio == fin else f"{inicio:%d/%m/%Y} - {fin:%d/%m/%Y}"
+
+
+class IndiceCampanas:
+    def __init__(self, brecha_dias=BRECHA_DIAS, tolerancia=TOLERANCIA_CRITICA):
+        self.brecha_dias = brecha_dias
+        self.tolerancia = tolerancia
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._filas = 0
+        self._ultimo_indice = None
+        self._fechas = {}      # planta -> DatetimeIndex de fechas medidas
+        self._ventanas = {}    # planta -> [(inicio, fin)]
+        self.cajas = {}        # campaña -> stats por caja
+        self.strings = {}      # campaña -> Amperios por (Equipo, String ID)
+
+    def copia(self):
+        # Diccionarios nuevos con los mismos valores (las stats de una campaña se reemplazan, nunca se modifican).
+        with self._lock:
+            nuevo = copy.copy(self); nuevo._lock = threading.Lock()
+            for atributo in ('_fechas', '_ventanas', 'cajas', 'strings'): setattr(nuevo, atributo, dict(getattr(self, atributo)))
+        return nuevo
+
+    # --- ACTUALIZACION INCREMENTAL ---
+    def actualizar(self, df_med):
+        # DB_MEDICIONES solo crece por el final: las filas nuevas son las de indice mayor al ultimo visto.
+        with self._lock:
+            if df_med.empty: return
+            df = df_med.dropna(subset=['Fecha'])
+            if len(df_med) < self._filas or self._ultimo_indice is None:
+                self._reiniciar(); nuevas = df
+            else: nuevas = df[df.index > self._ultimo_indice]
+            self._filas = len(df_med); self._ultimo_indice = df_med.index.max()
+            if nuevas.empty: return
+            for planta, fechas_nuevas in nuevas.groupby('Planta', observed=True)['Fecha']:
+                self._actualizar_planta(df, planta, fechas_nuevas.dt.normalize().unique())
+
+    def _actualizar_planta(self, df, planta, fechas_nuevas):
+        previas = self._ventanas.get(planta, [])
+        # union() no ordena si el indice previo esta vacio; agrupar_fechas necesita fechas ordenadas
+        fechas = self._fechas.get(planta, pd.DatetimeIndex([])).append(pd.DatetimeIndex(fechas_nuevas)).unique().sort_values()
+        ventanas = agrupar_fechas(fechas, self.brecha_dias)
+        self._fechas[planta] = fechas; self._ventanas[planta] = ventanas
+        vigentes = {ini for ini, _ in ventanas}
+        for ini, _ in previas:
+            if ini not in vigentes: self.cajas.pop(id_campana(planta, ini), None); self.strings.pop(id_campana(planta, ini), None)
+        # Solo se recalculan las campañas que contienen alguna fecha nueva (o que cambiaron de ventana).
+        tocadas = [(ini, fin) for ini, fin in ventanas
+                   if (ini, fin) not in previas or any(ini <= f <= fin for f in fechas_nuevas)]
+        if not tocadas: return
+        df_p = df[df['Planta'] == planta]
+        dia = df_p['Fecha'].dt.normalize()
+        for ini, fin in tocadas: self._calcular(id_campana(planta, ini), df_p[(dia >= ini) & (dia <= fin)])
+
+    def _calcular(self, campana, df_c):
+        por_string = df_c.groupby(['Equipo', 'String ID'], observed=True)['Amperios'].mean()
+        prom_caja = por_string.groupby(level='Equipo', observed=True).transform('mean')
+        diag = diagnosticar_strings(por_string, prom_caja, self.tolerancia)
+        g = por_string.groupby(level='Equipo', observed=True)
+        cajas = pd.DataFrame({'Strings': g.size(), 'Media': g.mean(), 'Mediana': g.median(), 'Desv': g.std(),
+                              'Min': g.min(), 'Max': g.max(),
+                              'Cortes': (diag == "CORTE (0A)").groupby(level='Equipo', observed=True).sum(),
+                              'Bajos': (diag == "BAJA CORRIENTE").groupby(level='Equipo', observed=True).sum()})
+        self.cajas[campana] = cajas
+        self.strings[campana] = por_string
+
+    # --- CONSULTAS ---
+    def campanas(self, planta):
+        # Mas reciente primero.
+        return [{'id': id_campana(planta, ini), 'inicio': ini, 'fin': fin, 'etiqueta': etiqueta_campana(ini, fin)}
+                for ini, fin in reversed(self._ventanas.get(planta, []))]
+
+    def ventana(self, campana):
+        planta = campana.rsplit("|", 1)[0]
+        return next(((i, f) for i, f in self._ventanas.get(planta, []) if id_campana(planta, i) == campana), None)
+
+    def _anteriores(self, campana):
+        planta = campana.rsplit("|", 1)[0]
+        ids = [c['id'] for c in reversed(self.campanas(planta))]
+        return ids[:ids.index(campana)] if campana in ids else []
+
+    def tendencia_strings(self, campana):
+        # Deriva de cada string frente a su campaña anterior y a su promedio historico.
+        actual = self.strings.get(campana)
+        anteriores = self._anteriores(campana)
+        if actual is None or not anteriores: return pd.DataFrame()
+        hist = pd.concat([self.strings[c] for c in anteriores], axis=1, keys=anteriores)
+        previo = hist.ffill(axis=1).iloc[:, -1]
+        df = pd.DataFrame({'Actual': actual, 'Anterior': previo.reindex(actual.index),
+                           'Historico': hist.mean(axis=1).reindex(actual.index)}).dropna(subset=['Anterior'])
+        df['Deriva_A'] = df['Actual'] - df['Anterior']
+        df['Deriva_Pct'] = np.where(df['Anterior'] > 0, df['Deriva_A'] / df['Anterior'] * 100, 0)
+        return df.reset_index()
+
+    def tendencia_cajas(self, campana):
+        actual = self.cajas.get(campana)
+        anteriores = self._anteriores(campana)
+        if actual is None or not anteriores: return pd.DataFrame()
+        hist = pd.concat([self.cajas[c]['Media'] for c in anteriores], axis=1, keys=anteriores)
+        df = pd.DataFrame({'Actual': actual['Media'], 'Anterior': hist.ffill(axis=1).iloc[:, -1].reindex(actual.index),
+                           'Historico': hist.mean(axis=1).reindex(actual.index), 'Campañas': hist.notna().sum(axis=1).reindex(actual.index)})
+        df = df.dropna(subset=['Anterior'])
+        df['Deriva_A'] = df['Actual'] - df['Anterior']
+        df['Deriva_Pct'] = np.where(df['Anterior'] > 0, df['Deriva_A'] / df['Anterior'] * 100, 0)
+        return df.reset_index()
+
+
+class IndicesPorVersion:
+    # Un indice por version de DB_MEDICIONES, compartido por las sesiones que la ven; una vez publicado no se modifica
+    # (lecturas sin lock). Una version que sale de la anterior agregando filas (mismo linaje: misma carga de la hoja)
+    # parte de una copia de su indice y solo procesa las filas nuevas; una recarga arma uno desde cero.
+    def __init__(self, max_versiones=MAX_VERSIONES):
+        self.max_versiones = max_versiones
+        self._lock = threading.Lock()
+        self._indices = OrderedDict()  # version -> (linaje, IndiceCampanas)
+
+    def obtener(self, version, df_med, linaje=None):
+        with self._lock:
+            if version in self._indices:
+                self._indices.move_to_end(version); return self._indices[version][1]
+            base = next((i for l, i in reversed(self._indices.values()) if linaje is not None and l == linaje), None)
+            indice = base.copia() if base is not None else IndiceCampanas()
+            indice.actualizar(df_med)
+            self._indices[version] = (linaje, indice)
+            while len(self._indices) > self.max_versiones: self._indices.popitem(last=False)
+            return indice
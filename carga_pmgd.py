@@ -0,0 +1,413 @@
+# --- PRUEBA DE CARGA MULTI-SESION (APPTEST CONTRA UN LIBRO LOCAL) ---
+# Simula tecnicos concurrentes sobre una sola instancia de pmgd_monitor.py: cada sesion es un AppTest en su propio hilo
+# que recorre flujos reales (registrar fallas, guardar mediciones, abrir Informes, bajar PDF y Excel) contra un
+# DB_FUSIBLES sintetico con latencia configurable (herramientas/hoja_local.py). Reporta percentiles de latencia por accion,
+# throughput, cola de escritura y memoria para cada cantidad de sesiones.
+#   python carga_pmgd.py                                   # 1, 4 y 8 sesiones; guarda .carga/<commit>.json
+#   python carga_pmgd.py --sesiones 1 2 4 8 16 --latencia 0.3 --duracion 60 --tamano 10x40x24x4
+#   python carga_pmgd.py --comparar <commit | archivo.json>
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from herramientas.resultados import commit_actual, cargar_resultados, guardar_resultados, comparar, ratio
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pmgd_monitor.py")
+SESIONES = [1, 4, 8]
+DIR_RESULTADOS = ".carga"
+PERCENTILES = [50, 90, 99]
+# Peso de cada flujo en la mezcla (un tecnico en terreno registra mucho mas de lo que revisa informes)
+FLUJOS = {'fallas': 3, 'mediciones': 3, 'informes_fallas': 2, 'informes_mediciones': 2, 'diagnostico': 1, 'flota': 1, 'sincronizar': 0.5}
+SECCION = {'fallas': "📝 Fallas", 'mediciones': "⚡ Mediciones", 'informes': "📊 Informes", 'diagnostico': "🔍 Diagnóstico", 'flota': "🌐 Flota"}
+PERIODOS = ["Todo", "Este Mes", "Último Trimestre", "Último Semestre", "Último Año"]
+ESPERA_INFORME = 180  # segundos maximos esperando el PDF de auditoria
+# compartir_runtime y capturar_descargas parchan internos de Streamlit (no son API publica): se verificaron contra esta
+# version. Con otra se aborta antes de medir; --forzar-streamlit lo intenta igual (los atributos se siguen verificando).
+STREAMLIT_PROBADO = "1.65"
+
+
+def memoria_mb():
+    # RSS actual (Linux); en otros sistemas, el pico del proceso.
+    try:
+        with open("/proc/self/statm") as f: return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError): return pico_mb()
+
+
+def pico_mb():
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1e6 if sys.platform == "darwin" else pico / 1e3
+
+
+def percentil(valores, p):
+    if not valores: return None
+    v = sorted(valores); k = (len(v) - 1) * p / 100; i = int(k)
+    return v[i] + (v[min(i + 1, len(v) - 1)] - v[i]) * (k - i)
+
+
+# --- INTERNOS DE STREAMLIT ---
+def verificar_streamlit(forzar=False):
+    import streamlit
+    if streamlit.__version__.split(".")[:2] == STREAMLIT_PROBADO.split(".") or forzar: return
+    raise SystemExit(f"carga_pmgd.py parcha internos de Streamlit {STREAMLIT_PROBADO}.x y hay instalado {streamlit.__version__}: "
+                     f"revisar compartir_runtime/capturar_descargas y actualizar STREAMLIT_PROBADO, o correr con --forzar-streamlit.")
+
+
+def _interno(objeto, nombre):
+    # Un atributo que ya no existe rompe el parche en silencio (o a mitad de la carga): fallar aqui, con el nombre.
+    if not hasattr(objeto, nombre):
+        raise RuntimeError(f"Streamlit cambio: {getattr(objeto, '__name__', objeto)}.{nombre} no existe (probado con {STREAMLIT_PROBADO}.x)")
+    return getattr(objeto, nombre)
+
+
+# --- DESCARGAS DIFERIDAS ---
+# download_button(data=callable) registra la funcion en el MediaFileManager y solo la ejecuta al hacer clic; se guarda
+# aqui para que la sesion simulada pueda "descargar" igual que el navegador.
+_diferidos = {}
+
+
+def capturar_descargas():
+    from streamlit.proto.DownloadButton_pb2 import DownloadButton
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    original = _interno(MediaFileManager, "add_deferred")
+    if "deferred_file_id" not in DownloadButton.DESCRIPTOR.fields_by_name:  # Sesion._descargar lo lee del boton
+        raise RuntimeError(f"Streamlit cambio: DownloadButton.deferred_file_id no existe (probado con {STREAMLIT_PROBADO}.x)")
+    if getattr(original, "capturado", False): return
+    def add_deferred(self, data_callable, *args, **kwargs):
+        file_id = original(self, data_callable, *args, **kwargs)
+        _diferidos[file_id] = data_callable
+        return file_id
+    add_deferred.capturado = True
+    MediaFileManager.add_deferred = add_deferred
+
+
+# --- UN SOLO "SERVIDOR" PARA TODAS LAS SESIONES ---
+# AppTest esta pensado para una sesion a la vez: en cada rerun compila el script, parcha la configuracion
+# (global.appTest) y deja Runtime._instance en None al terminar, lo que rompe a las demas sesiones en curso. Como en un
+# servidor real, el bytecode se compila una vez, la configuracion es una sola y las sesiones siempre encuentran un runtime.
+def compartir_runtime():
+    import contextlib
+    from streamlit import config
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.util import build_mock_config_get_option
+    if getattr(_interno(Runtime, "instance"), "compartido", False): return
+    for objeto, nombre in ((Runtime, "_instance"), (ScriptCache, "get_bytecode"), (config, "get_option"), (app_test, "patch_config_options")):
+        _interno(objeto, nombre)
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    app_test.patch_config_options = lambda opciones: contextlib.nullcontext()
+    # Avisos esperables fuera de un rerun (descargas diferidas, caches creadas entre reruns)
+    for nombre in ("streamlit.runtime.scriptrunner_utils.script_run_context", "streamlit.runtime.caching.cache_data_api"):
+        logging.getLogger(nombre).addFilter(lambda registro: registro.levelno >= logging.ERROR)
+    ultimo = {}; instancia = Runtime.instance.__func__
+    def instance(cls):
+        if cls._instance is not None: ultimo['runtime'] = cls._instance; return cls._instance
+        return ultimo['runtime'] if 'runtime' in ultimo else instancia(cls)
+    instance.compartido = True
+    Runtime.instance = classmethod(instance)
+    bytecode = {}; lock = threading.Lock(); get_bytecode = ScriptCache.get_bytecode
+    def compilar(self, script_path):
+        with lock:
+            if script_path not in bytecode: bytecode[script_path] = get_bytecode(self, script_path)
+            return bytecode[script_path]
+    ScriptCache.get_bytecode = compilar
+
+
+# --- REGISTRO DE RESULTADOS ---
+class Registro:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tiempos = {}   # accion -> [ms]
+        self.errores = {}   # accion -> [mensaje]
+        self.flujos = 0
+
+    def anotar(self, accion, ms, error=None):
+        with self._lock:
+            if error is None: self.tiempos.setdefault(accion, []).append(ms)
+            else: self.errores.setdefault(accion, []).append(error)
+
+    def resumen(self, segundos):
+        acciones = {}
+        for accion in sorted(set(self.tiempos) | set(self.errores)):
+            t = self.tiempos.get(accion, [])
+            acciones[accion] = {'n': len(t), 'errores': len(self.errores.get(accion, [])),
+                                **{f"p{p}": round(percentil(t, p), 1) if t else None for p in PERCENTILES},
+                                'max': round(max(t), 1) if t else None}
+        n = sum(len(t) for t in self.tiempos.values())
+        return {'acciones': acciones, 'acciones_s': round(n / segundos, 2), 'flujos_s': round(self.flujos / segundos, 2),
+                'errores': sum(len(e) for e in self.errores.values()),
+                'ejemplos_error': sorted({e for es in self.errores.values() for e in es})[:5]}
+
+
+# --- SESION SIMULADA ---
+class Sesion:
+    def __init__(self, registro, plantas, rng, pausa, con_pdf, timeout):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(SCRIPT, default_timeout=timeout)
+        self.registro = registro
+        self.plantas = plantas
+        self.rng = rng
+        self.pausa = pausa
+        self.con_pdf = con_pdf
+        self.seccion = None
+
+    def _correr(self, accion, paso=None):
+        # Un rerun medido; devuelve False si la app termino con una excepcion.
+        t0 = time.perf_counter()
+        try:
+            if paso is not None: paso()
+            self.at.run()
+        except Exception as e:
+            self.registro.anotar(accion, None, f"{type(e).__name__}: {e}"[:200]); return False
+        ms = (time.perf_counter() - t0) * 1000
+        if self.at.exception:
+            self.registro.anotar(accion, None, str(self.at.exception[0].message)[:200]); return False
+        self.registro.anotar(accion, ms)
+        return True
+
+    def _pensar(self):
+        if self.pausa: time.sleep(self.pausa * self.rng.uniform(0.5, 1.5))
+
+    def _widget(self, tipo, etiqueta):
+        return next((w for w in getattr(self.at, tipo) if w.label == etiqueta), None)
+
+    def _ir(self, seccion):
+        if self.seccion == seccion: return True
+        ok = self._correr(f"navegar.{seccion}", lambda: self.at.radio(key="seccion").set_value(SECCION[seccion]))
+        self.seccion = seccion if ok else None
+        return ok
+
+    def _descargar(self, accion, etiqueta):
+        boton = self._widget("download_button", etiqueta)
+        if boton is None: return
+        generar = _diferidos.get(boton.proto.deferred_file_id)
+        if generar is None: return  # datos ya incluidos en la pagina (no hay nada que generar)
+        from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+        t0 = time.perf_counter()
+        try:
+            # Misma conversion que hace el servidor al servir el archivo: un tipo no soportado es un error de descarga
+            datos, _ = convert_data_to_bytes_and_infer_mime(generar(), unsupported_error=TypeError(f"{etiqueta}: tipo de datos no soportado"))
+            if not datos: raise ValueError(f"{etiqueta}: archivo vacio")
+        except Exception as e:
+            self.registro.anotar(accion, None, f"{type(e).__name__}: {e}"[:200]); return
+        self.registro.anotar(accion, (time.perf_counter() - t0) * 1000)
+
+    # --- FLUJOS ---
+    def abrir(self):
+        if not self._correr("abrir"): return False
+        self.seccion = "fallas"
+        planta = self._widget("selectbox", "Planta:")
+        if planta is not None and len(self.plantas) > 1:
+            self._correr("cambiar_planta", lambda: planta.set_value(self.rng.choice(self.plantas)))
+        return True
+
+    def fallas(self):
+        if not self._ir("fallas"): return
+        def llenar():
+            for etiqueta, valor in (("Inv", self.rng.randint(1, 4)), ("Caja", self.rng.randint(1, 10)), ("Str", self.rng.randint(1, 24)),
+                                    ("A", round(self.rng.uniform(0, 15), 1))):
+                w = self._widget("number_input", etiqueta)
+                if w is not None: w.set_value(valor)
+            self._widget("text_input", "Nota").input(f"carga {self.rng.randint(0, 9999)}")
+            self._widget("button", "Guardar").click()
+        self._correr("fallas.guardar", llenar)
+
+    def mediciones(self):
+        if not self._ir("mediciones"): return
+        import pandas as pd
+        n = 12; base = self.rng.uniform(8, 10)
+        amp = [round(base + self.rng.gauss(0, 0.3), 2) if self.rng.random() > 0.05 else 0.0 for _ in range(n)]
+        def editar():
+            self.at.number_input(key="mi").set_value(self.rng.randint(1, 4)); self.at.number_input(key="mc").set_value(self.rng.randint(1, 10))
+            self.at.session_state['data_med'] = pd.DataFrame({'String ID': [f"Str-{i + 1}" for i in range(n)], 'Amperios': amp})
+        if not self._correr("mediciones.editar", editar): return
+        self._descargar("descarga.pdf_caja", "📄 PDF Caja")
+        guardar = self._widget("button", "💾 Guardar")
+        if guardar is not None: self._correr("mediciones.guardar", guardar.click)
+
+    def informes_fallas(self):
+        if not self._ir("informes"): return
+        tipo = self._widget("radio", "Tipo:")
+        if tipo is not None and tipo.value != "Fallas": self._correr("informes.tipo", lambda: tipo.set_value("Fallas"))
+        periodo = self._widget("radio", "Periodo:")
+        if periodo is not None: self._correr("informes.fallas", lambda: periodo.set_value(self.rng.choice(PERIODOS)))
+        self._descargar("descarga.excel_fallas", "📥 Excel Datos")
+
+    def informes_mediciones(self):
+        if not self._ir("informes"): return
+        tipo = self._widget("radio", "Tipo:")
+        if tipo is not None and tipo.value != "Mediciones":
+            if not self._correr("informes.mediciones", lambda: tipo.set_value("Mediciones")): return
+        self._descargar("descarga.mediciones", "📥 Descargar")
+        generar = self._widget("button", "📄 GENERAR INFORME PDF")
+        if not self.con_pdf or generar is None: return
+        # El PDF se genera en la cola de informes: se mide desde el clic hasta que el boton de descarga aparece
+        t0 = time.perf_counter()
+        if not self._correr("informe_pdf.enviar", generar.click): return
+        while self._widget("download_button", "📄 DESCARGAR INFORME PDF") is None:
+            fallo = next((e.value for e in self.at.error if str(e.value).startswith("Error al generar")), None)
+            if fallo: self.registro.anotar("informe_pdf.listo", None, fallo[:200]); return
+            if time.perf_counter() - t0 > ESPERA_INFORME: self.registro.anotar("informe_pdf.listo", None, "tiempo de espera agotado"); return
+            time.sleep(0.5)
+            # Otra sesion guardo mediciones de la planta: el trabajo enviado es de la version anterior y el boton vuelve
+            generar = self._widget("button", "📄 GENERAR INFORME PDF")
+            if generar is not None: ok = self._correr("informe_pdf.reenvio", generar.click)
+            else: ok = self._correr("informe_pdf.sondeo")
+            if not ok: return
+        self.registro.anotar("informe_pdf.listo", (time.perf_counter() - t0) * 1000)
+
+    def diagnostico(self):
+        self.seccion = None if self.seccion == "diagnostico" else self.seccion
+        self._ir("diagnostico")
+
+    def flota(self):
+        self.seccion = None if self.seccion == "flota" else self.seccion
+        self._ir("flota")
+
+    def sincronizar(self):
+        boton = self._widget("button", "🔄 Sincronizar")
+        if boton is not None: self._correr("sincronizar", boton.click)
+
+    def recorrer(self, hasta):
+        nombres, pesos = list(FLUJOS), list(FLUJOS.values())
+        while time.perf_counter() < hasta:
+            getattr(self, self.rng.choices(nombres, pesos)[0])()
+            with self.registro._lock: self.registro.flujos += 1
+            self._pensar()
+
+
+# --- NIVELES DE CARGA ---
+def llamadas_api():
+    from herramientas.hoja_local import cliente_desde_entorno
+    libro = cliente_desde_entorno().open("DB_FUSIBLES")
+    return sum(h.llamadas for h in libro.worksheets())
+
+
+def escrituras_pendientes(ruta):
+    try:
+        with sqlite3.connect(ruta) as con: return con.execute("SELECT COUNT(*) FROM pendientes WHERE estado = 'pendiente'").fetchone()[0]
+    except sqlite3.Error: return None
+
+
+def correr_nivel(k, args, plantas, semilla):
+    registro = Registro(); gc.collect(); mem_inicio = memoria_mb(); api_inicio = llamadas_api()
+    sesiones = [Sesion(registro, plantas, random.Random(semilla * 1000 + i), args.pausa, not args.sin_pdf, args.timeout) for i in range(k)]
+    reloj = {}
+    def largar():
+        reloj['inicio'] = time.perf_counter(); reloj['hasta'] = reloj['inicio'] + args.duracion
+    # Todas las sesiones se abren a la vez ("abrir" incluye esa carga concurrente); el reloj corre cuando estan listas
+    listas = threading.Barrier(k, action=largar)
+    def tecnico(sesion):
+        try: sesion.abrir()
+        finally: listas.wait()
+        sesion.recorrer(reloj['hasta'])
+    hilos = [threading.Thread(target=tecnico, args=(s,), name=f"tecnico-{i}", daemon=True) for i, s in enumerate(sesiones)]
+    t_abrir = time.perf_counter()
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    inicio = reloj['inicio']; segundos = time.perf_counter() - inicio
+    gc.collect(); mem_fin = memoria_mb(); api = llamadas_api() - api_inicio  # con las sesiones todavia vivas
+    # Cuanto tarda la cola de escritura en llevar a la hoja lo guardado durante el nivel
+    t_cola = time.perf_counter(); pendientes = escrituras_pendientes(os.environ["PMGD_ESPEJO"])
+    while pendientes and time.perf_counter() - t_cola < args.timeout:
+        time.sleep(0.5); pendientes = escrituras_pendientes(os.environ["PMGD_ESPEJO"])
+    r = {'sesiones': k, 'segundos': round(segundos, 1), 'segundos_apertura': round(inicio - t_abrir, 1), **registro.resumen(segundos),
+         'llamadas_api': api, 'escrituras_pendientes': pendientes, 'segundos_vaciar_cola': round(time.perf_counter() - t_cola, 1),
+         'memoria_mb': round(mem_fin, 1), 'memoria_por_sesion_mb': round(max(0.0, mem_fin - mem_inicio) / k, 2), 'pico_mb': round(pico_mb(), 1)}
+    del sesiones; gc.collect()
+    return r
+
+
+def imprimir_nivel(r):
+    print(f"\n{r['sesiones']} sesiones: {r['acciones_s']} acciones/s, {r['flujos_s']} flujos/s en {r['segundos']} s "
+          f"(apertura {r['segundos_apertura']} s), {r['errores']} errores")
+    print(f"  memoria {r['memoria_mb']} MB (+{r['memoria_por_sesion_mb']} MB/sesion, pico {r['pico_mb']} MB)   "
+          f"API {r['llamadas_api']} llamadas   cola de escritura al dia en {r['segundos_vaciar_cola']} s" +
+          (f" ({r['escrituras_pendientes']} sin escribir)" if r['escrituras_pendientes'] else ""))
+    for accion, a in r['acciones'].items():
+        p = "  ".join(f"p{q} {a[f'p{q}']:>8.1f}" if a[f'p{q}'] is not None else f"p{q} {'-':>8}" for q in PERCENTILES)
+        print(f"  {accion:<26} n={a['n']:<5} {p}  max {a['max'] if a['max'] is not None else '-':>8} ms" + (f"  errores {a['errores']}" if a['errores'] else ""))
+    for e in r['ejemplos_error']: print(f"  ! {e}")
+
+
+# --- COMPARACION ---
+def lineas_comparacion(n, p):
+    # Throughput del nivel (bajar es peor) y p90 de cada accion (subir es peor).
+    x = ratio(n['acciones_s'], p['acciones_s'])
+    yield (f"  {n['sesiones']:>3} sesiones  throughput {p['acciones_s']:>7.2f} -> {n['acciones_s']:>7.2f} acciones/s  x{x:.2f}"
+           f"   mem/sesion {p['memoria_por_sesion_mb']:.1f} -> {n['memoria_por_sesion_mb']:.1f} MB", x, False)
+    for accion, a in n['acciones'].items():
+        b = p['acciones'].get(accion)
+        if not b or not a['p90'] or not b['p90']: continue
+        x = a['p90'] / b['p90']
+        yield f"      {accion:<26} p90 {b['p90']:>9.1f} -> {a['p90']:>9.1f} ms  x{x:.2f}", x, True
+
+
+# --- CLI ---
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Prueba de carga multi-sesion de pmgd_monitor.py contra un libro local.")
+    ap.add_argument("--sesiones", nargs="*", type=int, default=SESIONES, help="cantidades de sesiones concurrentes a probar")
+    ap.add_argument("--duracion", type=float, default=30, help="segundos de carga por nivel (despues de abrir las sesiones)")
+    ap.add_argument("--pausa", type=float, default=1.0, help="segundos de 'pensar' entre flujos (±50%%)")
+    ap.add_argument("--latencia", type=float, default=0.2, help="segundos por llamada al libro falso (como la API de Google)")
+    ap.add_argument("--tamano", default="4x10x24x3", help="IxCxSxK por planta: inversores x cajas x strings x campañas")
+    ap.add_argument("--plantas", type=int, default=3)
+    ap.add_argument("--sin-pdf", action="store_true", help="no generar el PDF de auditoria (kaleido)")
+    ap.add_argument("--timeout", type=float, default=120, help="segundos maximos por rerun")
+    ap.add_argument("--semilla", type=int, default=0)
+    ap.add_argument("--salida", default=DIR_RESULTADOS, help="directorio de resultados")
+    ap.add_argument("--comparar", help="commit o archivo .json previo")
+    ap.add_argument("--forzar-streamlit", action="store_true", help=f"correr aunque Streamlit no sea {STREAMLIT_PROBADO}.x")
+    args = ap.parse_args(argv)
+    verificar_streamlit(args.forzar_streamlit)
+    salida = os.path.abspath(args.salida)
+    previo = cargar_resultados(args.comparar, salida) if args.comparar else None
+
+    # Instancia aislada: espejo, caches y configuracion de plantas en un directorio temporal.
+    commit = commit_actual(); trabajo = tempfile.mkdtemp(prefix="carga_pmgd_"); origen = os.getcwd()
+    os.environ.update({'PMGD_LIBRO_LOCAL': args.tamano, 'PMGD_PLANTAS_LOCALES': str(args.plantas), 'PMGD_LATENCIA_SHEETS': str(args.latencia),
+                       'PMGD_ESPEJO': os.path.join(trabajo, "espejo.db"), 'PMGD_CACHE_GRAFICOS': os.path.join(trabajo, "graficos"),
+                       'PMGD_CACHE_FOTOS': os.path.join(trabajo, "fotos")})
+    sys.path.insert(0, os.path.dirname(SCRIPT))
+    from herramientas.hoja_local import plantas_locales
+    plantas = plantas_locales(args.plantas)
+    os.chdir(trabajo)
+    with open("plantas_config.json", "w", encoding="utf-8") as f: json.dump(plantas, f, ensure_ascii=False)
+    capturar_descargas(); compartir_runtime()
+
+    resultado = {'commit': commit, 'fecha': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+                 'cpus': os.cpu_count(), 'config': {k: v for k, v in vars(args).items() if k not in ("salida", "comparar")}, 'niveles': []}
+    print(f"Libro sintetico {args.tamano} x {args.plantas} plantas, latencia {args.latencia * 1000:.0f} ms/llamada, {args.duracion:.0f} s por nivel")
+    try:
+        # Calentamiento (imports, primera sincronizacion del libro, un flujo de cada tipo): fuera de las mediciones.
+        t0 = time.perf_counter(); calentamiento = Registro()
+        sesion = Sesion(calentamiento, plantas, random.Random(args.semilla), 0, not args.sin_pdf, args.timeout)
+        if sesion.abrir():
+            for flujo in FLUJOS: getattr(sesion, flujo)()
+        del sesion
+        if calentamiento.errores: print(f"Error en la app: {calentamiento.resumen(1)['ejemplos_error']}"); return 1
+        print(f"Calentamiento {time.perf_counter() - t0:.1f} s")
+        for k in args.sesiones:
+            r = correr_nivel(k, args, plantas, args.semilla + k)
+            resultado['niveles'].append(r); imprimir_nivel(r)
+    finally:
+        os.chdir(origen); shutil.rmtree(trabajo, ignore_errors=True)
+
+    print(f"\nResultados en {guardar_resultados(resultado, salida)}")
+    if previo is not None: return 1 if comparar(resultado, previo, 'niveles', lambda n: n['sesiones'], lineas_comparacion) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# --- COLA DE ESCRITURA DIFERIDA (WRITE-BEHIND) ---
+# Las altas y bajas se guardan primero en SQLite y un hilo las envia a Google en lotes, con reintentos.
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from espejo_local import RUTA_ESPEJO, asignar_ids
+from metricas import etapa
+
+VENTANA_LOTE = 2.0  # segundos que se espera para juntar escrituras antes de enviar
+FILAS_POR_ENVIO = 5000  # append_rows por partes: una importacion masiva no cabe en una sola peticion
+ESPERA_MAX = 300
+MAX_INTENTOS = 20  # envios fallidos antes de aparcar la operacion (estado 'fallido'; sigue visible en la app)
+
+
+def nuevo_id():
+    return uuid.uuid4().hex[:12]
+
+
+def _letra_columna(n):
+    letras = ""
+    while n > 0: n, r = divmod(n - 1, 26); letras = chr(65 + r) + letras
+    return letras
+
+
+def _columna_en(encabezado, col):
+    # Las claves del registro usan espacios ("String ID"); la hoja puede tener guion bajo.
+    return col if col in encabezado or col.replace(" ", "_") not in encabezado else col.replace(" ", "_")
+
+
+def _fila_segun_encabezado(encabezado, valores):
+    fila = []
+    for col in encabezado:
+        v = valores.get(col, valores.get(col.replace("_", " "), ""))
+        fila.append("" if v is None else str(v))
+    return fila
+
+
+def borrar_filas(sheet, filas):
+    # Un solo batch_update con todas las filas (de abajo hacia arriba para no correr los indices).
+    filas = sorted(set(filas), reverse=True)
+    if not filas: return
+    libro = getattr(sheet, "spreadsheet", None)
+    if libro is not None and hasattr(libro, "batch_update"):
+        libro.batch_update({"requests": [{"deleteDimension": {"range": {
+            "sheetId": sheet.id, "dimension": "ROWS", "startIndex": f - 1, "endIndex": f}}} for f in filas]})
+    else:
+        for f in filas: sheet.delete_rows(f)
+
+
+class ColaEscritura:
+    def __init__(self, espejo, abrir_hoja, ruta=RUTA_ESPEJO, automatico=True):
+        self.espejo = espejo
+        self.abrir_hoja = abrir_hoja
+        self.ultimo_error = None
+        self._lock = threading.RLock()
+        self._evento = threading.Event()
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._con.executescript("""
+            CREATE TABLE IF NOT EXISTS pendientes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, hoja TEXT, operacion TEXT, registro_id TEXT,
+                valores TEXT, estado TEXT DEFAULT 'pendiente', intentos INTEGER DEFAULT 0, creado TEXT, error TEXT);
+            CREATE INDEX IF NOT EXISTS ix_pendientes_estado ON pendientes (estado, hoja);
+        """)
+        if automatico:
+            threading.Thread(target=self._bucle, name="cola-escritura", daemon=True).start()
+            if self.cantidad_pendiente(): self._evento.set()
+
+    # --- ENCOLAR ---
+    def encolar_inserciones(self, hoja, registros):
+        # registros: dicts columna -> valor; se les asigna ID si no lo traen.
+        ahora = datetime.now().isoformat(timespec="seconds")
+        for r in registros: r.setdefault("ID", nuevo_id())
+        with self._lock, self._con:
+            self._con.executemany(
+                "INSERT INTO pendientes (hoja, operacion, registro_id, valores, creado) VALUES (?, 'insertar', ?, ?, ?)",
+                [(hoja, r["ID"], json.dumps(r, default=str), ahora) for r in registros])
+        self._evento.set()
+        return [r["ID"] for r in registros]
+
+    def encolar_actualizacion(self, hoja, registro_id, valores):
+        # Cambia celdas de una fila existente (Reparacion de una falla abierta).
+        with self._lock, self._con:
+            self._con.execute("INSERT INTO pendientes (hoja, operacion, registro_id, valores, creado) VALUES (?, 'actualizar', ?, ?, ?)",
+                              (hoja, registro_id, json.dumps(valores, default=str), datetime.now().isoformat(timespec="seconds")))
+        self._evento.set()
+
+    def encolar_borrado(self, hoja, registro_id):
+        with self._lock, self._con:
+            # Si el alta aun no salio, se anulan ambas (y los cambios de celdas de esa fila) sin tocar Google.
+            cur = self._con.execute("DELETE FROM pendientes WHERE hoja = ? AND registro_id = ? AND operacion = 'insertar' AND estado = 'pendiente'",
+                                    (hoja, registro_id))
+            if cur.rowcount:
+                self._con.execute("DELETE FROM pendientes WHERE hoja = ? AND registro_id = ? AND operacion = 'actualizar' AND estado = 'pendiente'",
+                                  (hoja, registro_id))
+                return
+            self._con.execute("INSERT INTO pendientes (hoja, operacion, registro_id, creado) VALUES (?, 'borrar', ?, ?)",
+                              (hoja, registro_id, datetime.now().isoformat(timespec="seconds")))
+        self._evento.set()
+
+    # --- CONSULTAS ---
+    def _pendientes(self, hoja=None, estados="'pendiente'"):
+        sql = f"SELECT id, hoja, operacion, registro_id, valores FROM pendientes WHERE estado IN ({estados})"
+        with self._lock:
+            if hoja is None: return self._con.execute(sql + " ORDER BY id").fetchall()
+            return self._con.execute(sql + " AND hoja = ? ORDER BY id", (hoja,)).fetchall()
+
+    def cantidad_pendiente(self):
+        with self._lock: return self._con.execute("SELECT COUNT(*) FROM pendientes WHERE estado = 'pendiente'").fetchone()[0]
+
+    def cantidad_fallida(self):
+        with self._lock: return self._con.execute("SELECT COUNT(*) FROM pendientes WHERE estado = 'fallido'").fetchone()[0]
+
+    def ids_pendientes(self, hoja=None):
+        return {r[3] for r in self._pendientes(hoja, "'pendiente', 'fallido'")}
+
+    def superponer(self, hoja, df):
+        # Vista local = espejo + altas pendientes + cambios pendientes - bajas pendientes (las aparcadas tambien: no se
+        # pierden de la vista).
+        ops = self._pendientes(hoja, "'pendiente', 'fallido'")
+        if not ops: return df
+        borrar = {r[3] for r in ops if r[2] == "borrar"}
+        ids = set(df['ID']) if 'ID' in df.columns else set()
+        altas = pd.DataFrame([v for v in (json.loads(r[4]) for r in ops if r[2] == "insertar") if v["ID"] not in ids])
+        if not altas.empty:
+            # Las claves del registro usan espacios ("String ID"); la hoja puede tener guion bajo.
+            altas = altas.rename(columns={c: c.replace(" ", "_") for c in altas.columns if c not in df.columns and c.replace(" ", "_") in df.columns})
+            inicio = int(df.index.max()) + 1 if len(df) else 0
+            altas.index = range(inicio, inicio + len(altas))
+            df = pd.concat([df, altas])
+        for r in ops:
+            if r[2] != "actualizar" or 'ID' not in df.columns: continue
+            for col, v in json.loads(r[4]).items():
+                col = _columna_en(list(df.columns), col)
+                if col not in df.columns: df[col] = ""
+                df.loc[df['ID'] == r[3], col] = v
+        if borrar and 'ID' in df.columns: df = df[~df['ID'].isin(borrar)]
+        return df
+
+    # --- ENVIO ---
+    def _marcar(self, ids_op, estado, error=None):
+        with self._lock, self._con:
+            self._con.executemany("UPDATE pendientes SET estado = ?, error = ?, intentos = intentos + 1 WHERE id = ?",
+                                  [(estado, error, i) for i in ids_op])
+
+    def _fallar(self, ids_op, error):
+        # Se anota el error y el intento; tras MAX_INTENTOS la operacion se aparca y deja de reintentarse.
+        with self._lock, self._con:
+            self._con.executemany("UPDATE pendientes SET error = ?, intentos = intentos + 1, "
+                                  "estado = CASE WHEN intentos + 1 >= ? THEN 'fallido' ELSE estado END WHERE id = ?",
+                                  [(f"{type(error).__name__}: {error}"[:500], MAX_INTENTOS, i) for i in ids_op])
+
+    def reintentar_fallidos(self):
+        with self._lock, self._con: self._con.execute("UPDATE pendientes SET estado = 'pendiente', intentos = 0 WHERE estado = 'fallido'")
+        self._evento.set()
+
+    def _fijar_ids(self, hoja, sheet):
+        # Filas antiguas sin ID en la hoja: se escribe el ID derivado del contenido una sola vez (una llamada), asi editar
+        # una celda despues no lo cambia y una baja encolada sigue encontrando su fila.
+        crudo = self.espejo.dataframe(hoja, con_ids=False)
+        if crudo.empty or ('ID' in crudo.columns and not (crudo['ID'].astype(str).str.strip() == "").any()): return
+        encabezado = self.espejo.encabezado(hoja)
+        ids = asignar_ids(crudo)['ID'].reindex(range(int(crudo.index.max()) + 1), fill_value="")  # indice = fila - 2
+        if 'ID' in encabezado: col = encabezado.index('ID') + 1
+        else: col = len(encabezado) + 1; sheet.update_cell(1, col, 'ID')
+        letra = _letra_columna(col)
+        with etapa("sheets.escritura", hoja=hoja, filas=len(ids)):
+            sheet.update(values=[[v] for v in ids], range_name=f"{letra}2:{letra}{len(ids) + 1}")
+        self.espejo.recargar(hoja, sheet)
+
+    def _enviar_altas(self, hoja, sheet, altas):
+        encabezado = self.espejo.encabezado(hoja)
+        existentes = set(self.espejo.dataframe(hoja)['ID']) if encabezado else set()
+        nuevas = [json.loads(r[4]) for r in altas if r[3] not in existentes]  # reintento tras un corte: no duplicar
+        if nuevas:
+            if not encabezado:
+                encabezado = list(nuevas[0].keys())
+                sheet.append_row(encabezado)
+            else:
+                # Columnas que la hoja aun no tiene (ID, Reparacion): se agregan al final del encabezado
+                for col in dict.fromkeys(k for v in nuevas for k in v):
+                    if col in encabezado or col.replace(" ", "_") in encabezado: continue
+                    sheet.update_cell(1, len(encabezado) + 1, col); encabezado = encabezado + [col]
+            for i in range(0, len(nuevas), FILAS_POR_ENVIO):
+                parte = nuevas[i:i + FILAS_POR_ENVIO]
+                with etapa("sheets.escritura", hoja=hoja, filas=len(parte)):
+                    sheet.append_rows([_fila_segun_encabezado(encabezado, v) for v in parte])
+        self._marcar([r[0] for r in altas], "sincronizado")
+        self.espejo.sincronizar(hoja, sheet)
+
+    def _enviar_cambios(self, hoja, sheet, cambios):
+        encabezado = self.espejo.encabezado(hoja)
+        faltan = [c for c in dict.fromkeys(_columna_en(encabezado, k) for r in cambios for k in json.loads(r[4])) if c not in encabezado]
+        for col in faltan: sheet.update_cell(1, len(encabezado) + 1, col); encabezado = encabezado + [col]
+        if faltan: self.espejo.recargar(hoja, sheet)
+        esperando_alta = {r[3] for r in self._pendientes(hoja, "'pendiente', 'fallido'") if r[2] == "insertar"}
+        hechos = []
+        with self.espejo.bloqueo(hoja):
+            df = self.espejo.dataframe(hoja)
+            fila_de = dict(zip(df['ID'], df.index + 2)) if 'ID' in df.columns else {}
+            for r in cambios:
+                if r[3] not in fila_de:
+                    if r[3] not in esperando_alta: hechos.append(r[0])  # la fila ya no existe: no hay nada que cambiar
+                    continue
+                valores = {_columna_en(encabezado, k): v for k, v in json.loads(r[4]).items()}
+                with etapa("sheets.escritura", hoja=hoja, filas=1):
+                    for col, v in valores.items():
+                        letra = _letra_columna(encabezado.index(col) + 1)
+                        sheet.update(values=[["" if v is None else str(v)]], range_name=f"{letra}{fila_de[r[3]]}")
+                self.espejo.actualizar_celdas(hoja, fila_de[r[3]], valores)
+                hechos.append(r[0])
+        self._marcar(hechos, "sincronizado")
+
+    def _enviar_bajas(self, hoja, sheet, bajas):
+        objetivo = {r[3] for r in bajas}
+        with self.espejo.bloqueo(hoja):
+            df = self.espejo.dataframe(hoja)
+            filas = [int(i) + 2 for i in df.index[df['ID'].isin(objetivo)]] if 'ID' in df.columns else []
+            with etapa("sheets.borrado", hoja=hoja, filas=len(filas)): borrar_filas(sheet, filas)
+            for f in sorted(filas, reverse=True): self.espejo.borrar_fila(hoja, f)
+        self._marcar([r[0] for r in bajas], "sincronizado")
+
+    def vaciar(self):
+        # Cada hoja y tipo de operacion por separado: un lote que falla anota su error sin frenar a los demas.
+        ops = self._pendientes(); primer_error = None
+        for hoja in dict.fromkeys(r[1] for r in ops):
+            altas = [r for r in ops if r[1] == hoja and r[2] == "insertar"]
+            cambios = [r for r in ops if r[1] == hoja and r[2] == "actualizar"]
+            bajas = [r for r in ops if r[1] == hoja and r[2] == "borrar"]
+            try:
+                sheet = self.abrir_hoja(hoja)
+                self.espejo.sincronizar(hoja, sheet)
+                self._fijar_ids(hoja, sheet)  # antes de borrar: sin IDs fijos una baja podria no encontrar su fila
+            except Exception as e:
+                self._fallar([r[0] for r in altas + cambios + bajas], e); primer_error = primer_error or e; continue
+            for envio, lote in ((self._enviar_altas, altas), (self._enviar_cambios, cambios), (self._enviar_bajas, bajas)):
+                if not lote: continue
+                try: envio(hoja, sheet, lote)
+                except Exception as e: self._fallar([r[0] for r in lote], e); primer_error = primer_error or e
+        with self._lock, self._con:
+            self._con.execute("DELETE FROM pendientes WHERE estado = 'sincronizado' AND creado < ?",
+                              ((datetime.now() - timedelta(days=7)).isoformat(timespec="seconds"),))
+        if primer_error is not None: raise primer_error
+        return len(ops)
+
+    def _bucle(self):
+        espera = 0
+        while True:
+            self._evento.wait(timeout=espera or None)
+            self._evento.clear()
+            time.sleep(VENTANA_LOTE)
+            try:
+                self.vaciar(); self.ultimo_error = None; espera = 0
+            except Exception as e:
+                self.ultimo_error = str(e)
+                espera = min(ESPERA_MAX, espera * 2 if espera else 2)
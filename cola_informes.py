@@ -0,0 +1,80 @@
+# --- COLA DE INFORMES EN SEGUNDO PLANO ---
+# Los PDF se generan en un pool de hilos; el resultado queda guardado por (planta, version de datos).
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from metricas import corrida
+
+
+def version_datos(df):
+    # Huella del contenido: cambia si cambia cualquier fila, no si solo se vuelve a cargar.
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    h.update(",".join(map(str, df.columns)).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+class TrabajoInforme:
+    def __init__(self, clave):
+        self.clave = clave
+        self.estado = "en cola"  # en cola -> generando -> listo | error
+        self.progreso = 0.0
+        self.etapa = "En cola"
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.terminado = None
+
+    @property
+    def activo(self):
+        return self.estado in ("en cola", "generando")
+
+    def avanzar(self, progreso, etapa):
+        self.progreso = max(0.0, min(1.0, progreso)); self.etapa = etapa
+
+    def duracion(self):
+        return (self.terminado or time.time()) - self.creado
+
+
+class ColaInformes:
+    def __init__(self, max_trabajadores=2, max_resultados=20):
+        self._pool = ThreadPoolExecutor(max_workers=max_trabajadores, thread_name_prefix="informe")
+        self._trabajos = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_resultados = max_resultados
+
+    def obtener(self, clave):
+        with self._lock: return self._trabajos.get(clave)
+
+    def enviar(self, clave, funcion, *args, **kwargs):
+        # Si ya existe un trabajo vivo o terminado para la misma clave se reutiliza.
+        with self._lock:
+            trabajo = self._trabajos.get(clave)
+            if trabajo is not None and trabajo.estado != "error":
+                self._trabajos.move_to_end(clave)
+                return trabajo
+            trabajo = TrabajoInforme(clave)
+            self._trabajos[clave] = trabajo
+            self._podar()
+        self._pool.submit(self._ejecutar, trabajo, funcion, args, kwargs)
+        return trabajo
+
+    def _ejecutar(self, trabajo, funcion, args, kwargs):
+        trabajo.estado = "generando"; trabajo.etapa = "Iniciando"
+        try:
+            with corrida("informe", str(trabajo.clave[0] if isinstance(trabajo.clave, tuple) else trabajo.clave)):
+                trabajo.resultado = funcion(*args, progreso=trabajo.avanzar, **kwargs)
+            trabajo.avanzar(1.0, "Listo"); trabajo.estado = "listo"
+        except Exception as e:
+            trabajo.error = str(e); trabajo.etapa = "Error"; trabajo.estado = "error"
+        finally:
+            trabajo.terminado = time.time()
+
+    def _podar(self):
+        terminados = [c for c, t in self._trabajos.items() if not t.activo]
+        while len(self._trabajos) > self.max_resultados and terminados:
+            self._trabajos.pop(terminados.pop(0), None)
@@ -0,0 +1,90 @@
+# --- CONEXION COMPARTIDA A GOOGLE SHEETS ---
+# Autoriza una vez por proceso y reutiliza los handles de libro y hojas; re-autoriza si el token vence.
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metricas import etapa
+
+TIMEOUT_SHEETS = 15  # segundos
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+SHEET_NAME = "DB_FUSIBLES"
+HOJAS_DATOS = ["Sheet1", "DB_MEDICIONES"]
+
+
+def credenciales_archivo(ruta="credentials.json"):
+    # Llaves de cuenta de servicio desde archivo; None si no existe o no es valido.
+    if not os.path.exists(ruta): return None
+    from oauth2client.service_account import ServiceAccountCredentials
+    try: return ServiceAccountCredentials.from_json_keyfile_name(ruta, SCOPE)
+    except Exception: return None
+
+
+def _es_error_auth(e):
+    return getattr(getattr(e, "response", None), "status_code", None) == 401
+
+
+class GestorConexion:
+    def __init__(self, credenciales, autorizar, nombre_libro, timeout=TIMEOUT_SHEETS, max_hilos=4):
+        # credenciales(): lee las llaves (una vez); autorizar(creds): devuelve un cliente tipo gspread.
+        self._leer_credenciales = credenciales
+        self._autorizar = autorizar
+        self.nombre_libro = nombre_libro
+        self.timeout = timeout
+        self._lock = threading.RLock()
+        self._creds = None
+        self._cliente = None
+        self._libro = None
+        self._hojas = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="sheets")
+
+    def _token_vencido(self):
+        return bool(getattr(self._creds, "access_token_expired", False))
+
+    def invalidar(self):
+        with self._lock:
+            self._cliente = None; self._libro = None; self._hojas = {}
+
+    def cliente(self):
+        with self._lock:
+            if self._creds is None: self._creds = self._leer_credenciales()
+            if self._cliente is None or self._token_vencido():
+                self.invalidar()
+                with etapa("sheets.autorizacion"): self._cliente = self._autorizar(self._creds)
+                if hasattr(self._cliente, "set_timeout"): self._cliente.set_timeout(self.timeout)
+            return self._cliente
+
+    def libro(self):
+        with self._lock:
+            cliente = self.cliente()
+            if self._libro is None:
+                with etapa("sheets.apertura"): self._libro = cliente.open(self.nombre_libro)
+            return self._libro
+
+    def hoja(self, nombre):
+        with self._lock:
+            libro = self.libro()
+            if nombre not in self._hojas:
+                try: self._hojas[nombre] = libro.worksheet(nombre)
+                except Exception: self._hojas[nombre] = libro.sheet1
+            return self._hojas[nombre]
+
+    def ejecutar(self, nombre, funcion):
+        # funcion(hoja); si Google responde 401 se re-autoriza y se reintenta una vez.
+        try: return funcion(self.hoja(nombre))
+        except Exception as e:
+            if not _es_error_auth(e): raise
+            self.invalidar()
+            return funcion(self.hoja(nombre))
+
+    def en_paralelo(self, nombres, funcion):
+        # funcion(nombre, hoja) para varias hojas a la vez: el costo total es el de la hoja mas lenta.
+        self.libro()  # autorizar una sola vez antes de repartir
+        # copy_context: las etapas medidas en los hilos se anotan en la corrida de quien llama
+        futuros = {n: self._pool.submit(contextvars.copy_context().run, self.ejecutar, n, lambda hoja, n=n: funcion(n, hoja)) for n in nombres}
+        resultados = {}
+        for n, fut in futuros.items():
+            try: resultados[n] = fut.result()
+            except Exception as e: resultados[n] = e
+        return resultados
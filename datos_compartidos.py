@@ -0,0 +1,88 @@
+# --- DATOS COMPARTIDOS POR PROCESO (VERSIONADOS, SOLO LECTURA) ---
+# Una sola copia de cada hoja para todas las sesiones. Cada sesion guarda una vista de la version vigente (un frame
+# nuevo que comparte las columnas, sin copiarlas): agregar o reemplazar columnas (df[c] = ..., assign) cambia solo la
+# vista. Los arreglos de una version publicada quedan de solo lectura, asi que escribir en sitio (loc/iloc/at = ...,
+# Series.values[...] = ...) falla en la sesion que lo intenta en vez de cambiar los datos de todas; quien necesite eso
+# trabaja sobre una copia. Cargar, sincronizar o guardar publica una version nueva con un cambio atomico de referencia;
+# las sesiones pasan a ella en su siguiente rerun.
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+TTL_DATOS = 300  # segundos; despues una sesion recarga la hoja en segundo plano de las demas
+
+Version = namedtuple("Version", "numero df errores creado")
+
+
+def _arreglos(df):
+    # Arreglos NumPy de cada bloque; en las columnas de extension (category, fechas con zona, enteros nulables) los de adentro.
+    for arr in df._mgr.arrays:
+        if isinstance(arr, np.ndarray): yield arr; continue
+        for nombre in ("_ndarray", "_codes", "_data", "_mask"):
+            interno = getattr(arr, nombre, None)
+            if isinstance(interno, np.ndarray): yield interno
+
+
+def congelar(df):
+    # Marca los datos de df como de solo lectura (no copia nada). Las vistas creadas despues heredan la marca.
+    for arr in _arreglos(df): arr.flags.writeable = False
+    return df
+
+
+def vista(version):
+    # Frame propio de la sesion sobre las mismas columnas (sin copiar datos).
+    return version.df.copy(deep=False)
+
+
+class DatosCompartidos:
+    def __init__(self, ttl=TTL_DATOS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._locks_hoja = {}
+        self._versiones = {}  # hoja -> Version vigente
+        self._numero = 0
+
+    def _lock_hoja(self, hoja):
+        with self._lock: return self._locks_hoja.setdefault(hoja, threading.Lock())
+
+    def _publicar(self, hoja, df, errores, creado):
+        with self._lock:
+            self._numero += 1
+            version = self._versiones[hoja] = Version(self._numero, congelar(df), errores, creado)
+        return version
+
+    # --- LECTURA ---
+    def vigente(self, hoja):
+        return self._versiones.get(hoja)
+
+    def obtener(self, hoja, cargar):
+        # cargar() -> (df, errores). Sin version se espera la primera carga (una sola por proceso); con una version
+        # vencida la recarga la primera sesion que llega y las demas siguen con la actual mientras tanto.
+        version = self._versiones.get(hoja)
+        if version is not None and time.time() - version.creado < self.ttl: return version
+        lock = self._lock_hoja(hoja)
+        if not lock.acquire(blocking=version is None): return version
+        try:
+            actual = self._versiones.get(hoja)
+            if actual is not None and actual is not version: return actual  # otra sesion la cargo mientras se esperaba
+            df, errores = cargar()
+            return self._publicar(hoja, df, errores, time.time())
+        finally: lock.release()
+
+    # --- ESCRITURA ---
+    def actualizar(self, hoja, funcion, cargar):
+        # funcion(version vigente) -> df nuevo. Serializado por hoja: dos sesiones que guardan a la vez no se pisan.
+        # Si un Sincronizar la invalido entretanto se carga primero (la carga ya trae lo encolado: funcion debe tolerarlo).
+        with self._lock_hoja(hoja):
+            anterior = self._versiones.get(hoja)
+            if anterior is None:
+                df, errores = cargar(); anterior = self._publicar(hoja, df, errores, time.time())
+            return anterior, self._publicar(hoja, funcion(anterior), anterior.errores, anterior.creado)
+
+    def invalidar(self, hoja=None):
+        # Sincronizar: la proxima lectura recarga; las sesiones conservan su vista hasta entonces.
+        with self._lock:
+            if hoja is None: self._versiones.clear()
+            else: self._versiones.pop(hoja, None)
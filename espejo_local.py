@@ -0,0 +1,160 @@
+# --- ESPEJO LOCAL (SQLite) DE LAS HOJAS DE GOOGLE ---
+# Guarda una copia persistente de cada hoja y solo descarga las filas agregadas desde la ultima marca. El delta no ve
+# ediciones sobre filas ya copiadas (una Reparacion cargada en la hoja): cada RECARGA_CADA segundos, o cuando se pide
+# con Sincronizar, la hoja se relee completa.
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from metricas import etapa, tamano_json
+
+RUTA_ESPEJO = os.environ.get("PMGD_ESPEJO", ".pmgd_espejo.db")
+COLUMNA_MAX = "Z"
+RECARGA_CADA = float(os.environ.get("PMGD_RECARGA_ESPEJO", 1800))  # segundos
+
+
+def _normalizar(fila, ancho):
+    fila = [str(v) for v in fila[:ancho]]
+    return fila + [""] * (ancho - len(fila))
+
+
+class EspejoLocal:
+    def __init__(self, ruta=RUTA_ESPEJO):
+        self.ruta = ruta
+        self._lock = threading.RLock()  # acceso a SQLite
+        self._locks_hoja = {}  # una sincronizacion a la vez por hoja; hojas distintas en paralelo
+        self._forzar = set()  # hojas con recarga completa pedida
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._con.executescript("""
+            CREATE TABLE IF NOT EXISTS hojas (hoja TEXT PRIMARY KEY, encabezado TEXT, marca INTEGER, sincronizado TEXT);
+            CREATE TABLE IF NOT EXISTS filas (hoja TEXT, fila INTEGER, valores TEXT, PRIMARY KEY (hoja, fila));
+            CREATE TABLE IF NOT EXISTS recargas (hoja TEXT PRIMARY KEY, cuando REAL);
+        """)
+
+    # --- ESTADO ---
+    def _estado(self, hoja):
+        r = self._con.execute("SELECT encabezado, marca FROM hojas WHERE hoja = ?", (hoja,)).fetchone()
+        return (json.loads(r[0]), r[1]) if r else (None, 0)
+
+    def tiene(self, hoja):
+        return self._estado(hoja)[0] is not None
+
+    def encabezado(self, hoja):
+        return self._estado(hoja)[0] or []
+
+    def marca(self, hoja):
+        return self._estado(hoja)[1]
+
+    def ultima_sincronizacion(self, hoja):
+        r = self._con.execute("SELECT sincronizado FROM hojas WHERE hoja = ?", (hoja,)).fetchone()
+        return r[0] if r else None
+
+    def _fila(self, hoja, fila):
+        r = self._con.execute("SELECT valores FROM filas WHERE hoja = ? AND fila = ?", (hoja, fila)).fetchone()
+        return json.loads(r[0]) if r else None
+
+    def _recarga_vencida(self, hoja):
+        # Sin registro (espejo anterior a las recargas periodicas) tambien cuenta como vencida.
+        r = self._con.execute("SELECT cuando FROM recargas WHERE hoja = ?", (hoja,)).fetchone()
+        return r is None or time.time() - r[0] > RECARGA_CADA
+
+    def _guardar_estado(self, hoja, encabezado, marca):
+        self._con.execute("INSERT OR REPLACE INTO hojas VALUES (?, ?, ?, ?)",
+                          (hoja, json.dumps(encabezado), marca, datetime.now().isoformat(timespec="seconds")))
+
+    # --- SINCRONIZACION ---
+    def bloqueo(self, hoja):
+        # Reentrante: quien borra en Google y replica localmente lo toma alrededor de ambos pasos.
+        with self._lock: return self._locks_hoja.setdefault(hoja, threading.RLock())
+
+    def pedir_recarga(self, hojas):
+        # Sincronizar manual: la proxima sincronizacion de cada hoja la relee completa.
+        with self._lock: self._forzar.update(hojas)
+
+    def recargar(self, hoja, sheet):
+        with etapa("sheets.lectura", hoja=hoja, completa=True) as e:
+            valores = sheet.get_values()
+            if e: e.anotar(filas=len(valores), bytes=tamano_json(valores))
+        if not valores: encabezado, filas = [], []
+        else: encabezado, filas = [str(v) for v in valores[0]], valores[1:]
+        with self._lock, self._con:
+            self._con.execute("DELETE FROM filas WHERE hoja = ?", (hoja,))
+            self._con.executemany("INSERT INTO filas VALUES (?, ?, ?)",
+                                  [(hoja, i + 2, json.dumps(_normalizar(f, len(encabezado)))) for i, f in enumerate(filas)])
+            self._guardar_estado(hoja, encabezado, len(filas))
+            self._con.execute("INSERT OR REPLACE INTO recargas VALUES (?, ?)", (hoja, time.time()))
+            self._forzar.discard(hoja)
+        return len(filas)
+
+    def sincronizar(self, hoja, sheet):
+        # Trae desde la ultima fila conocida (ancla): si cambio, alguien edito/borro arriba y se recarga completo.
+        with self.bloqueo(hoja):
+            with self._lock: encabezado, marca = self._estado(hoja); completa = hoja in self._forzar or self._recarga_vencida(hoja)
+            if not encabezado or marca == 0 or completa: return self.recargar(hoja, sheet)
+            ancho = len(encabezado)
+            with etapa("sheets.lectura", hoja=hoja, completa=False) as e:
+                bloque = sheet.get_values(f"A{marca + 1}:{COLUMNA_MAX}")
+                if e: e.anotar(filas=len(bloque), bytes=tamano_json(bloque))
+            with self._lock: ancla = self._fila(hoja, marca + 1)
+            if not bloque or _normalizar(bloque[0], ancho) != ancla or any(any(str(v) for v in f[ancho:]) for f in bloque):
+                return self.recargar(hoja, sheet)
+            nuevas = bloque[1:]
+            with self._lock, self._con:
+                self._con.executemany("INSERT OR REPLACE INTO filas VALUES (?, ?, ?)",
+                                      [(hoja, marca + 2 + i, json.dumps(_normalizar(f, ancho))) for i, f in enumerate(nuevas)])
+                self._guardar_estado(hoja, encabezado, marca + len(nuevas))
+            return len(nuevas)
+
+    def borrar_fila(self, hoja, fila):
+        # Replica localmente un delete_rows(fila) para no invalidar el ancla.
+        with self.bloqueo(hoja), self._lock, self._con:
+            encabezado, marca = self._estado(hoja)
+            if encabezado is None or not 2 <= fila <= marca + 1: return
+            self._con.execute("DELETE FROM filas WHERE hoja = ? AND fila = ?", (hoja, fila))
+            filas = self._con.execute("SELECT fila, valores FROM filas WHERE hoja = ? AND fila > ? ORDER BY fila", (hoja, fila)).fetchall()
+            self._con.execute("DELETE FROM filas WHERE hoja = ? AND fila > ?", (hoja, fila))
+            self._con.executemany("INSERT INTO filas VALUES (?, ?, ?)", [(hoja, f - 1, v) for f, v in filas])
+            self._guardar_estado(hoja, encabezado, marca - 1)
+
+    def actualizar_celdas(self, hoja, fila, valores):
+        # Replica localmente un cambio de celdas hecho por la app; las ediciones de otros llegan con la recarga completa.
+        with self.bloqueo(hoja), self._lock, self._con:
+            encabezado, _ = self._estado(hoja); actual = self._fila(hoja, fila)
+            if actual is None: return
+            for col, v in valores.items(): actual[encabezado.index(col)] = "" if v is None else str(v)
+            self._con.execute("UPDATE filas SET valores = ? WHERE hoja = ? AND fila = ?", (json.dumps(actual), hoja, fila))
+
+    # --- LECTURA ---
+    def dataframe(self, hoja, con_ids=True):
+        with self._lock:
+            encabezado, _ = self._estado(hoja)
+            if not encabezado: return pd.DataFrame()
+            filas = self._con.execute("SELECT fila, valores FROM filas WHERE hoja = ? ORDER BY fila", (hoja,)).fetchall()
+        if not filas: return pd.DataFrame(columns=encabezado)
+        df = pd.DataFrame([json.loads(v) for _, v in filas], columns=encabezado)
+        df.index = [f - 2 for f, _ in filas]
+        return asignar_ids(df) if con_ids else df
+
+
+# Columnas de la hoja original: agregar columnas despues (ID, Reparacion) no cambia el ID derivado de una fila antigua.
+COLUMNAS_CONTENIDO = ['Fecha', 'Planta', 'Inversor', 'Caja', 'String', 'Polaridad', 'Amperios', 'Nota', 'Equipo', 'String ID', 'String_ID']
+
+
+def asignar_ids(df, columna="ID"):
+    # Filas antiguas sin ID: se deriva uno del contenido (+ n de ocurrencia para duplicados) hasta que la cola de
+    # escritura lo deja fijo en la hoja.
+    if columna not in df.columns: df[columna] = ""
+    vacios = df[columna].astype(str).str.strip() == ""
+    if vacios.any():
+        columnas = [c for c in COLUMNAS_CONTENIDO if c in df.columns] or [c for c in df.columns if c != columna]
+        contenido = df.loc[vacios, columnas].astype(str)
+        h = pd.util.hash_pandas_object(contenido, index=False)
+        ocurrencia = h.groupby(h).cumcount()
+        df.loc[vacios, columna] = [f"h{a:016x}" + (f".{n}" if n else "") for a, n in zip(h, ocurrencia)]
+    return df
+
@@ -0,0 +1,93 @@
+# --- ESQUEMAS DE LAS HOJAS ---
+# Tipos declarados por columna: fechas con formatos explicitos, etiquetas repetidas como category y corrientes float32.
+# Las filas con datos invalidos se informan (Fila, Columna, Valor, Problema) en vez de descartar la hoja completa.
+import numpy as np
+import pandas as pd
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%Y %H:%M:%S")
+
+# fecha: sin fecha valida la fila se excluye | fecha_opcional: vacia -> NaT | categoria | float32: invalido -> 0 | texto
+ESQUEMA_FALLAS = {'Fecha': "fecha", 'Planta': "categoria", 'Inversor': "categoria", 'Caja': "categoria", 'String': "categoria",
+                  'Polaridad': "categoria", 'Amperios': "float32", 'Nota': "texto", 'ID': "texto", 'Reparacion': "fecha_opcional"}
+ESQUEMA_MEDICIONES = {'Fecha': "fecha", 'Planta': "categoria", 'Equipo': "categoria", 'String ID': "categoria",
+                      'Amperios': "float32", 'ID': "texto"}
+ALIAS = {'String_ID': 'String ID'}  # encabezados antiguos
+COLUMNAS_ERRORES = ['Hoja', 'Fila', 'Columna', 'Valor', 'Problema']
+
+
+def parsear_fechas(texto, formatos=FORMATOS_FECHA):
+    # Cada formato se prueba solo sobre lo que los anteriores no pudieron leer (sin inferencia fila a fila).
+    fechas = pd.Series(pd.NaT, index=texto.index, dtype='datetime64[ns]')
+    pendientes = texto.notna() & (texto != "")
+    for formato in formatos:
+        if not pendientes.any(): break
+        fechas[pendientes] = pd.to_datetime(texto[pendientes], format=formato, errors='coerce')
+        pendientes &= fechas.isna()
+    return fechas
+
+
+def _errores(hoja, df, mascara, columna, problema):
+    filas = df.index[mascara]
+    # El indice del espejo es la fila de la hoja - 2 (encabezado + base 1)
+    return pd.DataFrame({'Hoja': hoja, 'Fila': filas + 2 if pd.api.types.is_integer_dtype(filas) else filas,
+                         'Columna': columna, 'Valor': df.loc[mascara, columna].astype(str).values, 'Problema': problema})
+
+
+def aplicar_esquema(df, esquema, hoja=""):
+    # Devuelve (frame tipado, errores). Las columnas faltantes se agregan vacias.
+    alias = {a: c for a, c in ALIAS.items() if a in df.columns and c not in df.columns}
+    if alias: df = df.rename(columns=alias)
+    faltantes = [c for c in esquema if c not in df.columns]
+    if faltantes: df = df.assign(**{c: None for c in faltantes})
+    errores = []
+    tipados = {}
+    for c, tipo in esquema.items():
+        col = df[c]
+        if tipo == "fecha":
+            if pd.api.types.is_datetime64_any_dtype(col): fechas = col; vacias = col.isna()
+            else:
+                fechas = parsear_fechas(col); malas = fechas.isna()
+                if malas.any():  # reintento sin espacios sobrantes, solo sobre las que fallaron
+                    limpio = col[malas].astype(str).str.strip().where(col[malas].notna(), "")
+                    fechas[malas] = parsear_fechas(limpio)
+                    vacias = np.zeros(len(col), dtype=bool); vacias[malas.to_numpy()] = (limpio == "").to_numpy()
+                    vacias = pd.Series(vacias, index=col.index)
+                else: vacias = malas
+            malas = fechas.isna()
+            if malas.any():
+                if vacias.any(): errores.append(_errores(hoja, df, vacias, c, "fecha vacía (fila excluida)"))
+                if (malas & ~vacias).any(): errores.append(_errores(hoja, df, malas & ~vacias, c, "fecha con formato desconocido (fila excluida)"))
+            tipados[c] = fechas
+        elif tipo == "fecha_opcional":
+            fechas = col if pd.api.types.is_datetime64_any_dtype(col) else parsear_fechas(col.astype(str).str.strip().where(col.notna(), ""))
+            malas = fechas.isna() & col.notna() & (col.astype(str).str.strip() != "")
+            if malas.any(): errores.append(_errores(hoja, df, malas, c, "fecha con formato desconocido (se ignora)"))
+            tipados[c] = fechas
+        elif tipo == "float32":
+            valores = pd.to_numeric(col, errors='coerce')
+            malas = valores.isna()
+            if malas.any():  # vacio -> 0 sin aviso
+                m = malas.to_numpy().copy(); m[m] = (col[malas].notna() & (col[malas].astype(str).str.strip() != "")).to_numpy()
+                malas = pd.Series(m, index=col.index)
+            if malas.any(): errores.append(_errores(hoja, df, malas, c, "no numérico (se usa 0)"))
+            tipados[c] = valores.fillna(0).astype(np.float32)
+        elif tipo == "categoria": tipados[c] = col.astype('category')
+        else: tipados[c] = col.astype(object)
+    out = pd.DataFrame({c: tipados.get(c, df[c]) for c in df.columns}, index=df.index)  # mismo orden de columnas
+    fecha = next((c for c, t in esquema.items() if t == "fecha"), None)
+    if fecha is not None and out[fecha].isna().any(): out = out[out[fecha].notna()]
+    errores = pd.concat(errores, ignore_index=True) if errores else pd.DataFrame(columns=COLUMNAS_ERRORES)
+    return out, errores
+
+
+def concatenar(partes):
+    # pd.concat conservando el esquema del primer frame: si las categorias difieren pandas cae a object
+    # (y float32 + float64 a float64), asi que se unen las categorias y se castean las filas nuevas.
+    base = partes[0]; tipos = {}
+    for c, t in base.dtypes.items():
+        if isinstance(t, pd.CategoricalDtype):
+            otras = [p[c] for p in partes[1:] if c in p.columns and p[c].dtype != t]
+            nuevas = pd.Index(pd.unique(pd.concat(otras).astype(object).dropna())).difference(t.categories) if otras else []
+            tipos[c] = pd.CategoricalDtype(t.categories.union(nuevas)) if len(nuevas) else t
+        else: tipos[c] = t
+    return pd.concat([p.astype({c: tipos[c] for c in p.columns if c in tipos and p[c].dtype != tipos[c]}) for p in partes])
@@ -0,0 +1,117 @@
+# --- EXPORTACIONES EN STREAMING (EXCEL / CSV / PARQUET) ---
+# Escriben por bloques directo al destino (ruta o archivo abierto): con una ruta (informes_lote) la memoria no crece
+# con el tamaño del export. Las descargas de la app no: Streamlit guarda el archivo terminado completo en memoria.
+import importlib.util
+import io
+import tempfile
+from contextlib import contextmanager
+
+import pandas as pd
+import xlsxwriter
+
+TAM_BLOQUE = 5000  # filas por bloque
+EPOCA_EXCEL = pd.Timestamp("1899-12-30")
+FORMATOS = {'xlsx': "Excel", 'csv': "CSV", 'parquet': "Parquet"}
+MIME = {'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", 'csv': "text/csv", 'parquet': "application/octet-stream"}
+
+
+def parquet_disponible():
+    # Parquet es opcional; pyarrow se importa recien al exportar (es pesado para el arranque).
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def bloques(df, tam_bloque=TAM_BLOQUE):
+    for i in range(0, len(df), tam_bloque): yield df.iloc[i:i + tam_bloque]
+
+
+def _filas(bloque):
+    # NaN/NaT -> celda vacia; numpy -> tipos de Python para xlsxwriter.
+    return bloque.astype(object).where(bloque.notna(), None).itertuples(index=False, name=None)
+
+
+# --- EXCEL ---
+def libro_streaming(destino):
+    # constant_memory: cada fila se vuelca a disco al pasar a la siguiente (hay que escribir en orden).
+    return xlsxwriter.Workbook(destino, {'constant_memory': True, 'nan_inf_to_errors': True})
+
+
+def formato_fecha(wb):
+    return wb.add_format({'num_format': 'yyyy-mm-dd'})
+
+
+def _fechas_a_serial(bloque):
+    # Fechas como numero de serie de Excel (vectorizado); el formato de fecha lo pone la columna.
+    cols = [c for c in bloque.columns if pd.api.types.is_datetime64_any_dtype(bloque[c])]
+    if not cols: return bloque
+    return bloque.assign(**{c: (bloque[c] - EPOCA_EXCEL) / pd.Timedelta(days=1) for c in cols})
+
+
+def escribir_tabla(ws, df, fila=0, col=0, f_encabezado=None, tam_bloque=TAM_BLOQUE, columnas=None, transformar=None, f_fecha=None):
+    # transformar(bloque) -> bloque con `columnas`, para derivar campos sin copiar el frame completo.
+    ws.write_row(fila, col, [str(c) for c in (columnas if columnas is not None else df.columns)], f_encabezado)
+    fila += 1
+    for i, bloque in enumerate(bloques(df, tam_bloque)):
+        if transformar is not None: bloque = transformar(bloque)
+        if i == 0 and f_fecha is not None:
+            for j, c in enumerate(bloque.columns):
+                if pd.api.types.is_datetime64_any_dtype(bloque[c]): ws.set_column(col + j, col + j, 12, f_fecha)
+        for valores in _filas(_fechas_a_serial(bloque)):
+            ws.write_row(fila, col, valores); fila += 1
+    return fila
+
+
+def exportar_excel(df, destino, hoja="Datos", tam_bloque=TAM_BLOQUE):
+    wb = libro_streaming(destino)
+    ws = wb.add_worksheet(hoja)
+    escribir_tabla(ws, df, f_encabezado=wb.add_format({'bold': True, 'border': 1}), tam_bloque=tam_bloque, f_fecha=formato_fecha(wb))
+    wb.close()
+    return destino
+
+
+# --- CSV ---
+@contextmanager
+def _texto(destino):
+    if isinstance(destino, str):
+        with open(destino, "w", encoding="utf-8", newline="") as f: yield f
+    elif isinstance(destino, io.TextIOBase): yield destino
+    else:
+        f = io.TextIOWrapper(destino, encoding="utf-8", newline="", write_through=True)
+        try: yield f
+        finally: f.detach()  # no cerrar el stream del llamador
+
+
+def exportar_csv(df, destino, tam_bloque=TAM_BLOQUE):
+    with _texto(destino) as f:
+        for i, bloque in enumerate(bloques(df, tam_bloque)):
+            bloque.to_csv(f, header=(i == 0), index=False, date_format="%Y-%m-%d")
+        if df.empty: df.to_csv(f, index=False)
+    return destino
+
+
+# --- PARQUET ---
+def exportar_parquet(df, destino, tam_bloque=TAM_BLOQUE):
+    # Un row group por bloque.
+    if not parquet_disponible(): raise RuntimeError("Exportar a Parquet requiere pyarrow (pip install pyarrow).")
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(destino, esquema) as w:
+        for bloque in bloques(df, tam_bloque):
+            w.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+    return destino
+
+
+def exportar(df, destino, formato="xlsx", tam_bloque=TAM_BLOQUE):
+    if formato == "xlsx": return exportar_excel(df, destino, tam_bloque=tam_bloque)
+    if formato == "csv": return exportar_csv(df, destino, tam_bloque=tam_bloque)
+    if formato == "parquet": return exportar_parquet(df, destino, tam_bloque=tam_bloque)
+    raise ValueError(f"Formato no soportado: {formato}")
+
+
+def exportar_temporal(df, formato="xlsx"):
+    # Para descargas: se arma por bloques en un archivo temporal (sin el frame convertido en memoria) y se entregan los
+    # bytes. download_button no acepta rutas ni generadores y guarda esos bytes en su almacen en memoria hasta que la
+    # sesion termina: el archivo final (comprimido, en xlsx/parquet) si ocupa memoria.
+    with tempfile.TemporaryFile() as f:
+        exportar(df, f, formato); f.seek(0)
+        return f.read()
@@ -0,0 +1,87 @@
+# --- FOTOS DE EVIDENCIA PARA LOS PDF DE TERRENO ---
+# Las fotos del celular (4000 px, varios MB) se decodifican, se enderezan segun EXIF y se reducen a JPEG livianos en un
+# pool de hilos (Pillow suelta el GIL al decodificar, escalar y comprimir). El resultado se guarda por hash del contenido.
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cache_disco
+from metricas import etapa
+
+DIR_CACHE = os.environ.get("PMGD_CACHE_FOTOS", ".cache_fotos")
+MAX_CACHE_MB = float(os.environ.get("PMGD_CACHE_FOTOS_MB", "200"))
+TRABAJADORES = int(os.environ.get("PMGD_TRABAJADORES_FOTOS", str(min(4, os.cpu_count() or 1))))
+# (lado mayor en px, calidad JPEG), de mejor a peor: se baja de nivel hasta que el lote cabe en el presupuesto
+NIVELES = [(1600, 80), (1280, 75), (1024, 70), (800, 65), (640, 60)]
+
+_pool = None
+_lock_pool = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool
+    with _lock_pool:
+        if _pool is None: _pool = ThreadPoolExecutor(max_workers=TRABAJADORES, thread_name_prefix="fotos")
+        return _pool
+
+
+def _bytes(foto):
+    # UploadedFile de Streamlit, archivo abierto o bytes.
+    if hasattr(foto, "getvalue"): return foto.getvalue()
+    if hasattr(foto, "read"): return foto.read()
+    return bytes(foto)
+
+
+# --- CACHE EN DISCO (cache_disco) ---
+def clave_foto(datos, lado, calidad):
+    return cache_disco.clave(datos, f"{lado}:{calidad}")
+
+
+# --- PROCESAMIENTO ---
+def procesar_foto(datos, lado=NIVELES[0][0], calidad=NIVELES[0][1]):
+    # JPEG enderezado y reducido; None si el archivo no es una imagen legible.
+    clave = clave_foto(datos, lado, calidad)
+    jpg = cache_disco.leer(DIR_CACHE, clave, ".jpg")
+    if jpg is not None: return jpg
+    from PIL import Image, ImageOps
+    try:
+        with Image.open(io.BytesIO(datos)) as img:
+            img.draft("RGB", (lado, lado))  # JPEG: decodifica directo a 1/2, 1/4 u 1/8 de resolucion
+            img = ImageOps.exif_transpose(img)
+            if img.mode in ("RGBA", "LA", "P"):
+                img = img.convert("RGBA"); fondo = Image.new("RGB", img.size, "white"); fondo.paste(img, mask=img.getchannel("A")); img = fondo
+            elif img.mode != "RGB": img = img.convert("RGB")
+            img.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+            salida = io.BytesIO(); img.save(salida, "JPEG", quality=calidad, optimize=True)
+    except Exception: return None
+    jpg = salida.getvalue()
+    cache_disco.escribir(DIR_CACHE, clave, jpg, ".jpg", MAX_CACHE_MB)
+    return jpg
+
+
+def precalentar(fotos, lado=NIVELES[0][0], calidad=NIVELES[0][1]):
+    # Encola el procesamiento sin esperar (p.ej. al subir las fotos): el PDF las encuentra en cache.
+    pool = _obtener_pool()
+    for f in fotos: pool.submit(procesar_foto, _bytes(f), lado, calidad)
+
+
+def procesar_fotos(fotos, presupuesto=None):
+    # Lista de JPEG (None = foto ilegible) en el mismo orden; con presupuesto (bytes) se baja la resolucion del lote
+    # completo hasta que la suma cabe, o hasta el nivel mas bajo.
+    datos = [_bytes(f) for f in fotos]
+    if not datos: return []
+    pool = _obtener_pool()
+    with etapa("fotos.proceso", fotos=len(datos)) as e:
+        for lado, calidad in NIVELES:
+            jpgs = list(pool.map(lambda d: procesar_foto(d, lado, calidad), datos))
+            total = sum(len(j) for j in jpgs if j)
+            if presupuesto is None or total <= presupuesto: break
+        if e: e.anotar(bytes=total, lado=lado, bytes_originales=sum(len(d) for d in datos))
+    return jpgs
+
+
+def dimensiones(jpg):
+    # (ancho, alto) en px sin decodificar la imagen completa.
+    from PIL import Image
+    with Image.open(io.BytesIO(jpg)) as img: return img.size
@@ -0,0 +1,93 @@
+# --- CAPA DE DATOS PARA GRAFICOS DE MEDICIONES ---
+# Cuartiles, bigotes y bins se calculan en el servidor; al navegador (y al PDF) solo viajan los resumenes.
+import math
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+MAX_PUNTOS = 4000      # puntos del mapa de strings antes de submuestrear
+MAX_ATIPICOS = 2000    # atipicos dibujados en el boxplot (los mas extremos)
+ESCALA_MAPA = 'RdYlGn'
+
+
+# --- RESUMENES ---
+def resumen_cajas(df, valor='Amperios', grupo='Equipo', max_atipicos=MAX_ATIPICOS):
+    # Estadisticos de Tukey por grupo (mismo criterio que plotly: cuartiles lineales, bigotes a 1.5 IQR).
+    if df.empty: return pd.DataFrame(columns=['q1', 'mediana', 'q3', 'media', 'bigote_inf', 'bigote_sup', 'n']), df.iloc[:0]
+    g = df.groupby(grupo, observed=True, sort=True)[valor]
+    cuart = g.quantile([0.25, 0.5, 0.75]).unstack()
+    stats = pd.DataFrame({'q1': cuart[0.25], 'mediana': cuart[0.5], 'q3': cuart[0.75], 'media': g.mean(), 'n': g.size()})
+    iqr = stats['q3'] - stats['q1']
+    # astype(float): sobre una columna category, map devuelve category y no se puede comparar con <, >
+    lim_inf = df[grupo].map(stats['q1'] - 1.5 * iqr).astype(float); lim_sup = df[grupo].map(stats['q3'] + 1.5 * iqr).astype(float)
+    v = df[valor]
+    dentro = (v >= lim_inf) & (v <= lim_sup)
+    stats['bigote_inf'] = v[dentro].groupby(df.loc[dentro, grupo], observed=True).min()
+    stats['bigote_sup'] = v[dentro].groupby(df.loc[dentro, grupo], observed=True).max()
+    atipicos = df.loc[~dentro]
+    if len(atipicos) > max_atipicos:
+        lejania = np.maximum(lim_inf[~dentro] - v[~dentro], v[~dentro] - lim_sup[~dentro])
+        atipicos = atipicos.loc[lejania.nlargest(max_atipicos).index]
+    return stats, atipicos
+
+
+def resumen_distribucion(valores, nbins=20):
+    # Bins de ancho fijo + estadisticos globales para el box marginal.
+    v = np.asarray(valores, dtype=float); v = v[~np.isnan(v)]
+    if v.size == 0: return {'conteos': np.array([]), 'bordes': np.array([0.0, 1.0]), 'n': 0}
+    conteos, bordes = np.histogram(v, bins=nbins)
+    q1, med, q3 = np.quantile(v, [0.25, 0.5, 0.75]); iqr = q3 - q1
+    dentro = v[(v >= q1 - 1.5 * iqr) & (v <= q3 + 1.5 * iqr)]
+    return {'conteos': conteos, 'bordes': bordes, 'n': int(v.size), 'q1': q1, 'mediana': med, 'q3': q3, 'media': float(v.mean()),
+            'bigote_inf': float(dentro.min()), 'bigote_sup': float(dentro.max())}
+
+
+def indices_lod(y, max_puntos=MAX_PUNTOS):
+    # Submuestreo min/max por tramo: conserva los picos y los cortes (0A) que un muestreo uniforme perderia.
+    n = len(y)
+    if n <= max_puntos: return np.arange(n)
+    k = math.ceil(n / (max_puntos // 2)); m = math.ceil(n / k)
+    Y = np.full(m * k, np.nan); Y[:n] = np.asarray(y, dtype=float)
+    Y = Y.reshape(m, k); base = np.arange(m) * k
+    return np.unique(np.concatenate([base + np.nanargmin(Y, axis=1), base + np.nanargmax(Y, axis=1)]))
+
+
+# --- FIGURAS ---
+def figura_cajas(stats, atipicos, titulo, valor='Amperios', grupo='Equipo'):
+    x = [str(e) for e in stats.index]
+    fig = go.Figure(go.Box(x=x, q1=stats['q1'], median=stats['mediana'], q3=stats['q3'], mean=stats['media'],
+                           lowerfence=stats['bigote_inf'], upperfence=stats['bigote_sup'], name=valor, boxpoints=False))
+    if len(atipicos):
+        fig.add_trace(go.Scatter(x=atipicos[grupo].astype(str), y=atipicos[valor], mode='markers', name="Atípicos",
+                                 marker=dict(size=5, color='#e74c3c'), hoverinfo='x+y'))
+    fig.update_layout(title=titulo, showlegend=False, xaxis_title=grupo, yaxis_title=valor)
+    return fig
+
+
+def figura_histograma(resumen, titulo, valor='Amperios'):
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03)
+    b = resumen['bordes']
+    fig.add_trace(go.Bar(x=(b[:-1] + b[1:]) / 2, y=resumen['conteos'], width=np.diff(b), name=valor,
+                         hovertemplate="%{x:.2f}: %{y}<extra></extra>"), row=2, col=1)
+    if resumen['n']:
+        fig.add_trace(go.Box(y=[valor], q1=[resumen['q1']], median=[resumen['mediana']], q3=[resumen['q3']], mean=[resumen['media']],
+                             lowerfence=[resumen['bigote_inf']], upperfence=[resumen['bigote_sup']], orientation='h', boxpoints=False), row=1, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_layout(title=titulo, showlegend=False, bargap=0, xaxis2_title=valor, yaxis2_title="count")
+    return fig
+
+
+def figura_mapa_strings(df_ord, titulo, max_puntos=MAX_PUNTOS, webgl=True):
+    # df_ord ya ordenado por Equipo / String ID; el eje x es la posicion en ese orden.
+    y = df_ord['Amperios'].to_numpy()
+    idx = indices_lod(y, max_puntos)
+    sub = df_ord.iloc[idx]
+    traza = go.Scattergl if webgl else go.Scatter  # kaleido no siempre tiene WebGL: el PDF usa Scatter
+    fig = go.Figure(traza(x=idx, y=y[idx], mode='markers', customdata=sub[['Equipo', 'String ID']].astype(str).to_numpy(),
+                          marker=dict(color=y[idx], colorscale=ESCALA_MAPA, showscale=True, colorbar=dict(title="Amperios")),
+                          hovertemplate="Indice %{x}<br>%{customdata[0]} : %{customdata[1]}<br>%{y:.2f} A<extra></extra>"))
+    if len(idx) < len(y): titulo = f"{titulo} ({len(idx)} de {len(y)} puntos)"
+    fig.update_layout(title=titulo, xaxis_title="Indice", yaxis_title="Amperios")
+    return fig
@@ -0,0 +1,3 @@
+# --- HERRAMIENTAS DE PRUEBA Y BENCHMARK ---
+# Sustitutos locales de Google Sheets, datos sinteticos y utilidades compartidas por bench_pmgd.py y carga_pmgd.py.
+# La app solo los usa con PMGD_LIBRO_LOCAL (demo sin credenciales).
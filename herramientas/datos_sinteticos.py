@@ -0,0 +1,66 @@
+# --- PLANTAS SINTETICAS (SIN GOOGLE) ---
+# Genera filas con el mismo formato que devuelve la hoja (todo texto) para benchmarks y pruebas de carga.
+import numpy as np
+import pandas as pd
+
+ENCABEZADO_FALLAS = ['Fecha', 'Planta', 'Inversor', 'Caja', 'String', 'Polaridad', 'Amperios', 'Nota', 'ID']
+ENCABEZADO_MEDICIONES = ['Fecha', 'Planta', 'Equipo', 'String ID', 'Amperios', 'ID']
+
+
+def _ids(prefijo, n):
+    return np.char.add(prefijo, np.arange(n).astype(str))
+
+
+def mediciones_sinteticas(planta="Planta Sintetica", inversores=4, cajas=10, strings=24, campanas=3,
+                          inicio="2024-03-01", meses_entre=6, prob_corte=0.01, prob_baja=0.03, semilla=0):
+    # Una campaña = todas las cajas medidas en pocos dias; cada campaña la planta se degrada un poco.
+    rng = np.random.default_rng(semilla)
+    por_campana = inversores * cajas * strings
+    inv = np.repeat(np.arange(1, inversores + 1), cajas * strings)
+    cb = np.tile(np.repeat(np.arange(1, cajas + 1), strings), inversores)
+    st = np.tile(np.arange(1, strings + 1), inversores * cajas)
+    equipo = np.char.add(np.char.add(np.char.add("Inv-", inv.astype(str)), ">CB-"), cb.astype(str))
+    string_id = np.char.add("Str-", st.astype(str))
+    base = rng.normal(9.0, 0.6, inversores * cajas).repeat(strings)  # nivel propio de cada caja
+    partes = []
+    for k in range(campanas):
+        dia0 = pd.Timestamp(inicio) + pd.DateOffset(months=k * meses_entre)
+        fechas = (dia0 + pd.to_timedelta(inv % 3, unit='D')).strftime("%Y-%m-%d")
+        amp = base * (1 - 0.015 * k) + rng.normal(0, 0.35, por_campana)
+        sorteo = rng.random(por_campana)
+        amp = np.where(sorteo < prob_corte, 0.0, np.where(sorteo < prob_corte + prob_baja, amp * 0.8, amp))
+        partes.append(pd.DataFrame({'Fecha': fechas, 'Planta': planta, 'Equipo': equipo, 'String ID': string_id,
+                                    'Amperios': np.round(np.maximum(amp, 0), 2).astype(str)}))
+    df = pd.concat(partes, ignore_index=True)
+    df['ID'] = _ids(f"m{semilla}-", len(df))
+    return df[ENCABEZADO_MEDICIONES]
+
+
+def fallas_sinteticas(planta="Planta Sintetica", inversores=4, cajas=10, strings=24, meses=12, fallas_mes=20,
+                      fin="2026-03-31", semilla=0):
+    rng = np.random.default_rng(semilla + 1)
+    n = meses * fallas_mes
+    fin = pd.Timestamp(fin); ini = fin - pd.DateOffset(months=meses)
+    dias = rng.integers(0, max(1, (fin - ini).days), n)
+    # Algunas cajas fallan mucho mas que otras (reincidencia)
+    peso = rng.pareto(1.5, inversores * cajas) + 1; peso /= peso.sum()
+    eq = rng.choice(inversores * cajas, n, p=peso)
+    df = pd.DataFrame({'Fecha': (ini + pd.to_timedelta(dias, unit='D')).strftime("%Y-%m-%d"), 'Planta': planta,
+                       'Inversor': np.char.add("Inv-", (eq // cajas + 1).astype(str)),
+                       'Caja': np.char.add("CB-", (eq % cajas + 1).astype(str)),
+                       'String': np.char.add("Str-", rng.integers(1, strings + 1, n).astype(str)),
+                       'Polaridad': rng.choice(["Positivo (+)", "Negativo (-)"], n),
+                       'Amperios': np.round(rng.uniform(0, 15, n), 1).astype(str), 'Nota': ""})
+    df['ID'] = _ids(f"f{semilla}-", n)
+    return df.sort_values('Fecha', kind='stable', ignore_index=True)[ENCABEZADO_FALLAS]
+
+
+def planta_sintetica(planta="Planta Sintetica", inversores=4, cajas=10, strings=24, campanas=3, meses=12, fallas_mes=20, semilla=0):
+    # {hoja: DataFrame de texto}; con preparar_fallas / preparar_mediciones queda igual que al leer de Google.
+    return {'Sheet1': fallas_sinteticas(planta, inversores, cajas, strings, meses, fallas_mes, semilla=semilla),
+            'DB_MEDICIONES': mediciones_sinteticas(planta, inversores, cajas, strings, campanas, semilla=semilla)}
+
+
+def filas_hoja(df):
+    # Encabezado + filas, como get_values() de gspread.
+    return [list(df.columns)] + df.astype(str).values.tolist()
@@ -0,0 +1,161 @@
+# --- HOJA LOCAL: SUSTITUTO EN MEMORIA DE UN WORKSHEET DE GSPREAD ---
+# Implementa el subconjunto de la API de gspread que usa la app, para correr sin credenciales.
+import os
+import re
+import threading
+import time
+
+
+def _col_a_num(letras):
+    n = 0
+    for ch in letras.upper(): n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def _parsear_rango(rango):
+    # "A5:H" -> (fila 5, col 1, fila None, col 8); "A2:C10" -> (2, 1, 10, 3)
+    m = re.fullmatch(r"([A-Za-z]+)(\d*)(?::([A-Za-z]+)(\d*))?", rango.split("!")[-1])
+    if not m: raise ValueError(f"Rango no soportado: {rango}")
+    c1, f1, c2, f2 = m.groups()
+    return (int(f1) if f1 else 1, _col_a_num(c1), int(f2) if f2 else None, _col_a_num(c2) if c2 else None)
+
+
+class HojaLocal:
+    def __init__(self, encabezado, filas=None, titulo="Sheet1", latencia=0.0):
+        self.title = titulo
+        self.id = sum(map(ord, titulo))
+        self.spreadsheet = None
+        self.latencia = latencia
+        self.llamadas = 0
+        self._valores = [list(encabezado)] + [[str(v) for v in f] for f in (filas or [])]
+
+    def _llamada(self):
+        self.llamadas += 1
+        if self.latencia: time.sleep(self.latencia)
+
+    def _ancho(self):
+        return max(len(f) for f in self._valores)
+
+    def get_values(self, rango=None):
+        self._llamada()
+        ancho = self._ancho()
+        filas = [f + [""] * (ancho - len(f)) for f in self._valores]
+        if rango is None: return [list(f) for f in filas]
+        f1, c1, f2, c2 = _parsear_rango(rango)
+        return [f[c1 - 1:(c2 or ancho)] for f in filas[f1 - 1:f2]]
+
+    def row_values(self, fila):
+        self._llamada()
+        return list(self._valores[fila - 1]) if fila <= len(self._valores) else []
+
+    def get_all_records(self):
+        self._llamada()
+        enc = self._valores[0]
+        return [dict(zip(enc, f + [""] * (len(enc) - len(f)))) for f in self._valores[1:]]
+
+    def append_row(self, fila, **kwargs):
+        self._llamada()
+        self._valores.append([str(v) for v in fila])
+
+    def append_rows(self, filas, **kwargs):
+        self._llamada()
+        self._valores.extend([str(v) for v in f] for f in filas)
+
+    def delete_rows(self, inicio, fin=None):
+        self._llamada()
+        del self._valores[inicio - 1:(fin or inicio)]
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # Firma de gspread 6 (values, range_name); la app la llama con nombres.
+        self._llamada()
+        f1, c1, _, _ = _parsear_rango(range_name)
+        for i, valores in enumerate(values):
+            while len(self._valores) < f1 + i: self._valores.append([])
+            f = self._valores[f1 + i - 1]
+            f.extend([""] * (c1 - 1 + len(valores) - len(f)))
+            f[c1 - 1:c1 - 1 + len(valores)] = [str(v) for v in valores]
+
+    def update_cell(self, fila, col, valor):
+        self._llamada()
+        while len(self._valores) < fila: self._valores.append([])
+        f = self._valores[fila - 1]
+        f.extend([""] * (col - len(f)))
+        f[col - 1] = str(valor)
+
+
+class LibroLocal:
+    # Sustituto de gspread.Spreadsheet: agrupa hojas y acepta batch_update con deleteDimension.
+    def __init__(self, hojas, titulo="DB_FUSIBLES"):
+        self.title = titulo
+        self._hojas = {h.title: h for h in hojas}
+        for h in hojas: h.spreadsheet = self
+
+    @property
+    def sheet1(self):
+        return next(iter(self._hojas.values()))
+
+    def worksheet(self, titulo):
+        if titulo not in self._hojas: raise KeyError(titulo)
+        return self._hojas[titulo]
+
+    def worksheets(self):
+        return list(self._hojas.values())
+
+    def batch_update(self, cuerpo):
+        por_id = {h.id: h for h in self._hojas.values()}
+        tocadas = {por_id[req["deleteDimension"]["range"]["sheetId"]] for req in cuerpo.get("requests", [])}
+        for hoja in tocadas: hoja._llamada()  # una sola llamada a la API por lote
+        for req in cuerpo.get("requests", []):
+            r = req["deleteDimension"]["range"]
+            del por_id[r["sheetId"]]._valores[r["startIndex"]:r["endIndex"]]
+        return {}
+
+
+class ClienteLocal:
+    # Sustituto de gspread.Client: open(nombre) devuelve el LibroLocal registrado.
+    def __init__(self, libros):
+        self._libros = {l.title: l for l in libros}
+        self.timeout = None
+
+    def open(self, titulo):
+        if titulo not in self._libros: raise KeyError(titulo)
+        return self._libros[titulo]
+
+    def set_timeout(self, segundos):
+        self.timeout = segundos
+
+
+# --- LIBRO SINTETICO (PMGD_LIBRO_LOCAL) ---
+# Para pruebas de carga y demos sin Google: PMGD_LIBRO_LOCAL="IxCxSxK" (inversores x cajas x strings x campañas por
+# planta), PMGD_PLANTAS_LOCALES=n y PMGD_LATENCIA_SHEETS=segundos por llamada a la API.
+_cliente_entorno = None
+_lock_entorno = threading.Lock()
+
+
+def plantas_locales(n=None):
+    n = int(os.environ.get("PMGD_PLANTAS_LOCALES", "2")) if n is None else n
+    return [f"Planta {k + 1}" for k in range(n)]
+
+
+def libro_sintetico(tamano="4x10x24x3", plantas=None, latencia=0.0, titulo="DB_FUSIBLES"):
+    # Sheet1 (fallas) y DB_MEDICIONES con el formato de texto de la hoja real (datos_sinteticos.py).
+    import pandas as pd
+    from herramientas.datos_sinteticos import planta_sintetica, filas_hoja
+    inv, cajas, strings, campanas = (int(x) for x in tamano.lower().split("x"))
+    partes = [planta_sintetica(p, inv, cajas, strings, campanas, fallas_mes=max(10, inv * cajas // 2), semilla=k)
+              for k, p in enumerate(plantas or plantas_locales())]
+    hojas = []
+    for nombre in ("Sheet1", "DB_MEDICIONES"):
+        filas = filas_hoja(pd.concat([p[nombre] for p in partes], ignore_index=True))
+        hojas.append(HojaLocal(filas[0], filas[1:], nombre, latencia))
+    return LibroLocal(hojas, titulo)
+
+
+def cliente_desde_entorno(creds=None):
+    # autorizar(creds) para GestorConexion: un solo libro por proceso, compartido por todas las sesiones.
+    global _cliente_entorno
+    with _lock_entorno:
+        if _cliente_entorno is None:
+            libro = libro_sintetico(os.environ.get("PMGD_LIBRO_LOCAL") or "4x10x24x3", latencia=float(os.environ.get("PMGD_LATENCIA_SHEETS", "0")))
+            _cliente_entorno = ClienteLocal([libro])
+        return _cliente_entorno
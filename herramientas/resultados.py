@@ -0,0 +1,47 @@
+# --- RESULTADOS DE BENCHMARK Y CARGA: COMMIT, ARCHIVOS .json Y COMPARACION ---
+# bench_pmgd.py y carga_pmgd.py guardan un .json por commit y comparan contra uno previo con la misma regla.
+import json
+import os
+import subprocess
+
+UMBRAL_REGRESION = 1.20  # +20% en tiempo (o -20% en throughput) se marca en la comparacion
+
+
+def commit_actual():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        sucio = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return rev + ("-sucio" if sucio else "")
+    except Exception: return "sin-git"
+
+
+def cargar_resultados(ref, directorio):
+    ruta = ref if ref.endswith(".json") else os.path.join(directorio, f"{ref}.json")
+    with open(ruta, encoding="utf-8") as f: return json.load(f)
+
+
+def guardar_resultados(resultado, directorio):
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f"{resultado['commit']}.json")
+    with open(ruta, "w", encoding="utf-8") as f: json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return ruta
+
+
+def ratio(nuevo, anterior):
+    return nuevo / anterior if anterior else float('nan')
+
+
+def comparar(actual, previo, lista, clave, lineas, umbral=UMBRAL_REGRESION):
+    # Empareja las filas de actual[lista] y previo[lista] por clave(fila); lineas(nueva, anterior) da
+    # (texto, ratio, sube_es_peor) por cada metrica. Devuelve cuantas regresiones hubo.
+    base = {clave(r): r for r in previo[lista]}
+    print(f"\nComparacion contra {previo['commit']} ({previo['fecha']}):")
+    regresiones = 0
+    for r in actual[lista]:
+        p = base.get(clave(r))
+        if p is None: continue
+        for texto, ratio, sube_es_peor in lineas(r, p):
+            peor = ratio > umbral if sube_es_peor else ratio < 1 / umbral
+            regresiones += peor
+            print(texto + ("  REGRESION" if peor else ""))
+    return regresiones
@@ -0,0 +1,176 @@
+# --- IMPORTACION MASIVA DE MEDICIONES (CSV / EXCEL DE TERRENO) ---
+# Exportaciones de pinza amperimetrica o datalogger: se leen por bloques, se mapean a las columnas de DB_MEDICIONES,
+# se validan con el esquema de la hoja y se descartan las filas ya cargadas (mismo dia, planta, caja y string).
+import csv
+import re
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from esquemas import ESQUEMA_MEDICIONES, COLUMNAS_ERRORES, aplicar_esquema, concatenar
+from metricas import etapa
+from motor_diagnostico import diagnosticar_mediciones, TOLERANCIA_CRITICA
+
+TAMANO_BLOQUE = 50000
+COLUMNAS_DESTINO = ['Fecha', 'Planta', 'Equipo', 'String ID', 'Amperios']
+CLAVE = ['Fecha', 'Planta', 'Equipo', 'String ID']  # una medicion por string y dia
+VACIOS = ["", "nan", "None"]
+# Encabezados habituales de los equipos de terreno (sin mayusculas, espacios ni signos)
+SINONIMOS = {'Fecha': ["fecha", "date", "timestamp", "fechahora", "fechamedicion", "dia"],
+             'Planta': ["planta", "plant", "site", "parque", "pmgd"],
+             'Equipo': ["equipo", "combiner", "combinerbox", "cajacombinadora", "cajainversor"],
+             'String ID': ["stringid", "string", "str", "nstring", "idstring"],
+             'Amperios': ["amperios", "amp", "amps", "a", "i", "ia", "corriente", "corrientea", "current", "idc"],
+             'Inversor': ["inversor", "inverter", "inv", "ninversor"],
+             'Caja': ["caja", "cb", "ncaja", "box"]}
+
+
+def _normalizar_nombre(texto):
+    return re.sub(r"[^a-z0-9]", "", str(texto).lower())
+
+
+def es_excel(nombre):
+    return nombre.lower().endswith((".xlsx", ".xlsm"))
+
+
+# --- LECTURA POR BLOQUES ---
+def _formato_csv(archivo):
+    # Separador y codificacion a partir de los primeros 64 KB (planillas chilenas: ';' y latin-1 son comunes).
+    archivo.seek(0); muestra = archivo.read(65536); archivo.seek(0)
+    try: texto = muestra.decode("utf-8-sig"); codificacion = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        if e.start < len(muestra) - 3: texto = muestra.decode("latin-1"); codificacion = "latin-1"
+        else: texto = muestra[:e.start].decode("utf-8-sig"); codificacion = "utf-8-sig"  # corte a mitad de caracter
+    try: separador = csv.Sniffer().sniff(texto.split("\n", 1)[0], delimiters=",;\t|").delimiter
+    except csv.Error: separador = ","
+    bytes_fila = len(muestra) / max(1, muestra.count(b"\n"))
+    return separador, codificacion, bytes_fila
+
+
+def _tamano(archivo):
+    archivo.seek(0, 2); n = archivo.tell(); archivo.seek(0)
+    return n
+
+
+def leer_encabezado(archivo, nombre):
+    if es_excel(nombre):
+        bloques = leer_bloques(archivo, nombre, 1)
+        try: return list(next(bloques, (pd.DataFrame(), 0))[0].columns)
+        finally: bloques.close()
+    separador, codificacion, _ = _formato_csv(archivo)
+    columnas = list(pd.read_csv(archivo, sep=separador, encoding=codificacion, nrows=0).columns); archivo.seek(0)
+    return columnas
+
+
+def leer_bloques(archivo, nombre, tamano=TAMANO_BLOQUE):
+    # Genera (frame, avance 0-1). Indice continuo desde 0 = fila 2 del archivo, igual que en la hoja.
+    if es_excel(nombre):
+        from openpyxl import load_workbook
+        archivo.seek(0)
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+        try:
+            hoja = libro.worksheets[0]; total = max(1, (hoja.max_row or 1) - 1)
+            filas = hoja.iter_rows(values_only=True)
+            encabezado = [str(c).strip() if c is not None else f"Columna {i + 1}" for i, c in enumerate(next(filas, ()))]
+            inicio = 0
+            while True:
+                bloque = [f[:len(encabezado)] for f in islice(filas, tamano)]
+                if not bloque: break
+                yield pd.DataFrame(bloque, columns=encabezado, index=range(inicio, inicio + len(bloque))), min(1.0, (inicio + len(bloque)) / total)
+                inicio += len(bloque)
+        finally: libro.close()
+        return
+    separador, codificacion, bytes_fila = _formato_csv(archivo)
+    total = max(1, _tamano(archivo) / bytes_fila)  # filas estimadas
+    lector = pd.read_csv(archivo, sep=separador, encoding=codificacion, dtype=str, keep_default_na=False, chunksize=tamano)
+    for bloque in lector: yield bloque, min(1.0, (bloque.index[-1] + 1) / total)
+
+
+# --- MAPEO Y NORMALIZACION ---
+def sugerir_mapeo(columnas):
+    # destino -> columna del archivo (o None); si no hay Equipo se intenta con Inversor + Caja.
+    normalizadas = {_normalizar_nombre(c): c for c in columnas}
+    mapeo = {}
+    for destino, nombres in SINONIMOS.items():
+        mapeo[destino] = next((normalizadas[n] for n in [_normalizar_nombre(destino)] + nombres if n in normalizadas), None)
+    if mapeo['Equipo'] in (mapeo['Inversor'], mapeo['Caja']): mapeo['Equipo'] = None
+    return mapeo
+
+
+def _etiqueta(serie, prefijo):
+    # 3 / "3" / 3.0 -> "Inv-3" (mismo formato que la carga manual); los textos se dejan como vienen.
+    s = serie.where(serie.notna(), "").astype(str).str.strip().str.replace(r"\.0$", "", regex=True)
+    return s.where(~s.str.fullmatch(r"\d+"), prefijo + s)
+
+
+def normalizar_bloque(bloque, mapeo, planta=None):
+    # Frame de texto con las columnas de DB_MEDICIONES, listo para aplicar_esquema.
+    out = pd.DataFrame(index=bloque.index)
+    out['Fecha'] = bloque[mapeo['Fecha']] if mapeo.get('Fecha') else ""
+    out['Planta'] = bloque[mapeo['Planta']].astype(str).str.strip() if mapeo.get('Planta') else planta
+    if mapeo.get('Equipo'): out['Equipo'] = bloque[mapeo['Equipo']].astype(str).str.strip()
+    elif mapeo.get('Inversor') and mapeo.get('Caja'):
+        inv = _etiqueta(bloque[mapeo['Inversor']], "Inv-"); caja = _etiqueta(bloque[mapeo['Caja']], "CB-")
+        out['Equipo'] = (inv + ">" + caja).where(~inv.isin(VACIOS) & ~caja.isin(VACIOS), "")
+    else: out['Equipo'] = ""
+    out['String ID'] = _etiqueta(bloque[mapeo['String ID']], "Str-") if mapeo.get('String ID') else ""
+    if mapeo.get('Amperios'):
+        amp = bloque[mapeo['Amperios']]
+        out['Amperios'] = amp.where(amp.notna(), "").astype(str).str.replace(",", ".", regex=False) if amp.dtype == object else amp  # coma decimal
+    else: out['Amperios'] = ""
+    return out
+
+
+def _claves(df):
+    # Hash de (dia, planta, caja, string); igual para columnas category o texto.
+    return pd.util.hash_pandas_object(pd.DataFrame({c: df[c].dt.normalize() if c == 'Fecha' else df[c].astype(str) for c in CLAVE}),
+                                      index=False).to_numpy()
+
+
+# --- ANALISIS (antes de guardar) ---
+def analizar(archivo, nombre, mapeo, planta=None, existentes=None, tamano=TAMANO_BLOQUE, progreso=None):
+    # Devuelve {'nuevas', 'diagnostico', 'errores', 'leidas', 'duplicadas', 'ya_cargadas'}; no escribe nada.
+    partes, errores, leidas = [], [], 0
+    with etapa("importacion.lectura", archivo=nombre) as e:
+        for bloque, avance in leer_bloques(archivo, nombre, tamano):
+            leidas += len(bloque)
+            tipado, malas = aplicar_esquema(normalizar_bloque(bloque, mapeo, planta), ESQUEMA_MEDICIONES, nombre)
+            vacias = tipado[['Planta', 'Equipo', 'String ID']].astype(str).isin(VACIOS).any(axis=1)
+            if vacias.any():
+                errores.append(pd.DataFrame({'Hoja': nombre, 'Fila': tipado.index[vacias] + 2, 'Columna': "Planta / Equipo / String ID",
+                                             'Valor': "", 'Problema': "identificación incompleta (fila excluida)"}))
+                tipado = tipado[~vacias]
+            if len(malas): errores.append(malas)
+            if len(tipado): partes.append(tipado[COLUMNAS_DESTINO])
+            if progreso: progreso(avance, f"{leidas:,} filas leídas")
+        if e: e.anotar(filas=leidas)
+    nuevas = concatenar(partes) if partes else pd.DataFrame(columns=COLUMNAS_DESTINO)
+    # Dentro del archivo manda la ultima lectura; contra la base, lo ya cargado no se repite.
+    claves = _claves(nuevas) if len(nuevas) else np.array([], dtype=np.uint64)
+    unicas = ~pd.Series(claves).duplicated(keep='last').to_numpy()
+    duplicadas = int((~unicas).sum())
+    ya = np.isin(claves, _claves(existentes)) if existentes is not None and len(existentes) and len(nuevas) else np.zeros(len(nuevas), dtype=bool)
+    ya_cargadas = int((ya & unicas).sum())
+    nuevas = nuevas[unicas & ~ya]
+    # Diagnostico del lote completo: promedio por caja y dia de medicion (los nombres de caja se repiten entre plantas)
+    diagnostico = diagnosticar_mediciones(nuevas.assign(Dia=nuevas['Fecha'].dt.normalize()), TOLERANCIA_CRITICA,
+                                          claves=('Planta', 'Equipo', 'Dia')).drop(columns='Dia') if len(nuevas) else nuevas
+    return {'nuevas': nuevas, 'diagnostico': diagnostico, 'leidas': leidas, 'duplicadas': duplicadas, 'ya_cargadas': ya_cargadas,
+            'errores': pd.concat(errores, ignore_index=True) if errores else pd.DataFrame(columns=COLUMNAS_ERRORES)}
+
+
+def resumen_diagnostico(diagnostico):
+    # Strings por planta y diagnostico, para la vista previa.
+    if diagnostico.empty: return pd.DataFrame()
+    return diagnostico.groupby(['Planta', 'Diagnostico'], observed=True).size().unstack(fill_value=0)
+
+
+# --- REGISTROS PARA LA COLA DE ESCRITURA ---
+def registros(nuevas):
+    # Mismo formato de texto que guardar_medicion_masiva; la hora solo se escribe si el archivo la trae.
+    con_hora = bool((nuevas['Fecha'] != nuevas['Fecha'].dt.normalize()).any())
+    fechas = nuevas['Fecha'].dt.strftime("%Y-%m-%d %H:%M:%S" if con_hora else "%Y-%m-%d")
+    return pd.DataFrame({'Fecha': fechas, 'Planta': nuevas['Planta'].astype(str), 'Equipo': nuevas['Equipo'].astype(str),
+                         'String ID': nuevas['String ID'].astype(str),
+                         'Amperios': np.round(nuevas['Amperios'].to_numpy(dtype=float), 3)}).to_dict('records')
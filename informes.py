@@ -0,0 +1,221 @@
+# --- INFORMES PMGD (PDF / EXCEL) ---
+# Sin Streamlit: lo importan la app y el generador por lotes (informes_lote.py).
+import io
+import os
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+from fpdf import FPDF
+from render_graficos import renderizar_figura, renderizar_figuras
+from motor_diagnostico import ids_tecnicos
+from graficos_mediciones import resumen_cajas, resumen_distribucion, figura_cajas, figura_histograma, figura_mapa_strings
+from metricas import etapa, iniciar_etapa, medir
+from exportar import libro_streaming, escribir_tabla, formato_fecha, exportar_excel
+# Lo liviano vive en analisis.py (la app lo importa sin plotly ni fpdf); se re-exporta para los scripts.
+from analisis import (VOLTAJE_DC, PRECIO_MWH, HORAS_SOL_REP, TOLERANCIA_CRITICA, obtener_nombre_mes, periodo_mes,
+                      COLUMNAS_MEDICIONES, preparar_fallas, preparar_mediciones, generar_diagnostico_mediciones_pro_local,
+                      generar_narrativa_ia, generar_analisis_auto)
+
+# Forzar tema plotly globalmente
+pio.templates.default = "plotly"
+
+# --- PDF MASTER (V43 - BRANDING MUNDO SOLAR) ---
+class PDF(FPDF):
+    def header(self):
+        # 1. Branding Corporativo (Derecha, pequeño)
+        self.set_font('Arial', 'B', 8)
+        self.set_text_color(100, 100, 100) # Gris
+        self.cell(0, 5, 'Elaborado por Equipo Tecnico MUNDO SOLAR SpA', 0, 1, 'R')
+        
+        # 2. Titulo Principal (Centro, Grande)
+        self.set_font('Arial', 'B', 14)
+        self.set_text_color(0, 0, 0) # Negro
+        self.cell(0, 10, 'INFORME TECNICO PMGD - AUDITORIA DC', 0, 1, 'C')
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15); self.set_font('Arial', 'I', 8); self.cell(0, 10, f'Pagina {self.page_no()} - Mundo Solar SpA', 0, 0, 'C')
+
+def clean_text(text):
+    if not isinstance(text, str): return str(text)
+    replacements = {'•':'-', '—':'-', '–':'-', '“':'"', '”':'"', '‘':"'", '’':"'", '⚡':''}
+    for k, v in replacements.items(): text = text.replace(k, v)
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+def generar_reporte_completo_pdf(planta, df_mediciones, progreso=None):
+    avance = progreso or (lambda p, etapa: None)
+    pdf = PDF()
+    
+    # Procesar datos
+    avance(0.05, "Diagnóstico de strings")
+    stt_glob, col_glob, df_proc = generar_diagnostico_mediciones_pro_local(df_mediciones)
+    df_proc = df_proc.assign(Equipo=df_proc['Equipo'].astype(str))  # df_proc puede ser el frame recibido (sin filas)
+    
+    # Generar Narrativa Automatica (IA)
+    narrativa = generar_narrativa_ia(df_proc, planta)
+    
+    # Figuras: se construyen primero y se renderizan juntas (en paralelo y con cache)
+    avance(0.2, "Construyendo gráficos"); e_fig = iniciar_etapa("graficos.construccion", figuras=4, filas=len(df_proc))
+    stats_caja, atip_caja = resumen_cajas(df_proc)
+    fig_box = figura_cajas(stats_caja, atip_caja, "Distribución de Corriente por Combiner Box")
+    fig_box.update_layout(template="plotly_white", width=800, height=400)
+    
+    df_mean = stats_caja['media'].rename('Amperios').rename_axis('Equipo').reset_index().sort_values('Amperios', ascending=False)
+    fig_bar = px.bar(df_mean, x='Equipo', y='Amperios', title="Promedio de Corriente (Mayor a Menor)", color='Amperios', color_continuous_scale='Viridis')
+    fig_bar.update_layout(template="plotly_white", width=800, height=400)
+    
+    fig_hist = figura_histograma(resumen_distribucion(df_proc['Amperios'], nbins=20), "Curva de Distribución (Gauss)")
+    fig_hist.update_layout(template="plotly_white", width=800, height=300)
+    
+    df_proc = df_proc.sort_values(['Equipo', 'String ID'])
+    fig_scat = figura_mapa_strings(df_proc, "Mapa de Dispersión (Vista Panorámica)", webgl=False)
+    fig_scat.update_layout(template="plotly_white", width=800, height=300)
+    
+    e_fig.terminar()
+    avance(0.4, "Renderizando gráficos")
+    png_box, png_bar, png_hist, png_scat = renderizar_figuras([fig_box, fig_bar, fig_hist, fig_scat], scale=2)
+    avance(0.8, "Armando PDF"); e_pdf = iniciar_etapa("pdf.armado", paginas=4)
+    
+    # === PAGINA 1: RESUMEN Y BOXPLOT ===
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text(f"1. Analisis Ejecutivo de Performance"), 0, 1, 'L')
+    
+    # Insertar Narrativa Automatica
+    pdf.set_font("Arial", "", 10)
+    pdf.multi_cell(0, 6, clean_text(narrativa))
+    pdf.ln(5)
+    
+    # Boxplot (Distribución por Caja)
+    pdf.image(io.BytesIO(png_box), x=10, w=190)
+    pdf.ln(5)
+    pdf.set_font("Arial", "I", 9)
+    pdf.multi_cell(0, 6, clean_text("Nota: El grafico superior muestra la variabilidad interna. Cajas con rangos amplios indican inconsistencia (posibles sombras parciales)."))
+
+    # === PAGINA 2: RANKING PROMEDIOS ===
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text("2. Ranking de Rendimiento por Caja"), 0, 1, 'L')
+    pdf.image(io.BytesIO(png_bar), x=10, w=190)
+    
+    # === PAGINA 3: DISTRIBUCION Y MAPA ===
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text("3. Mapa de Calor y Distribución"), 0, 1, 'L')
+    
+    # Histograma
+    pdf.image(io.BytesIO(png_hist), x=10, w=180)
+    pdf.ln(5)
+    
+    # Scatter Map (Mapa de Strings)
+    pdf.image(io.BytesIO(png_scat), x=10, w=180)
+
+    # === PAGINA 4: HALLAZGOS ===
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text(f"4. Hallazgos Críticos (Desviación > {int(TOLERANCIA_CRITICA*100)}%)"), 0, 1, 'L')
+    pdf.ln(5)
+    
+    filtro_problemas = (df_proc['Diagnostico'] == "BAJA CORRIENTE") | (df_proc['Diagnostico'] == "CORTE (0A)")
+    df_hallazgos = df_proc[filtro_problemas].sort_values('Desviacion_Pct', ascending=True)
+    
+    if not df_hallazgos.empty:
+        pdf.set_font("Arial", "B", 10)
+        pdf.set_fill_color(240, 240, 240)
+        headers = ["Equipo", "String ID", "Valor (A)", "Prom. Caja", "Desviacion"]
+        w_cols = [40, 30, 30, 30, 40]
+        
+        for i, h in enumerate(headers):
+            pdf.cell(w_cols[i], 8, clean_text(h), 1, 0, 'C', True)
+        pdf.ln()
+        
+        pdf.set_font("Arial", "", 10)
+        for _, row in df_hallazgos.iterrows():
+            pdf.cell(w_cols[0], 8, clean_text(str(row['Equipo'])), 1)
+            pdf.cell(w_cols[1], 8, clean_text(str(row['String ID'])), 1)
+            pdf.cell(w_cols[2], 8, f"{row['Amperios']:.1f}", 1, 0, 'C')
+            pdf.cell(w_cols[3], 8, f"{row['Promedio_Caja']:.1f}", 1, 0, 'C')
+            pdf.set_text_color(200, 0, 0)
+            pdf.cell(w_cols[4], 8, f"{row['Desviacion_Pct']:.1f}%", 1, 0, 'C')
+            pdf.set_text_color(0)
+            pdf.ln()
+    else:
+        pdf.set_font("Arial", "", 10)
+        pdf.multi_cell(0, 6, clean_text("No se detectaron desviaciones criticas en esta inspeccion."))
+        
+    e_pdf.terminar()
+    avance(0.95, "Exportando")
+    with etapa("pdf.salida") as e:
+        salida = bytes(pdf.output(dest='S'))
+        if e: e.anotar(bytes=len(salida))
+    return salida
+
+
+PRESUPUESTO_PDF_CAJA = float(os.environ.get("PMGD_PDF_CAJA_MB", "3")) * 1024 * 1024  # tamaño objetivo con fotos
+FOTO_ANCHO, FOTO_ALTO = 90, 68  # celda de la grilla de fotos (mm), 2 por fila
+
+def _grilla_fotos(pdf, jpgs):
+    from fotos import dimensiones
+    pdf.add_page(); pdf.set_font("Arial", "B", 11); pdf.cell(0, 8, "EVIDENCIA FOTOGRAFICA", 0, 1); pdf.set_font("Arial", "", 8)
+    y = pdf.get_y()
+    for k, jpg in enumerate(jpgs):
+        col = k % 2
+        if col == 0 and k: y += FOTO_ALTO + 8
+        if col == 0 and y + FOTO_ALTO + 6 > pdf.h - 15: pdf.add_page(); y = pdf.get_y()
+        x = 10 + col * (FOTO_ANCHO + 10)
+        if jpg is None:
+            pdf.set_xy(x, y + FOTO_ALTO / 2); pdf.cell(FOTO_ANCHO, 6, f"Foto {k + 1}: archivo no legible", 0, 0, 'C'); continue
+        ancho, alto = dimensiones(jpg); escala = min(FOTO_ANCHO / ancho, FOTO_ALTO / alto)
+        w, h = ancho * escala, alto * escala  # centrada en la celda, sin deformar
+        pdf.image(io.BytesIO(jpg), x=x + (FOTO_ANCHO - w) / 2, y=y + (FOTO_ALTO - h) / 2, w=w, h=h)
+        pdf.set_xy(x, y + FOTO_ALTO + 1); pdf.cell(FOTO_ANCHO, 5, f"Foto {k + 1}", 0, 0, 'C')
+
+@medir("pdf.caja")
+def crear_pdf_mediciones_caja(planta, equipo, fecha, df_data, kpis, comentarios, fig_box, evidencias):
+    pdf = PDF(); pdf.add_page(); pdf.set_auto_page_break(True, margin=15)
+    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text(f"REPORTE DE CAMPO (SIMPLE)"), 0, 1, 'C'); pdf.ln(5)
+    pdf.set_font("Arial", "", 10); pdf.cell(0, 8, clean_text(f"Planta: {planta} | Equipo: {equipo}"), 0, 1); pdf.cell(0, 8, clean_text(f"Fecha: {fecha}"), 0, 1); pdf.ln(5)
+    
+    png = b""
+    try:
+        png = renderizar_figura(fig_box, width=900, height=450, scale=2)
+        pdf.image(io.BytesIO(png), x=10, w=190)
+    except: pass
+    pdf.ln(5); pdf.set_font("Arial", "B", 10); pdf.cell(30, 8, "String", 1, 0, 'C'); pdf.cell(30, 8, "Valor", 1, 0, 'C'); pdf.cell(80, 8, "Estado", 1, 1, 'C'); pdf.set_font("Arial", "", 10)
+    for _, r in df_data.iterrows():
+        pdf.cell(30, 8, clean_text(str(r['String ID'])), 1, 0, 'C'); pdf.cell(30, 8, f"{r['Amperios']:.1f} A", 1, 0, 'C')
+        pdf.cell(80, 8, clean_text(r['Diagnostico']), 1, 1, 'C')
+    if evidencias:
+        # Las fotos se llevan el presupuesto que dejan el grafico y el texto
+        from fotos import procesar_fotos
+        _grilla_fotos(pdf, procesar_fotos(evidencias, presupuesto=max(PRESUPUESTO_PDF_CAJA - len(png) - 100_000, 200_000)))
+    return bytes(pdf.output(dest='S'))
+
+@medir("excel.maestro")
+def generar_excel_maestro(df, destino=None):
+    # destino: ruta o archivo abierto; sin destino devuelve los bytes.
+    salida = destino if destino is not None else io.BytesIO()
+    exportar_excel(df, salida)
+    return salida.getvalue() if destino is None else destino
+
+COLUMNAS_REPORTE = ['Fecha', 'ID_Tecnico', 'Inversor', 'Caja', 'String', 'Polaridad', 'Amperios', 'Nota']
+COLUMNAS_PERDIDA = ['Reparacion', 'Dias_Fuera', 'Perdida']  # si el frame trae perdidas.perdidas_fallas
+
+def _bloque_reporte(bloque, columnas=COLUMNAS_REPORTE):
+    return bloque.assign(ID_Tecnico=ids_tecnicos(bloque), Fecha=bloque['Fecha'].dt.normalize())[columnas]
+
+@medir("excel.fallas")
+def generar_excel_pro(df_reporte, planta, periodo, comentarios, destino=None):
+    # Sin fallas devuelve None; un error al escribir llega al llamador (la descarga o el lote lo muestran).
+    if df_reporte.empty: return None
+    salida = destino if destino is not None else io.BytesIO()
+    # Filas en orden (modo constant_memory): titulo, periodo, comentarios y luego la tabla por bloques.
+    wb = libro_streaming(salida)
+    ws = wb.add_worksheet('Reporte Ingeniería')
+    ws.hide_gridlines(2)
+    f_title = wb.add_format({'bold': True, 'font_size': 16, 'color': 'white', 'bg_color': '#2e86c1', 'align': 'center'})
+    f_wrap = wb.add_format({'text_wrap': True, 'border': 1, 'valign': 'top'})
+    f_head = wb.add_format({'bold': True, 'border': 1, 'align': 'center'})
+    ws.merge_range('B2:H2', f"INFORME TECNICO: {planta.upper()}", f_title)
+    ws.write('B3', f"Periodo: {periodo}")
+    ws.merge_range('B6:F12', comentarios, f_wrap)
+    columnas = COLUMNAS_REPORTE + [c for c in COLUMNAS_PERDIDA if c in df_reporte.columns]
+    escribir_tabla(ws, df_reporte, fila=15, col=1, f_encabezado=f_head, columnas=columnas, transformar=lambda b: _bloque_reporte(b, columnas), f_fecha=formato_fecha(wb))
+    wb.close()
+    return salida.getvalue() if destino is None else destino
@@ -0,0 +1,132 @@
+# --- GENERADOR DE INFORMES POR LOTES (SIN STREAMLIT) ---
+# Carga los datos una sola vez y genera el PDF de auditoria y el Excel mensual de cada planta en un pool de procesos.
+#   python informes_lote.py --mes 2026-09 --salida salida_informes/
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from campanas import IndiceCampanas
+from cola_escritura import ColaEscritura
+from conexion_sheets import GestorConexion, SHEET_NAME, HOJAS_DATOS, credenciales_archivo
+from espejo_local import EspejoLocal
+from informes import periodo_mes, preparar_fallas, preparar_mediciones, generar_reporte_completo_pdf, generar_excel_pro
+from perdidas import perdidas_fallas, cargar_perfiles
+
+PLANTAS_CONFIG = "plantas_config.json"
+
+
+# --- DATOS (una vez, en el proceso principal) ---
+def cargar_datos(sincronizar=True):
+    espejo = EspejoLocal()
+    if sincronizar:
+        creds = credenciales_archivo()
+        if creds is None: print("Sin credentials.json: se usa la copia local.")
+        else:
+            import gspread
+            gestor = GestorConexion(lambda: creds, gspread.authorize, SHEET_NAME)
+            for hoja, r in gestor.en_paralelo(HOJAS_DATOS, espejo.sincronizar).items():
+                if isinstance(r, Exception): print(f"{hoja}: sin conexion ({r}); se usa la copia local.")
+    faltan = [h for h in HOJAS_DATOS if not espejo.tiene(h)]
+    if faltan: raise SystemExit(f"No hay datos para {', '.join(faltan)} (ni en Google ni en la copia local).")
+    # Las escrituras que aun esperan en la cola tambien entran en el informe.
+    cola = ColaEscritura(espejo, None, automatico=False)
+    errores = []
+    df_fallas = preparar_fallas(cola.superponer("Sheet1", espejo.dataframe("Sheet1")), errores)
+    df_med = preparar_mediciones(cola.superponer("DB_MEDICIONES", espejo.dataframe("DB_MEDICIONES")), errores)
+    for e in errores:
+        for (hoja, problema), n in e.groupby(['Hoja', 'Problema']).size().items(): print(f"{hoja}: {n} celdas con {problema}")
+    return df_fallas, df_med
+
+
+def cargar_plantas(ruta=PLANTAS_CONFIG):
+    with open(ruta, encoding="utf-8") as f: return json.load(f)
+
+
+# --- TRABAJO POR PLANTA (en un proceso del pool) ---
+def informes_planta(planta, df_fallas, df_med, anio, mes, salida):
+    t0 = time.perf_counter()
+    desde, hasta, texto = periodo_mes(anio, mes)
+    sufijo = f"{int(anio):04d}-{int(mes):02d}"
+    res = {'planta': planta, 'pdf_s': 0.0, 'excel_s': 0.0, 'pdf': None, 'excel': None, 'notas': []}
+
+    # Excel: fallas del mes
+    t = time.perf_counter()
+    df_f = df_fallas[(df_fallas['Fecha'] >= desde) & (df_fallas['Fecha'] < hasta)] if not df_fallas.empty else df_fallas
+    if not df_f.empty: df_f = df_f.join(perdidas_fallas(df_f, desde, hasta, perfiles=cargar_perfiles()))  # perdida de cada falla dentro del mes
+    ruta = os.path.join(salida, f"Datos_Fallas_{planta}_{sufijo}.xlsx")
+    if generar_excel_pro(df_f, planta, texto, "", destino=ruta): res['excel'] = ruta  # escrito en streaming, directo al archivo
+    else: res['notas'].append("sin fallas en el periodo")
+    res['excel_s'] = time.perf_counter() - t
+
+    # PDF: ultima campaña de mediciones iniciada antes del cierre del mes
+    t = time.perf_counter()
+    indice = IndiceCampanas(); indice.actualizar(df_med)
+    camp = next((c for c in indice.campanas(planta) if c['inicio'] < hasta), None)
+    if camp is not None:
+        dia = df_med['Fecha'].dt.normalize()
+        pdf = generar_reporte_completo_pdf(planta, df_med[(dia >= camp['inicio']) & (dia <= camp['fin'])])
+        res['pdf'] = os.path.join(salida, f"Informe_Auditoria_{planta}_{sufijo}.pdf")
+        with open(res['pdf'], "wb") as f: f.write(pdf)
+        res['notas'].append(f"campaña {camp['etiqueta']}")
+    else: res['notas'].append("sin mediciones")
+    res['pdf_s'] = time.perf_counter() - t
+
+    res['total_s'] = time.perf_counter() - t0
+    return res
+
+
+# --- CLI ---
+def parsear_args(argv=None):
+    hoy = pd.Timestamp.now()
+    ap = argparse.ArgumentParser(description="Genera el PDF de auditoria y el Excel de fallas de cada planta.")
+    ap.add_argument("--mes", default=f"{hoy:%Y-%m}", help="periodo AAAA-MM (por defecto el mes en curso)")
+    ap.add_argument("--salida", default="salida_informes", help="directorio de salida")
+    ap.add_argument("--plantas", nargs="*", help="plantas a procesar (por defecto las de --config)")
+    ap.add_argument("--config", default=PLANTAS_CONFIG, help="lista de plantas en JSON")
+    ap.add_argument("--procesos", type=int, default=None, help="procesos en paralelo (por defecto uno por CPU)")
+    ap.add_argument("--sin-sincronizar", action="store_true", help="usar solo la copia local, sin consultar Google")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parsear_args(argv)
+    anio, mes = (int(x) for x in args.mes.split("-"))
+    plantas = args.plantas or cargar_plantas(args.config)
+    os.makedirs(args.salida, exist_ok=True)
+
+    t0 = time.perf_counter()
+    df_fallas, df_med = cargar_datos(sincronizar=not args.sin_sincronizar)
+    t_carga = time.perf_counter() - t0
+    print(f"Datos cargados en {t_carga:.1f}s: {len(df_fallas)} fallas, {len(df_med)} mediciones.")
+
+    procesos = max(1, min(len(plantas), args.procesos or os.cpu_count() or 1))
+    resultados, errores = [], 0
+    # spawn: los hijos no heredan hilos ni conexiones del proceso principal
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futuros = {}
+        for planta in plantas:
+            df_f = df_fallas[df_fallas['Planta'] == planta] if 'Planta' in df_fallas.columns else df_fallas
+            futuros[pool.submit(informes_planta, planta, df_f, df_med[df_med['Planta'] == planta], anio, mes, args.salida)] = planta
+        for fut in as_completed(futuros):
+            try: r = fut.result()
+            except Exception as e:
+                r = {'planta': futuros[fut], 'error': str(e)}; errores += 1
+                print(f"{r['planta']:<20} ERROR: {r['error']}")
+            else: print(f"{r['planta']:<20} PDF {r['pdf_s']:6.1f}s  Excel {r['excel_s']:6.1f}s  Total {r['total_s']:6.1f}s  ({'; '.join(r['notas'])})")
+            resultados.append(r)
+
+    total = time.perf_counter() - t0
+    print(f"{len(plantas)} plantas en {total:.1f}s con {procesos} procesos.")
+    with open(os.path.join(args.salida, f"tiempos_{anio:04d}-{mes:02d}.json"), "w", encoding="utf-8") as f:
+        json.dump({'mes': args.mes, 'carga_s': t_carga, 'total_s': total, 'procesos': procesos, 'plantas': resultados}, f, ensure_ascii=False, indent=2)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
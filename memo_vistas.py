@@ -0,0 +1,66 @@
+# --- MEMO DE FIGURAS Y ARCHIVOS DE LAS SECCIONES ---
+# Figuras Plotly, tablas resumen y bytes de informes guardados por (nombre, planta, filtros, version de datos): un rerun
+# que no cambia ninguna de esas entradas los reutiliza en vez de reconstruirlos. Compartido por todas las sesiones; las
+# figuras no se modifican despues de construidas (st.plotly_chart solo las serializa).
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+MAX_ENTRADAS = 256
+MAX_MB_ARCHIVOS = 64  # bytes de PDF / Excel guardados; las figuras cuentan solo como entradas
+
+
+def huella(*partes):
+    # Resumen del contenido (frames, series, bytes o valores simples) para claves que no tienen version propia.
+    h = hashlib.sha1()
+    for p in partes:
+        if isinstance(p, (pd.DataFrame, pd.Series)): h.update(pd.util.hash_pandas_object(p, index=True).values.tobytes())
+        elif isinstance(p, (bytes, bytearray)): h.update(p)
+        else: h.update(repr(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+class MemoVistas:
+    def __init__(self, max_entradas=MAX_ENTRADAS, max_mb_archivos=MAX_MB_ARCHIVOS):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_mb_archivos * 1e6
+        self._lock = threading.Lock()
+        self._valores = OrderedDict()  # clave -> valor (LRU)
+        self._bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, construir):
+        with self._lock:
+            if clave in self._valores:
+                self._valores.move_to_end(clave); self.aciertos += 1
+                return self._valores[clave]
+            self.fallos += 1
+        valor = construir()  # fuera del lock: dos sesiones con la misma clave a la vez construyen dos veces, sin bloquearse
+        if valor is None: return valor  # un resultado vacio no se guarda: el proximo intento vuelve a construir
+        with self._lock:
+            if clave not in self._valores:
+                self._valores[clave] = valor; self._bytes += self._tamano(valor)
+                self._podar()
+        return valor
+
+    def archivo(self, clave, generar, *args):
+        # Para download_button(data=partial(memo.archivo, ...)): se genera al hacer clic y una sola vez por clave.
+        return self.obtener(clave, lambda: generar(*args))
+
+    def _tamano(self, valor):
+        return len(valor) if isinstance(valor, (bytes, bytearray)) else 0
+
+    def _podar(self):
+        while len(self._valores) > self.max_entradas or (self._bytes > self.max_bytes and len(self._valores) > 1):
+            _, valor = self._valores.popitem(last=False); self._bytes -= self._tamano(valor)
+
+    def estadisticas(self):
+        with self._lock:
+            return {'entradas': len(self._valores), 'mb_archivos': round(self._bytes / 1e6, 1), 'aciertos': self.aciertos, 'fallos': self.fallos}
+
+    def limpiar(self):
+        with self._lock: self._valores.clear(); self._bytes = 0
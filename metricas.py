@@ -0,0 +1,161 @@
+# --- INSTRUMENTACION DE ETAPAS ---
+# Mide cuanto tarda cada etapa (lectura de Sheets, parseo, diagnostico, graficos, kaleido, PDF) por rerun y por informe.
+# Desactivada (por defecto) cada etapa cuesta una llamada y un `if`: no se toma tiempo ni se guarda nada.
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+CAPACIDAD = 200  # corridas guardadas (las mas antiguas se descartan)
+
+_activo = os.environ.get("PMGD_METRICAS", "0") == "1"  # por proceso, no por sesion: tambien mide los hilos de fondo
+_historial = deque(maxlen=CAPACIDAD)
+_lock = threading.Lock()
+_corrida_actual = contextvars.ContextVar("corrida_actual", default=None)
+
+
+def activo():
+    return _activo
+
+
+def activar(valor=True):
+    global _activo
+    _activo = bool(valor)
+
+
+# --- ETAPAS ---
+class _EtapaNula:
+    # Lo que devuelve etapa() con la instrumentacion apagada.
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def __bool__(self): return False
+    def anotar(self, **datos): pass
+    def terminar(self, **datos): pass
+
+
+_NULA = _EtapaNula()
+
+
+class _Etapa:
+    def __init__(self, nombre, datos):
+        self.nombre = nombre
+        self.datos = datos
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, *exc):
+        if tipo is not None: self.datos['error'] = tipo.__name__
+        registrar_etapa(self.nombre, (time.perf_counter() - self._t0) * 1000, **self.datos)
+        return False
+
+    def __bool__(self): return True
+
+    def anotar(self, **datos):
+        # filas=..., bytes=...; conviene calcularlas solo si `if e:` (activo).
+        self.datos.update(datos)
+
+    def terminar(self, **datos):
+        self.anotar(**datos); self.__exit__(None, None, None)
+
+
+def etapa(nombre, **datos):
+    if not _activo: return _NULA
+    return _Etapa(nombre, datos)
+
+
+def registrar_etapa(nombre, ms, **datos):
+    # Para tramos medidos por fuera (p.ej. los imports, antes de que exista la corrida).
+    if not _activo: return
+    registro = {'etapa': nombre, 'ms': round(ms, 2), **datos}
+    corrida = _corrida_actual.get()
+    if corrida is not None: corrida['etapas'].append(registro)
+    else: _guardar({'id': uuid.uuid4().hex[:8], 'tipo': "suelta", 'nombre': nombre, 'inicio': time.time(), 'ms': registro['ms'], 'etapas': [registro]})
+
+
+def iniciar_etapa(nombre, **datos):
+    # Para tramos largos de codigo que no conviene re-indentar: iniciar_etapa(...) ... e.terminar()
+    return etapa(nombre, **datos).__enter__()
+
+
+def medir(nombre):
+    # Decorador: la funcion completa es una etapa.
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activo: return funcion(*args, **kwargs)
+            with _Etapa(nombre, {}): return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+# --- CORRIDAS (un rerun, un informe) ---
+def _guardar(corrida):
+    with _lock: _historial.append(corrida)
+
+
+def abrir_corrida(tipo, nombre=""):
+    # Para el script de Streamlit, que no puede envolverse en un `with`: la corrida queda en el historial
+    # desde que se abre; si el rerun se corta (st.stop / st.rerun) queda sin total.
+    if not _activo: return None
+    corrida = {'id': uuid.uuid4().hex[:8], 'tipo': tipo, 'nombre': nombre, 'inicio': time.time(), 'ms': None, 'etapas': [],
+               '_t0': time.perf_counter()}
+    _corrida_actual.set(corrida); _guardar(corrida)
+    return corrida
+
+
+def cerrar_corrida(corrida):
+    if corrida is None: return
+    corrida['ms'] = round((time.perf_counter() - corrida.pop('_t0')) * 1000, 2)
+    if _corrida_actual.get() is corrida: _corrida_actual.set(None)
+
+
+@contextmanager
+def corrida(tipo, nombre=""):
+    anterior = _corrida_actual.get()
+    c = abrir_corrida(tipo, nombre)
+    try: yield c
+    finally:
+        if c is not None: cerrar_corrida(c); _corrida_actual.set(anterior)
+
+
+# --- CONSULTA / EXPORTACION ---
+def historial(n=None):
+    with _lock: datos = list(_historial)
+    datos = [{k: v for k, v in c.items() if not k.startswith('_')} for c in datos]
+    return datos[-n:] if n else datos
+
+
+def resumen_etapas(corridas=None):
+    # {etapa: {'n', 'ms_total', 'ms_p50', 'ms_p95', 'filas', 'bytes'}}
+    por_etapa = {}
+    for c in (corridas if corridas is not None else historial()):
+        for e in c['etapas']: por_etapa.setdefault(e['etapa'], []).append(e)
+    res = {}
+    for nombre, etapas in por_etapa.items():
+        ms = sorted(e['ms'] for e in etapas)
+        res[nombre] = {'n': len(ms), 'ms_total': round(sum(ms), 1), 'ms_p50': ms[len(ms) // 2], 'ms_p95': ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+                       'filas': sum(e.get('filas', 0) for e in etapas), 'bytes': sum(e.get('bytes', 0) for e in etapas)}
+    return res
+
+
+def exportar_jsonl(destino=None):
+    # Una corrida por linea; con destino (ruta) se agrega al archivo, sin destino devuelve el texto.
+    texto = "".join(json.dumps(c, ensure_ascii=False, default=str) + "\n" for c in historial())
+    if destino is None: return texto
+    with open(destino, "a", encoding="utf-8") as f: f.write(texto)
+    return destino
+
+
+def limpiar():
+    with _lock: _historial.clear()
+
+
+def tamano_json(valores):
+    return len(json.dumps(valores, default=str))
@@ -0,0 +1,79 @@
+# --- MOTOR DE DIAGNOSTICO VECTORIZADO ---
+# Mismas etiquetas que las funciones fila a fila que reemplaza (clasificar_falla, analizar_string_local, crear_id_tecnico;
+# se conservan en tests/test_motor_diagnostico.py como referencia), calculadas por columnas.
+import numpy as np
+import pandas as pd
+
+TOLERANCIA_CRITICA = 0.10  # 10%
+UMBRAL_FATIGA = 4.0
+UMBRAL_SOBRECARGA = 8.0
+
+
+def _indice(valores):
+    # Se conserva el indice de una Series; una lista o array tambien tiene .index (el metodo de list), no sirve.
+    return valores.index if isinstance(valores, pd.Series) else None
+
+
+def clasificar_fallas(amperios, umbral_bajo=UMBRAL_FATIGA, umbral_alto=UMBRAL_SOBRECARGA):
+    a = np.asarray(amperios, dtype=float)
+    etiquetas = np.select([a < umbral_bajo, a > umbral_alto],
+                          [f"Fatiga (<{umbral_bajo:g}A)", f"Sobrecarga (>{umbral_alto:g}A)"],
+                          f"Operativa ({umbral_bajo:g}-{umbral_alto:g}A)")
+    return pd.Series(etiquetas, index=_indice(amperios))
+
+
+def diagnosticar_strings(amperios, promedio, tolerancia=TOLERANCIA_CRITICA):
+    a = np.asarray(amperios, dtype=float)
+    p = np.asarray(promedio, dtype=float)
+    etiquetas = np.select([a == 0, p == 0, a < p * (1 - tolerancia), a > p * (1 + tolerancia)],
+                          ["CORTE (0A)", "NORMAL", "BAJA CORRIENTE", "SOBRECORRIENTE"], "NORMAL")
+    return pd.Series(etiquetas, index=_indice(amperios))
+
+
+def diagnostico_simple(amperios, promedio, tolerancia=TOLERANCIA_CRITICA):
+    # Variante de la carga manual: no distingue sobrecorriente.
+    a = np.asarray(amperios, dtype=float)
+    etiquetas = np.select([a == 0, a < promedio * (1 - tolerancia)], ["CORTE (0A)", "BAJA CORRIENTE"], "NORMAL")
+    return pd.Series(etiquetas, index=_indice(amperios))
+
+
+def desviacion_pct(amperios, promedio):
+    a = np.asarray(amperios, dtype=float)
+    p = np.asarray(promedio, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(p > 0, ((a - p) / p) * 100, 0)
+
+
+def diagnosticar_mediciones(df, tolerancia=TOLERANCIA_CRITICA, claves=('Equipo',)):
+    # Devuelve un frame nuevo con Promedio_Caja, Diagnostico y Desviacion_Pct.
+    # Para flotas completas usar claves=('Planta', 'Equipo'): los nombres de caja se repiten entre plantas.
+    prom = df.groupby(list(claves), sort=False, observed=True)['Amperios'].transform('mean')
+    return df.assign(Promedio_Caja=prom,
+                     Diagnostico=diagnosticar_strings(df['Amperios'], prom, tolerancia),
+                     Desviacion_Pct=desviacion_pct(df['Amperios'], prom))
+
+
+def _texto(serie):
+    # Igual que str(valor) celda a celda; solo los nulos (None/NaN) pasan por Python.
+    nulos = serie.isna()
+    texto = serie.astype(str).astype(object)
+    if nulos.any(): texto[nulos] = serie[nulos].astype(object).map(str)
+    return texto
+
+
+def ids_tecnicos(df):
+    inv = _texto(df['Inversor']).str.replace('Inv-', '', regex=False)
+    caja = _texto(df['Caja']).str.replace('CB-', '', regex=False)
+    strg = _texto(df['String']).str.replace('Str-', '', regex=False)
+    pol = np.where(_texto(df['Polaridad']).str.contains('Positivo', regex=False), '(+)', '(-)')
+    return inv + "-" + caja + "-" + strg + " " + pol
+
+
+def obtener_topologia(df_med, planta):
+    if df_med.empty: return pd.DataFrame(columns=['Equipo', 'Strings Detectados', 'Origen'])
+    df_p = df_med[df_med['Planta'] == planta]
+    if df_p.empty: return pd.DataFrame(columns=['Equipo', 'Strings Detectados', 'Origen'])
+    topo = df_p.groupby('Equipo', observed=True)['String ID'].nunique().reset_index()
+    topo.columns = ['Equipo', 'Strings Detectados']
+    topo['Origen'] = 'Medición Real'
+    return topo
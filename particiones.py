@@ -0,0 +1,85 @@
+# --- DATOS PARTICIONADOS POR PLANTA ---
+# El frame se ordena por planta una sola vez (al cargar): cada planta es un tramo contiguo [inicio, fin) que se
+# entrega con iloc, sin escanear ni copiar. Altas y bajas solo corren los limites de los tramos.
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from esquemas import concatenar
+
+
+def ordenar_por_planta(df):
+    # Orden estable: dentro de cada planta se conserva el orden (y el indice) de la hoja.
+    if df.empty or 'Planta' not in df.columns: return df
+    return df.sort_values('Planta', kind='stable')
+
+
+class ParticionPlantas:
+    def __init__(self):
+        self.fuente = None  # weakref al frame particionado (ordenado por planta)
+        self._lock = threading.Lock()
+        self._tramos = {}   # planta -> (inicio, fin)
+        self._filas = 0
+
+    def vigente_para(self, df):
+        return self.fuente is not None and self.fuente() is df
+
+    def asociar(self, df):
+        self.fuente = weakref.ref(df)
+
+    # --- CONSTRUCCION ---
+    def reconstruir(self, df):
+        with self._lock:
+            self._tramos = {}; self._filas = len(df)
+            if df.empty or 'Planta' not in df.columns: return self
+            codigos, plantas = pd.factorize(df['Planta'])
+            cortes = np.flatnonzero(codigos[1:] != codigos[:-1]) + 1
+            inicios = np.r_[0, cortes]; fines = np.r_[cortes, len(codigos)]
+            for i, j in zip(inicios, fines):
+                if codigos[i] < 0: continue  # filas sin planta
+                planta = plantas[codigos[i]]
+                if planta in self._tramos: raise ValueError("El frame no esta ordenado por planta (usar ordenar_por_planta).")
+                self._tramos[planta] = (int(i), int(j))
+        return self
+
+    def desplazar(self, planta, n):
+        # n filas agregadas (n > 0) al final del tramo de `planta`, o quitadas de el (n < 0).
+        with self._lock:
+            if planta not in self._tramos:
+                if n > 0: self._tramos[planta] = (self._filas, self._filas + n); self._filas += n
+                return
+            i, j = self._tramos[planta]
+            for p, (a, b) in self._tramos.items():
+                if a >= j and p != planta: self._tramos[p] = (a + n, b + n)
+            if j + n > i: self._tramos[planta] = (i, j + n)
+            else: del self._tramos[planta]
+            self._filas += n
+
+    def agregar(self, registro, signo=1):
+        # Misma interfaz que RollupFallas / IndiceReincidencia (una falla).
+        self.desplazar(registro['Planta'], signo)
+
+    def quitar(self, registro):
+        self.agregar(registro, signo=-1)
+
+    def insertar(self, df, nuevo):
+        # Frame nuevo con `nuevo` (filas de una planta) al final del tramo de esa planta; luego desplazar().
+        if not len(df): return nuevo
+        _, fin = self._tramos.get(nuevo['Planta'].iloc[0], (len(df), len(df)))
+        return concatenar([df.iloc[:fin], nuevo, df.iloc[fin:]])  # conserva category / float32
+
+    # --- CONSULTAS ---
+    def plantas(self):
+        return list(self._tramos)
+
+    def planta(self, planta):
+        # Tramo de la planta (vista por iloc); frame vacio con las mismas columnas si no tiene filas.
+        df = self.fuente()
+        i, j = self._tramos.get(planta, (0, 0))
+        return df.iloc[i:j]
+
+    def filas(self, planta):
+        i, j = self._tramos.get(planta, (0, 0))
+        return j - i
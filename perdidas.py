@@ -0,0 +1,177 @@
+# --- PERDIDA DE ENERGIA INTEGRADA EN EL TIEMPO ---
+# Cada falla deja de generar Amperios * VOLTAJE_DC durante su ventana fuera de servicio (Fecha -> Reparacion, o hasta
+# ahora), ponderado por el perfil solar horario de la planta. Con la energia solar acumulada hora a hora (cumsum) la
+# perdida de cualquier ventana es una resta: el historial completo de todas las plantas sale en una pasada de NumPy.
+import json
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from analisis import VOLTAJE_DC, PRECIO_MWH, HORAS_SOL_REP
+
+RUTA_PERFILES = "perfiles_solares.json"  # opcional: {planta: {"hsp_mensual": [12 valores], "latitud": -33.4}}
+LATITUD_DEF = -33.4          # Chile central
+AMPLITUD_ESTACIONAL = 0.35   # perfil por defecto: +-35% entre enero y julio alrededor de HORAS_SOL_REP
+MEDIODIA_SOLAR = 13.5        # hora local
+DIA_MEDIO = np.array([17, 47, 75, 105, 135, 162, 198, 228, 258, 288, 318, 344])  # dia del año representativo de cada mes
+HORA = np.timedelta64(1, 'h')
+MAX_TOTALES = 512            # totales guardados por MotorPerdidas (de la hora actual)
+_TODAS = None                # planta de la clave de cache de totales(): el dict de todas las plantas
+
+
+def cargar_perfiles(ruta=RUTA_PERFILES):
+    try:
+        with open(ruta, encoding="utf-8") as f: return json.load(f)
+    except (OSError, ValueError): return {}
+
+
+def perfil_horario(hsp_mensual=None, latitud=LATITUD_DEF):
+    # [12, 24]: horas sol pico por hora de un dia tipico de cada mes (campana entre amanecer y puesta de sol).
+    if hsp_mensual is None: hsp_mensual = HORAS_SOL_REP * (1 + AMPLITUD_ESTACIONAL * np.cos(2 * np.pi * np.arange(12) / 12))
+    decl = np.radians(23.44) * np.sin(2 * np.pi * (284 + DIA_MEDIO) / 365)
+    horas_luz = 2 * np.degrees(np.arccos(np.clip(-np.tan(np.radians(latitud)) * np.tan(decl), -1, 1))) / 15
+    h = np.arange(24) + 0.5 - MEDIODIA_SOLAR
+    forma = np.clip(np.cos(np.pi * h[None, :] / horas_luz[:, None]), 0, None)
+    return forma / forma.sum(axis=1, keepdims=True) * np.asarray(hsp_mensual, dtype=float)[:, None]
+
+
+def _acumulado(perfiles, plantas, inicio, fin):
+    # [planta, hora]: horas sol pico acumuladas desde `inicio` (columna 0 = 0).
+    horas = pd.date_range(inicio, fin, freq='h')
+    mes, hora = horas.month.to_numpy() - 1, horas.hour.to_numpy()
+    energia = np.empty((len(plantas), len(horas)))
+    for k, p in enumerate(plantas):
+        cfg = perfiles.get(p, {})
+        energia[k] = perfil_horario(cfg.get('hsp_mensual'), cfg.get('latitud', LATITUD_DEF))[mes, hora]
+    return np.concatenate([np.zeros((len(plantas), 1)), np.cumsum(energia, axis=1)], axis=1)
+
+
+def _leer(acum, fila, t, inicio):
+    # Acumulado en instantes arbitrarios: interpolacion lineal dentro de la hora.
+    x = (t - inicio) / HORA
+    k = np.clip(np.floor(x).astype(np.int64), 0, acum.shape[1] - 2); frac = np.clip(x - k, 0, 1)
+    return acum[fila, k] + frac * (acum[fila, k + 1] - acum[fila, k])
+
+
+def perdidas_fallas(df, desde=None, hasta=None, ahora=None, perfiles=None):
+    # Frame alineado con df: Dias_Fuera y Perdida (USD) de cada falla dentro de [desde, hasta); sin limites, ventana completa.
+    if df.empty: return pd.DataFrame({'Dias_Fuera': pd.Series(dtype=float), 'Perdida': pd.Series(dtype=float)}, index=df.index)
+    ahora = np.datetime64(pd.Timestamp.now() if ahora is None else pd.Timestamp(ahora), 'ns')
+    ini = df['Fecha'].to_numpy('datetime64[ns]')
+    fin = df['Reparacion'].to_numpy('datetime64[ns]') if 'Reparacion' in df.columns else np.full(len(df), np.datetime64('NaT', 'ns'))
+    fin = np.where(np.isnat(fin), ahora, np.maximum(fin, ini))  # abierta: hasta ahora; reparada antes de la falla: cero
+    if desde is not None: ini = np.maximum(ini, np.datetime64(pd.Timestamp(desde), 'ns'))
+    if hasta is not None: fin = np.minimum(fin, np.datetime64(pd.Timestamp(hasta), 'ns'))
+    fin = np.maximum(fin, ini)
+    codigos, plantas = pd.factorize(df['Planta'].astype(str))
+    origen = ini.min().astype('datetime64[D]').astype('datetime64[ns]')
+    acum = _acumulado(perfiles or {}, list(plantas), origen, fin.max().astype('datetime64[h]') + HORA)
+    hsp = _leer(acum, codigos, fin, origen) - _leer(acum, codigos, ini, origen)
+    perdida = df['Amperios'].to_numpy(dtype=float) * VOLTAJE_DC * hsp / 1e6 * PRECIO_MWH
+    return pd.DataFrame({'Dias_Fuera': (fin - ini) / np.timedelta64(1, 'D'), 'Perdida': perdida}, index=df.index)
+
+
+class MotorPerdidas:
+    # Totales por planta y periodo sobre el frame de fallas de la sesion (misma interfaz que RollupFallas).
+    def __init__(self, perfiles=None):
+        self.perfiles = perfiles if perfiles is not None else cargar_perfiles()
+        self.fuente = None
+        self._lock = threading.Lock()
+        self._fallas = {}   # planta -> frame (Fecha, Reparacion, Amperios, ID)
+        self._altas = {}    # planta -> [registros] guardados desde la ultima consulta (se concatenan de una vez)
+        self._totales = {}  # (planta, desde, hasta, hora actual) -> USD; solo de la hora actual
+
+    def vigente_para(self, df):
+        return self.fuente is not None and self.fuente() is df
+
+    def asociar(self, df):
+        self.fuente = weakref.ref(df)
+
+    def reconstruir(self, df):
+        with self._lock:
+            self._totales = {}; self._altas = {}
+            if df.empty or 'Fecha' not in df.columns: self._fallas = {}; return self
+            columnas = [c for c in ('Planta', 'Fecha', 'Reparacion', 'Amperios', 'ID') if c in df.columns]
+            self._fallas = {p: t.drop(columns='Planta') for p, t in df[columnas].groupby('Planta', observed=True, sort=False)}
+        return self
+
+    @staticmethod
+    def _fila(registro):
+        return {'Fecha': pd.Timestamp(registro['Fecha']), 'Reparacion': pd.Timestamp(registro.get('Reparacion') or pd.NaT),
+                'Amperios': float(registro['Amperios']), 'ID': registro.get('ID')}
+
+    @staticmethod
+    def _misma(t, fila):
+        # Por ID si ambos lo tienen; si no (frame sin columna ID o registro sin ID), por fecha, reparacion y amperios.
+        if fila['ID'] is not None and 'ID' in t.columns: return t['ID'] == fila['ID']
+        rep = t['Reparacion'] if 'Reparacion' in t.columns else pd.Series(pd.NaT, index=t.index)
+        misma_rep = rep.isna() if pd.isna(fila['Reparacion']) else rep == fila['Reparacion']
+        return (t['Fecha'] == fila['Fecha']) & misma_rep & (t['Amperios'].astype(float) == fila['Amperios'])
+
+    def _tabla(self, planta):
+        # Las altas pendientes de la planta entran en un solo concat, al consultar (con el lock tomado).
+        nuevas = self._altas.pop(planta, None)
+        if nuevas:
+            t = self._fallas.get(planta); nuevas = pd.DataFrame(nuevas)
+            self._fallas[planta] = nuevas if t is None or t.empty else pd.concat([t, nuevas], ignore_index=True)
+        return self._fallas.get(planta)
+
+    def agregar(self, registro, signo=1):
+        fila = self._fila(registro); planta = registro['Planta']
+        with self._lock:
+            self._totales = {}
+            if signo > 0: self._altas.setdefault(planta, []).append(fila); return
+            t = self._tabla(planta)
+            if t is None or t.empty: return
+            coincide = self._misma(t, fila)
+            if coincide.any(): self._fallas[planta] = t.drop(index=coincide.idxmax())  # una sola: puede haber duplicadas sin ID
+
+    def quitar(self, registro):
+        self.agregar(registro, signo=-1)
+
+    # --- CONSULTAS ---
+    def plantas(self):
+        with self._lock: return list(dict.fromkeys([*self._fallas, *self._altas]))
+
+    @staticmethod
+    def _limites(desde, hasta):
+        # Limites a la hora: "ultimos 90 dias" cambia en cada rerun y no tendria aciertos en la cache
+        return tuple(None if x is None else pd.Timestamp(x).floor('h') for x in (desde, hasta)) + (pd.Timestamp.now().floor('h'),)
+
+    def perdidas(self, df, desde=None, hasta=None):
+        # Por falla, recortada al periodo con los mismos limites que total() (columnas del Excel).
+        desde, hasta, ahora = self._limites(desde, hasta)
+        return perdidas_fallas(df, desde, hasta, ahora, self.perfiles)
+
+    def _guardar(self, clave, valor):
+        # Solo se guardan totales de la hora actual; el mas antiguo sale al pasar MAX_TOTALES.
+        if self._totales and next(iter(self._totales))[3] != clave[3]: self._totales = {}  # cambio la hora
+        self._totales[clave] = valor
+        while len(self._totales) > MAX_TOTALES: self._totales.pop(next(iter(self._totales)))
+        return valor
+
+    def total(self, planta, desde=None, hasta=None):
+        # USD perdidos dentro de [desde, hasta) por todas las fallas de la planta (las abiertas cuentan hasta ahora).
+        desde, hasta, ahora = self._limites(desde, hasta); clave = (planta, desde, hasta, ahora)
+        with self._lock:
+            if clave in self._totales: return self._totales[clave]
+            t = self._tabla(planta)
+            return self._guardar(clave, 0.0 if t is None or t.empty else
+                                 float(perdidas_fallas(t.assign(Planta=planta), desde, hasta, ahora, self.perfiles)['Perdida'].sum()))
+
+    def totales(self, desde=None, hasta=None):
+        # {planta: USD} de todas las plantas en una sola pasada, con los limites y la cache de total(): la vista Flota
+        # lo pide en cada rerun y deja tambien el total de cada planta del periodo.
+        desde, hasta, ahora = self._limites(desde, hasta); clave = (_TODAS, desde, hasta, ahora)
+        with self._lock:
+            if clave in self._totales: return dict(self._totales[clave])
+            partes = [t.assign(Planta=p) for p, t in ((p, self._tabla(p)) for p in list(dict.fromkeys([*self._fallas, *self._altas])))
+                      if t is not None and len(t)]
+            if not partes: return dict(self._guardar(clave, {}))
+            todas = pd.concat(partes, ignore_index=True)
+            por_planta = perdidas_fallas(todas, desde, hasta, ahora, self.perfiles)['Perdida'].groupby(todas['Planta'], sort=False).sum()
+            resultado = {p: float(v) for p, v in por_planta.items()}
+            for p, v in resultado.items(): self._guardar((p, desde, hasta, ahora), v)
+            return dict(self._guardar(clave, resultado))
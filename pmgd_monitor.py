@@ -1,387 +1,472 @@
+import sys
+import time
+T_INICIO = time.perf_counter(); ARRANQUE_FRIO = "analisis" not in sys.modules  # primer rerun del proceso
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-import io
 import json
 import os
-import gspread
-import tempfile
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import timedelta
-import numpy as np
-from fpdf import FPDF
-
-# Forzar tema plotly globalmente
-pio.templates.default = "plotly"
-
-# --- CONSTANTES DE NEGOCIO ---
-VOLTAJE_DC = 1500
-PRECIO_MWH = 40
-HORAS_SOL_REP = 10
-TOLERANCIA_CRITICA = 0.10  # 10%
+from functools import partial, wraps
+from conexion_sheets import GestorConexion, TIMEOUT_SHEETS, SCOPE, SHEET_NAME, HOJAS_DATOS, credenciales_archivo
+from espejo_local import EspejoLocal
+from cola_escritura import ColaEscritura
+from campanas import IndicesPorVersion
+from rollups_fallas import RollupFallas
+from reincidencias import IndiceReincidencia
+from perdidas import MotorPerdidas
+from particiones import ParticionPlantas, ordenar_por_planta
+from esquemas import concatenar
+from cola_informes import ColaInformes, version_datos
+from datos_compartidos import DatosCompartidos, vista
+from memo_vistas import MemoVistas, huella
+import metricas
+from metricas import iniciar_etapa
+from motor_diagnostico import clasificar_fallas, diagnostico_simple, ids_tecnicos, obtener_topologia
+from analisis import (TOLERANCIA_CRITICA, obtener_nombre_mes, periodo_mes, COLUMNAS_MEDICIONES,
+                      preparar_fallas, preparar_mediciones, generar_diagnostico_mediciones_pro_local, generar_analisis_auto)
+# plotly, fpdf/kaleido (informes), xlsxwriter (exportar) y gspread se importan en la seccion que los usa.
 
 # --- CONFIGURACIÓN ---
 st.set_page_config(page_title="Monitor Planta Solar", layout="wide", initial_sidebar_state="expanded")
 
-# --- UTILS FECHA ---
-def obtener_nombre_mes(mes_num):
-    meses = {1:"Enero", 2:"Febrero", 3:"Marzo", 4:"Abril", 5:"Mayo", 6:"Junio", 
-             7:"Julio", 8:"Agosto", 9:"Septiembre", 10:"Octubre", 11:"Noviembre", 12:"Diciembre"}
-    return meses.get(mes_num, "")
+# --- IMPORTS DIFERIDOS ---
+def plotly_express():
+    import plotly.express as px
+    import plotly.io as pio
+    pio.templates.default = "plotly"  # Forzar tema plotly globalmente
+    return px
 
-# --- CONEXIÓN GOOGLE SHEETS ---
-SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-SHEET_NAME = "DB_FUSIBLES"
+def excel_fallas(*args):
+    from informes import generar_excel_pro
+    datos = generar_excel_pro(*args)
+    if datos is None: raise RuntimeError("No hay fallas para exportar")  # el boton se oculta sin fallas; nunca guardar un None en el memo
+    return datos
 
-def conectar_google_sheets(hoja_nombre):
-    creds = None
-    if os.path.exists("credentials.json"):
-        try: creds = ServiceAccountCredentials.from_json_keyfile_name("credentials.json", SCOPE)
-        except: pass
+def pdf_caja(*args):
+    from informes import crear_pdf_mediciones_caja
+    return crear_pdf_mediciones_caja(*args)
+
+# --- CONEXIÓN GOOGLE SHEETS ---
+def leer_credenciales():
+    creds = credenciales_archivo()
     if creds is None:
         try:
             if "gcp_service_account" in st.secrets:
+                from oauth2client.service_account import ServiceAccountCredentials
                 creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(st.secrets["gcp_service_account"]), SCOPE)
         except: pass
-    if creds is None: st.error("🚫 Error de Llaves."); st.stop()
-    try: 
-        client = gspread.authorize(creds)
-        spreadsheet = client.open(SHEET_NAME)
-        try: return spreadsheet.worksheet(hoja_nombre)
-        except: return spreadsheet.sheet1
-    except Exception as e: st.error(f"Error Conexión: {e}"); st.stop()
+    if creds is None: raise PermissionError("Error de Llaves.")
+    return creds
+
+def autorizar_gspread(creds):
+    import gspread  # solo si hay llaves: sin conexion no se paga el import
+    return gspread.authorize(creds)
+
+@st.cache_resource
+def obtener_gestor():
+    # Un solo cliente autorizado por proceso, compartido por todas las sesiones.
+    if os.environ.get("PMGD_LIBRO_LOCAL"):  # pruebas de carga / demo sin Google: libro sintetico en memoria
+        from herramientas.hoja_local import cliente_desde_entorno
+        return GestorConexion(lambda: None, cliente_desde_entorno, SHEET_NAME, TIMEOUT_SHEETS)
+    return GestorConexion(leer_credenciales, autorizar_gspread, SHEET_NAME, TIMEOUT_SHEETS)
+
+def abrir_hoja(hoja_nombre):
+    return obtener_gestor().hoja(hoja_nombre)
+
+def detener_por_conexion(e):
+    if isinstance(e, PermissionError): st.error("🚫 Error de Llaves.")
+    else: st.error(f"Error Conexión: {e}")
+    st.stop()
+
+# --- ESPEJO LOCAL ---
+@st.cache_resource
+def obtener_espejo():
+    return EspejoLocal()
+
+@st.cache_resource
+def obtener_cola_escritura():
+    return ColaEscritura(obtener_espejo(), abrir_hoja)
+
+@st.cache_data(ttl=5, show_spinner=False)
+def sincronizar_espejo():
+    # Trae el delta de todas las hojas a la vez; devuelve {hoja: None | (es_llaves, mensaje)}.
+    espejo = obtener_espejo()
+    try: res = obtener_gestor().en_paralelo(HOJAS_DATOS, espejo.sincronizar)
+    except Exception as e: res = {h: e for h in HOJAS_DATOS}
+    return {h: (isinstance(r, PermissionError), str(r)) if isinstance(r, Exception) else None for h, r in res.items()}
+
+def leer_hoja_espejada(hoja_nombre):
+    # Si Google no responde se sirve la copia local.
+    espejo = obtener_espejo()
+    error = sincronizar_espejo().get(hoja_nombre)
+    if error and not espejo.tiene(hoja_nombre):
+        detener_por_conexion(PermissionError(error[1]) if error[0] else ConnectionError(error[1]))
+    df = obtener_cola_escritura().superponer(hoja_nombre, espejo.dataframe(hoja_nombre))
+    df.attrs['origen'] = "local" if error else "google"
+    df.attrs['sincronizado'] = espejo.ultima_sincronizacion(hoja_nombre)
+    return df
 
 # --- DATOS ---
-@st.cache_data(ttl=300)
+# Devuelven (frame tipado segun esquemas.py, filas invalidas); una fila mala ya no vacia la hoja completa.
 def cargar_datos_fusibles():
-    sheet = conectar_google_sheets("Sheet1")
-    try:
-        data = sheet.get_all_records()
-        if not data: return pd.DataFrame()
-        df = pd.DataFrame(data)
-        if 'Fecha' in df.columns: df['Fecha'] = pd.to_datetime(df['Fecha'])
-        if 'Amperios' in df.columns: df['Amperios'] = pd.to_numeric(df['Amperios'], errors='coerce').fillna(0)
-        return df
-    except: return pd.DataFrame()
-
-@st.cache_data(ttl=300)
+    errores = []
+    df = preparar_fallas(leer_hoja_espejada("Sheet1"), errores)
+    return ordenar_por_planta(df), pd.concat(errores) if errores else None  # una sola vez: cada planta queda en un tramo contiguo
+
 def cargar_datos_mediciones():
-    sheet = conectar_google_sheets("DB_MEDICIONES")
-    try:
-        data = sheet.get_all_records()
-        if not data: return pd.DataFrame(columns=['Fecha', 'Planta', 'Equipo', 'String ID', 'Amperios'])
-        df = pd.DataFrame(data)
-        if 'String_ID' in df.columns: df.rename(columns={'String_ID': 'String ID'}, inplace=True)
-        req = ['Fecha', 'Planta', 'Equipo', 'String ID', 'Amperios']
-        for c in req: 
-            if c not in df.columns: df[c] = None
-        if 'Fecha' in df.columns: df['Fecha'] = pd.to_datetime(df['Fecha'])
-        if 'Amperios' in df.columns: df['Amperios'] = pd.to_numeric(df['Amperios'], errors='coerce').fillna(0)
-        return df
-    except: return pd.DataFrame(columns=['Fecha', 'Planta', 'Equipo', 'String ID', 'Amperios'])
+    errores = []
+    df = preparar_mediciones(leer_hoja_espejada("DB_MEDICIONES"), errores)
+    return ordenar_por_planta(df), pd.concat(errores) if errores else None
+
+# Una version de cada hoja por proceso; las sesiones guardan una vista (df_cache / df_med_cache), no una copia.
+@st.cache_resource
+def obtener_datos_compartidos():
+    return DatosCompartidos()
+
+HOJAS_SESION = {'Sheet1': ('df_cache', cargar_datos_fusibles), 'DB_MEDICIONES': ('df_med_cache', cargar_datos_mediciones)}
+versiones_rerun = {}  # hoja -> Version usada en este rerun (el script se re-ejecuta completo: se vacia en cada rerun)
+
+def datos_sesion(hoja):
+    # Cada hoja se carga al abrir la primera seccion que la usa; si se publico una version nueva, la sesion cambia de
+    # vista de una vez y sus derivados (particion, rollup, indices) se reconstruyen al consultarlos.
+    clave, cargar = HOJAS_SESION[hoja]
+    if hoja not in versiones_rerun: versiones_rerun[hoja] = obtener_datos_compartidos().obtener(hoja, cargar)
+    version = versiones_rerun[hoja]
+    if st.session_state.get(f"version_{clave}") != version.numero:
+        st.session_state[clave] = vista(version); st.session_state[f"version_{clave}"] = version.numero
+    return st.session_state[clave]
+
+def publicar(hoja, funcion):
+    # Escritura: funcion(df vigente, al_dia) -> df nuevo; al_dia = la sesion veia esa misma version (sus derivados sirven).
+    clave, cargar = HOJAS_SESION[hoja]; sesion = st.session_state.get(f"version_{clave}")
+    anterior, nueva = obtener_datos_compartidos().actualizar(hoja, lambda v: funcion(v.df, v.numero == sesion), cargar)
+    versiones_rerun[hoja] = nueva
+    st.session_state[clave] = vista(nueva); st.session_state[f"version_{clave}"] = nueva.numero
+    return anterior.numero == sesion
+
+def fallas_sesion():
+    return datos_sesion("Sheet1")
+
+def mediciones_sesion():
+    return datos_sesion("DB_MEDICIONES")
+
+def obtener_particion_mediciones():
+    df = mediciones_sesion(); particion = st.session_state.get('particion_mediciones')
+    if particion is None or not particion.vigente_para(df):
+        particion = ParticionPlantas().reconstruir(df); particion.asociar(df); st.session_state.particion_mediciones = particion
+    return particion
+
+def mediciones_planta(planta):
+    # Tramo de la planta sin filtrar ni copiar el frame completo.
+    return obtener_particion_mediciones().planta(planta)
+
+# --- PARTICION, ROLLUPS, INDICE DE REINCIDENCIA Y PERDIDAS (por sesion, junto a df_cache) ---
+DERIVADOS_FALLAS = {'particion_fallas': ParticionPlantas, 'rollup_fallas': RollupFallas, 'indice_reincidencia': IndiceReincidencia,
+                    'motor_perdidas': MotorPerdidas}
+
+def obtener_derivado_fallas(clave):
+    df = fallas_sesion(); derivado = st.session_state.get(clave)
+    if derivado is None or not derivado.vigente_para(df):
+        derivado = DERIVADOS_FALLAS[clave]().reconstruir(df); derivado.asociar(df); st.session_state[clave] = derivado
+    return derivado
+
+def fallas_planta(planta):
+    return obtener_derivado_fallas('particion_fallas').planta(planta)
+
+def obtener_rollup_fallas():
+    return obtener_derivado_fallas('rollup_fallas')
+
+def obtener_indice_reincidencia():
+    return obtener_derivado_fallas('indice_reincidencia')
+
+def obtener_motor_perdidas():
+    return obtener_derivado_fallas('motor_perdidas')
+
+def reemplazar_fallas(funcion, alta=None, bajas=None):
+    # Publica la version nueva de Sheet1 manteniendo particion, rollup e indices al dia sin recalcularlos completos
+    # (solo si la sesion estaba en la version sobre la que se escribio; si no, se reconstruyen al consultarlos).
+    previa = fallas_sesion()
+    derivados = [d for d in (st.session_state.get(c) for c in DERIVADOS_FALLAS) if d is not None and d.vigente_para(previa)]
+    if not publicar("Sheet1", funcion): return
+    for derivado in derivados:
+        if alta is not None: derivado.agregar(alta)
+        if bajas is not None:
+            for reg in bajas.to_dict('records'): derivado.quitar(reg)
+        derivado.asociar(st.session_state.df_cache)
 
 def guardar_falla(registro):
-    sheet = conectar_google_sheets("Sheet1")
-    reg = [registro['Fecha'].strftime("%Y-%m-%d"), registro['Planta'], registro['Inversor'],
-           registro['Caja'], registro['String'], registro['Polaridad'], str(registro['Amperios']), registro['Nota']]
-    sheet.append_row(reg)
-    st.cache_data.clear()
-
-def borrar_registro(idx):
+    # Se encola (write-behind) y se agrega a la version compartida; la hoja se actualiza en segundo plano.
+    reg = {'Fecha': registro['Fecha'].strftime("%Y-%m-%d"), 'Planta': registro['Planta'], 'Inversor': registro['Inversor'],
+           'Caja': registro['Caja'], 'String': registro['String'], 'Polaridad': registro['Polaridad'], 'Amperios': str(registro['Amperios']), 'Nota': registro['Nota']}
+    if pd.notna(registro.get('Reparacion')): reg['Reparacion'] = registro['Reparacion'].strftime("%Y-%m-%d")
+    particion = obtener_derivado_fallas('particion_fallas')  # fija la version antes de encolar: una recarga posterior ya trae el alta
+    id_reg, = obtener_cola_escritura().encolar_inserciones("Sheet1", [reg])
+    def insertar(df, al_dia):
+        if not al_dia and len(df) and (df['ID'] == id_reg).any(): return df  # una recarga concurrente ya la trajo desde la cola
+        nuevo = pd.DataFrame([{**registro, 'ID': id_reg}], index=[int(df.index.max()) + 1 if len(df) else 0])
+        return (particion if al_dia else ParticionPlantas().reconstruir(df)).insertar(df, nuevo)
+    reemplazar_fallas(insertar, alta={**registro, 'ID': id_reg})
+
+def borrar_registro(id_registro):
     try:
-        sheet = conectar_google_sheets("Sheet1")
-        sheet.delete_rows(idx + 2)
-        st.cache_data.clear()
-        st.session_state.df_cache = cargar_datos_fusibles()
+        obtener_cola_escritura().encolar_borrado("Sheet1", id_registro)
+        df = fallas_sesion()
+        reemplazar_fallas(lambda df, al_dia: df[df['ID'] != id_registro], bajas=df[df['ID'] == id_registro])
         st.toast("Borrado OK")
     except: st.error("Error al borrar")
 
+def marcar_reparada(id_registro, fecha):
+    # Cierra una falla ya registrada: su perdida deja de contar desde la fecha de reparacion.
+    fallas_sesion()  # version fijada antes de encolar (ver guardar_falla)
+    obtener_cola_escritura().encolar_actualizacion("Sheet1", id_registro, {'Reparacion': fecha.strftime("%Y-%m-%d")})
+    def cerrar(df, al_dia):  # los derivados se reconstruyen al consultarlos (la ventana de perdida cambia)
+        anterior = df['Reparacion'] if 'Reparacion' in df.columns else pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+        return df.assign(Reparacion=anterior.mask(df['ID'] == id_registro, pd.Timestamp(fecha)))
+    publicar("Sheet1", cerrar)
+    st.toast("Falla cerrada")
+
+def agregar_mediciones(nuevo):
+    # nuevo: frame tipado sin indice; se agrega a la version compartida al final del tramo de su planta.
+    particion = obtener_particion_mediciones(); plantas_nuevas = nuevo['Planta'].astype(str).unique()
+    def insertar(df, al_dia):
+        faltan = nuevo if al_dia or not len(df) else nuevo[~nuevo['ID'].isin(df['ID'])]  # idem: la recarga pudo traer parte desde la cola
+        if faltan.empty: return df
+        inicio = int(df.index.max()) + 1 if len(df) else 0
+        filas = faltan.set_axis(range(inicio, inicio + len(faltan)))
+        if al_dia and len(plantas_nuevas) == 1: return particion.insertar(df, filas)
+        return ordenar_por_planta(concatenar([df, filas]) if len(df) else filas)  # varias plantas: se reordena una vez
+    if publicar("DB_MEDICIONES", insertar) and len(plantas_nuevas) == 1:
+        particion.desplazar(plantas_nuevas[0], len(nuevo)); particion.asociar(st.session_state.df_med_cache)
+
 def guardar_medicion_masiva(df_mediciones, planta, equipo, fecha):
-    sheet = conectar_google_sheets("DB_MEDICIONES")
-    filas = []
     f_str = fecha.strftime("%Y-%m-%d")
-    for _, row in df_mediciones.iterrows():
-        filas.append([f_str, planta, equipo, row['String ID'], row['Amperios']])
-    sheet.append_rows(filas)
-    st.cache_data.clear()
-    st.session_state.df_med_cache = cargar_datos_mediciones()
-    st.toast("✅ Guardado y Sincronizado")
+    regs = [{'Fecha': f_str, 'Planta': planta, 'Equipo': equipo, 'String ID': sid, 'Amperios': amp}
+            for sid, amp in zip(df_mediciones['String ID'], df_mediciones['Amperios'])]
+    obtener_particion_mediciones()  # idem guardar_falla: version y particion fijadas antes de encolar
+    ids = obtener_cola_escritura().encolar_inserciones("DB_MEDICIONES", regs)
+    agregar_mediciones(pd.DataFrame({'Fecha': pd.Timestamp(fecha), 'Planta': planta, 'Equipo': equipo, 'String ID': df_mediciones['String ID'].values,
+                                     'Amperios': pd.to_numeric(df_mediciones['Amperios'], errors='coerce').fillna(0).values, 'ID': ids}))
+    st.toast("✅ Guardado (sincronizando en segundo plano)")
     st.rerun()
 
-# --- LOGICA DIAGNOSTICO ---
-def clasificar_falla(amp):
-    if amp < 4.0: return "Fatiga (<4A)"
-    elif amp > 8.0: return "Sobrecarga (>8A)"
-    else: return "Operativa (4-8A)"
-
-def obtener_topologia(df_med, planta):
-    if df_med.empty: return pd.DataFrame(columns=['Equipo', 'Strings Detectados', 'Origen'])
-    df_p = df_med[df_med['Planta'] == planta]
-    if df_p.empty: return pd.DataFrame(columns=['Equipo', 'Strings Detectados', 'Origen'])
-    topo = df_p.groupby('Equipo')['String ID'].nunique().reset_index()
-    topo.columns = ['Equipo', 'Strings Detectados']
-    topo['Origen'] = 'Medición Real'
-    return topo
-
-# --- LOGICA ANALISIS MEDICIONES ---
-def analizar_string_local(row):
-    val = row['Amperios']
-    ref_caja = row['Promedio_Caja']
-    
-    if val == 0: return "CORTE (0A)"
-    if ref_caja == 0: return "NORMAL" 
-    
-    tolerancia = TOLERANCIA_CRITICA 
-    
-    if val < (ref_caja * (1 - tolerancia)): return "BAJA CORRIENTE"
-    elif val > (ref_caja * (1 + tolerancia)): return "SOBRECORRIENTE"
-    else: return "NORMAL"
-
-def generar_diagnostico_mediciones_pro_local(df):
-    if df.empty: return "NORMAL", "success", df
-    df['Promedio_Caja'] = df.groupby('Equipo')['Amperios'].transform('mean')
-    df['Diagnostico'] = df.apply(analizar_string_local, axis=1)
-    df['Desviacion_Pct'] = np.where(df['Promedio_Caja'] > 0, 
-                                    ((df['Amperios'] - df['Promedio_Caja']) / df['Promedio_Caja']) * 100, 
-                                    0)
-    return "OK", "success", df
-
-# --- NUEVO: MOTOR DE NARRATIVA INTELIGENTE ---
-def generar_narrativa_ia(df, planta):
-    # Calcular estadisticas
-    total_str = len(df)
-    prom_global = df['Amperios'].mean()
-    cortes = len(df[df['Diagnostico'] == "CORTE (0A)"])
-    bajos = len(df[df['Diagnostico'] == "BAJA CORRIENTE"])
-    
-    # Encontrar mejor y peor caja
-    df_cajas = df.groupby('Equipo')['Amperios'].mean().reset_index()
-    mejor_caja = df_cajas.loc[df_cajas['Amperios'].idxmax()]
-    peor_caja = df_cajas.loc[df_cajas['Amperios'].idxmin()]
-    
-    # Construir el texto
-    texto = (
-        f"Durante la inspeccion tecnica realizada en la planta {planta}, se evaluaron {total_str} strings. "
-        f"El rendimiento promedio global fue de {prom_global:.1f} Amperios. "
-    )
-    
-    if cortes == 0 and bajos == 0:
-        texto += "La planta opera en condiciones optimas, sin deteccion de anomalias criticas. "
-    else:
-        texto += f"Se detectaron oportunidades de mejora: {cortes} strings sin generacion (Cortes) y {bajos} strings con bajo rendimiento operativo. "
-    
-    texto += (
-        f"Analizando la consistencia por equipos, la caja {mejor_caja['Equipo']} presento el mejor desempeño "
-        f"({mejor_caja['Amperios']:.1f}A), mientras que la unidad {peor_caja['Equipo']} registro el promedio mas bajo "
-        f"({peor_caja['Amperios']:.1f}A), sugiriendo una posible necesidad de limpieza o revision focalizada en ese sector."
-    )
-    
-    return texto
-
-# --- HELPERS ---
-def crear_id_tecnico(row):
-    try: return f"{str(row['Inversor']).replace('Inv-','')}-{str(row['Caja']).replace('CB-','')}-{str(row['String']).replace('Str-','')} {'(+)' if 'Positivo' in str(row['Polaridad']) else '(-)'}"
-    except: return "Error"
-
-def generar_analisis_auto(df, perdida_total):
-    return f"Resumen Ejecutivo:\n- Pérdida Económica Est: {perdida_total} USD."
-
-# --- PDF MASTER (V43 - BRANDING MUNDO SOLAR) ---
-class PDF(FPDF):
-    def header(self):
-        # 1. Branding Corporativo (Derecha, pequeño)
-        self.set_font('Arial', 'B', 8)
-        self.set_text_color(100, 100, 100) # Gris
-        self.cell(0, 5, 'Elaborado por Equipo Tecnico MUNDO SOLAR SpA', 0, 1, 'R')
-        
-        # 2. Titulo Principal (Centro, Grande)
-        self.set_font('Arial', 'B', 14)
-        self.set_text_color(0, 0, 0) # Negro
-        self.cell(0, 10, 'INFORME TECNICO PMGD - AUDITORIA DC', 0, 1, 'C')
-        self.ln(5)
-
-    def footer(self):
-        self.set_y(-15); self.set_font('Arial', 'I', 8); self.cell(0, 10, f'Pagina {self.page_no()} - Mundo Solar SpA', 0, 0, 'C')
-
-def clean_text(text):
-    if not isinstance(text, str): return str(text)
-    replacements = {'•':'-', '—':'-', '–':'-', '“':'"', '”':'"', '‘':"'", '’':"'", '⚡':''}
-    for k, v in replacements.items(): text = text.replace(k, v)
-    return text.encode('latin-1', 'replace').decode('latin-1')
-
-def generar_reporte_completo_pdf(planta, df_mediciones):
-    pdf = PDF()
-    
-    # Procesar datos
-    stt_glob, col_glob, df_proc = generar_diagnostico_mediciones_pro_local(df_mediciones)
-    df_proc['Equipo'] = df_proc['Equipo'].astype(str)
-    
-    # Generar Narrativa Automatica (IA)
-    narrativa = generar_narrativa_ia(df_proc, planta)
-    
-    # === PAGINA 1: RESUMEN Y BOXPLOT ===
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text(f"1. Analisis Ejecutivo de Performance"), 0, 1, 'L')
-    
-    # Insertar Narrativa Automatica
-    pdf.set_font("Arial", "", 10)
-    pdf.multi_cell(0, 6, clean_text(narrativa))
-    pdf.ln(5)
-    
-    # Boxplot (Distribución por Caja)
-    fig_box = px.box(df_proc, x='Equipo', y='Amperios', title="Distribución de Corriente por Combiner Box")
-    fig_box.update_layout(template="plotly_white", width=800, height=400)
-    
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as t1:
-        fig_box.write_image(t1.name, scale=2)
-        pdf.image(t1.name, x=10, w=190)
-    pdf.ln(5)
-    pdf.set_font("Arial", "I", 9)
-    pdf.multi_cell(0, 6, clean_text("Nota: El grafico superior muestra la variabilidad interna. Cajas con rangos amplios indican inconsistencia (posibles sombras parciales)."))
-
-    # === PAGINA 2: RANKING PROMEDIOS ===
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text("2. Ranking de Rendimiento por Caja"), 0, 1, 'L')
-    
-    df_mean = df_proc.groupby('Equipo')['Amperios'].mean().reset_index().sort_values('Amperios', ascending=False)
-    fig_bar = px.bar(df_mean, x='Equipo', y='Amperios', title="Promedio de Corriente (Mayor a Menor)", color='Amperios', color_continuous_scale='Viridis')
-    fig_bar.update_layout(template="plotly_white", width=800, height=400)
-    
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as t2:
-        fig_bar.write_image(t2.name, scale=2)
-        pdf.image(t2.name, x=10, w=190)
-    
-    # === PAGINA 3: DISTRIBUCION Y MAPA ===
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text("3. Mapa de Calor y Distribución"), 0, 1, 'L')
-    
-    # Histograma
-    fig_hist = px.histogram(df_proc, x="Amperios", nbins=20, title="Curva de Distribución (Gauss)", marginal="box")
-    fig_hist.update_layout(template="plotly_white", width=800, height=300)
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as t3:
-        fig_hist.write_image(t3.name, scale=2)
-        pdf.image(t3.name, x=10, w=180)
-    
-    pdf.ln(5)
-    
-    # Scatter Map (Mapa de Strings)
-    df_proc = df_proc.sort_values(['Equipo', 'String ID'])
-    df_proc['Indice'] = range(len(df_proc))
-    
-    fig_scat = px.scatter(df_proc, x='Indice', y='Amperios', color='Amperios', 
-                          title="Mapa de Dispersión (Vista Panorámica)", color_continuous_scale='RdYlGn')
-    fig_scat.update_layout(template="plotly_white", width=800, height=300)
-    
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as t4:
-        fig_scat.write_image(t4.name, scale=2)
-        pdf.image(t4.name, x=10, w=180)
-
-    # === PAGINA 4: HALLAZGOS ===
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text(f"4. Hallazgos Críticos (Desviación > {int(TOLERANCIA_CRITICA*100)}%)"), 0, 1, 'L')
-    pdf.ln(5)
-    
-    filtro_problemas = (df_proc['Diagnostico'] == "BAJA CORRIENTE") | (df_proc['Diagnostico'] == "CORTE (0A)")
-    df_hallazgos = df_proc[filtro_problemas].sort_values('Desviacion_Pct', ascending=True)
-    
-    if not df_hallazgos.empty:
-        pdf.set_font("Arial", "B", 10)
-        pdf.set_fill_color(240, 240, 240)
-        headers = ["Equipo", "String ID", "Valor (A)", "Prom. Caja", "Desviacion"]
-        w_cols = [40, 30, 30, 30, 40]
-        
-        for i, h in enumerate(headers):
-            pdf.cell(w_cols[i], 8, clean_text(h), 1, 0, 'C', True)
-        pdf.ln()
-        
-        pdf.set_font("Arial", "", 10)
-        for _, row in df_hallazgos.iterrows():
-            pdf.cell(w_cols[0], 8, clean_text(str(row['Equipo'])), 1)
-            pdf.cell(w_cols[1], 8, clean_text(str(row['String ID'])), 1)
-            pdf.cell(w_cols[2], 8, f"{row['Amperios']:.1f}", 1, 0, 'C')
-            pdf.cell(w_cols[3], 8, f"{row['Promedio_Caja']:.1f}", 1, 0, 'C')
-            pdf.set_text_color(200, 0, 0)
-            pdf.cell(w_cols[4], 8, f"{row['Desviacion_Pct']:.1f}%", 1, 0, 'C')
-            pdf.set_text_color(0)
-            pdf.ln()
+# --- IMPORTACION MASIVA (CSV / EXCEL DE TERRENO) ---
+LOTE_IMPORTACION = 20000  # registros por transaccion en la cola
+
+def importar_mediciones(nuevas, progreso):
+    # Encola en lotes grandes y agrega todo a la version compartida de una vez.
+    from importador import registros
+    regs = registros(nuevas); cola = obtener_cola_escritura(); ids = []; obtener_particion_mediciones()
+    for i in range(0, len(regs), LOTE_IMPORTACION):
+        ids += cola.encolar_inserciones("DB_MEDICIONES", regs[i:i + LOTE_IMPORTACION])
+        progreso(len(ids) / len(regs), f"{len(ids):,} de {len(regs):,} mediciones encoladas")
+    agregar_mediciones(nuevas.assign(ID=ids))
+
+def panel_importacion(planta):
+    from importador import COLUMNAS_DESTINO, leer_encabezado, sugerir_mapeo, analizar, resumen_diagnostico
+    archivo = st.file_uploader("Exportación de pinza o datalogger", type=["csv", "txt", "xlsx", "xlsm"], key="imp_archivo")
+    if archivo is None: st.session_state.pop('importacion', None); return
+    columnas = leer_encabezado(archivo, archivo.name); sugerido = sugerir_mapeo(columnas); opciones = [None] + columnas
+    elegir = lambda col, destino: col.selectbox(destino, opciones, index=opciones.index(sugerido[destino]), key=f"imp_{destino}",
+                                                format_func=lambda c: "—" if c is None else c)
+    mapeo = {d: elegir(col, d) for col, d in zip(st.columns(len(COLUMNAS_DESTINO)), COLUMNAS_DESTINO)}
+    if mapeo['Equipo'] is None:
+        c1, c2 = st.columns(2); mapeo['Inversor'] = elegir(c1, 'Inversor'); mapeo['Caja'] = elegir(c2, 'Caja')
+        st.caption("Sin columna de equipo: se arma como Inv-<inversor>>CB-<caja>.")
+    if mapeo['Planta'] is None: st.caption(f"Sin columna de planta: todas las filas se asignan a {planta}.")
+    clave = (archivo.name, archivo.size, tuple(mapeo.items()), planta)
+    if st.button("🔎 Analizar archivo"):
+        barra = st.progress(0.0, text="Leyendo archivo...")
+        res = analizar(archivo, archivo.name, mapeo, planta, mediciones_sesion(), progreso=lambda a, t: barra.progress(a, text=t))
+        barra.empty(); st.session_state.importacion = {'clave': clave, **res}
+    imp = st.session_state.get('importacion')
+    if imp is None or imp['clave'] != clave: return
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Filas leídas", f"{imp['leidas']:,}"); k2.metric("Nuevas", f"{len(imp['nuevas']):,}"); k3.metric("Ya cargadas", f"{imp['ya_cargadas']:,}")
+    k4.metric("Repetidas en archivo", f"{imp['duplicadas']:,}"); k5.metric("Celdas inválidas", f"{len(imp['errores']):,}")
+    if len(imp['nuevas']):
+        desconocidas = sorted(set(imp['nuevas']['Planta'].astype(str).unique()) - set(plantas))
+        if desconocidas: st.warning(f"Plantas que no están en la configuración: {', '.join(desconocidas)}")
+        st.markdown("**Diagnóstico del lote** (strings por estado; promedio por caja y día)")
+        st.dataframe(resumen_diagnostico(imp['diagnostico']), use_container_width=True)
+        anomalias = imp['diagnostico'][imp['diagnostico']['Diagnostico'] != "NORMAL"]
+        if len(anomalias):
+            with st.expander(f"{len(anomalias):,} strings con anomalías"):
+                st.dataframe(anomalias.sort_values('Desviacion_Pct').head(500), use_container_width=True, hide_index=True)
+    if len(imp['errores']):
+        with st.expander("Celdas inválidas"): st.dataframe(imp['errores'].head(500), use_container_width=True, hide_index=True)
+    if len(imp['nuevas']) and st.button(f"💾 Importar {len(imp['nuevas']):,} mediciones", type="primary"):
+        barra = st.progress(0.0, text="Encolando...")
+        importar_mediciones(imp['nuevas'], lambda a, t: barra.progress(a, text=t))
+        st.session_state.pop('importacion', None)
+        st.toast("✅ Importado (sincronizando en segundo plano)"); st.rerun()
+
+# --- CAMPAÑAS DE INSPECCION ---
+@st.cache_resource
+def obtener_indices_campanas():
+    return IndicesPorVersion()
+
+def obtener_indice_campanas():
+    # Indice de la version de DB_MEDICIONES de este rerun (linaje = la carga de la que salio por altas).
+    df = mediciones_sesion(); version = versiones_rerun["DB_MEDICIONES"]
+    return obtener_indices_campanas().obtener(version.numero, df, linaje=version.creado)
+
+# --- INFORMES EN SEGUNDO PLANO ---
+@st.cache_resource
+def obtener_cola_informes():
+    return ColaInformes()
+
+@st.fragment(run_every=1.0)
+def seguir_trabajo_informe(clave):
+    # Solo este bloque se refresca mientras el PDF se genera; al terminar se redibuja la app.
+    trabajo = obtener_cola_informes().obtener(clave)
+    if trabajo is None or not trabajo.activo: st.rerun(scope="app")
+    st.progress(trabajo.progreso, text=f"{trabajo.etapa} ({trabajo.duracion():.0f}s)")
+
+def panel_informe_auditoria(planta, df_planta, huella_datos=None):
+    cola = obtener_cola_informes()
+    clave = (planta, huella_datos or version_datos(df_planta))
+    trabajo = cola.obtener(clave)
+    if trabajo is not None and trabajo.estado == "listo":
+        st.download_button("📄 DESCARGAR INFORME PDF", trabajo.resultado, f"Informe_Auditoria_{planta}.pdf", type="primary")
+        st.caption(f"Generado en {trabajo.duracion():.1f}s")
+    elif trabajo is not None and trabajo.activo: seguir_trabajo_informe(clave)
     else:
-        pdf.set_font("Arial", "", 10)
-        pdf.multi_cell(0, 6, clean_text("No se detectaron desviaciones criticas en esta inspeccion."))
-        
-    return bytes(pdf.output(dest='S'))
-
-
-def crear_pdf_mediciones_caja(planta, equipo, fecha, df_data, kpis, comentarios, fig_box, evidencias):
-    pdf = PDF(); pdf.add_page(); pdf.set_auto_page_break(True, margin=15)
-    pdf.set_font("Arial", "B", 12); pdf.cell(0, 10, clean_text(f"REPORTE DE CAMPO (SIMPLE)"), 0, 1, 'C'); pdf.ln(5)
-    pdf.set_font("Arial", "", 10); pdf.cell(0, 8, clean_text(f"Planta: {planta} | Equipo: {equipo}"), 0, 1); pdf.cell(0, 8, clean_text(f"Fecha: {fecha}"), 0, 1); pdf.ln(5)
-    
-    try:
-        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as t1: 
-            fig_box.write_image(t1.name, format="png", width=900, height=450, scale=2)
-            pdf.image(t1.name, x=10, w=190)
-    except: pass
-    pdf.ln(5); pdf.set_font("Arial", "B", 10); pdf.cell(30, 8, "String", 1, 0, 'C'); pdf.cell(30, 8, "Valor", 1, 0, 'C'); pdf.cell(80, 8, "Estado", 1, 1, 'C'); pdf.set_font("Arial", "", 10)
-    for _, r in df_data.iterrows():
-        pdf.cell(30, 8, clean_text(str(r['String ID'])), 1, 0, 'C'); pdf.cell(30, 8, f"{r['Amperios']:.1f} A", 1, 0, 'C')
-        pdf.cell(80, 8, clean_text(r['Diagnostico']), 1, 1, 'C')
-    return bytes(pdf.output(dest='S'))
-
-def generar_excel_maestro(df):
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as w: df.to_excel(w, index=False)
-    return output.getvalue()
-
-def generar_excel_pro(df_reporte, planta, periodo, comentarios):
-    output = io.BytesIO()
-    if df_reporte.empty: return None
-    df_rep = df_reporte.copy()
-    df_rep['ID_Tecnico'] = df_rep.apply(crear_id_tecnico, axis=1)
-    try:
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            wb = writer.book
-            ws = wb.add_worksheet('Reporte Ingeniería')
-            ws.hide_gridlines(2)
-            f_title = wb.add_format({'bold': True, 'font_size': 16, 'color': 'white', 'bg_color': '#2e86c1', 'align': 'center'})
-            f_wrap = wb.add_format({'text_wrap': True, 'border': 1, 'valign': 'top'})
-            ws.merge_range('B2:H2', f"INFORME TECNICO: {planta.upper()}", f_title)
-            ws.write('B3', f"Periodo: {periodo}")
-            ws.merge_range('B6:F12', comentarios, f_wrap)
-            df_export = df_rep[['Fecha', 'ID_Tecnico', 'Inversor', 'Caja', 'String', 'Polaridad', 'Amperios', 'Nota']]
-            df_export['Fecha'] = df_export['Fecha'].dt.date
-            df_export.to_excel(writer, sheet_name='Reporte Ingeniería', startrow=15, startcol=1, index=False)
-    except: return None
-    return output.getvalue()
-
-# --- APP ---
-if 'df_cache' not in st.session_state: st.session_state.df_cache = cargar_datos_fusibles()
-if 'df_med_cache' not in st.session_state: st.session_state.df_med_cache = cargar_datos_mediciones()
-
-PLANTAS_DEF = ["El Roble", "Las Rojas"]
-def cargar_plantas():
-    try: return json.load(open("plantas_config.json"))
-    except: return PLANTAS_DEF
-plantas = cargar_plantas()
-
-st.title("⚡ Monitor Planta Solar")
-if st.button("🔄 Sincronizar"): 
-    st.session_state.df_cache = cargar_datos_fusibles()
-    st.session_state.df_med_cache = cargar_datos_mediciones()
-    st.rerun()
-
-with st.sidebar:
-    st.header("Configuración")
-    planta_sel = st.selectbox("Planta:", plantas)
-    with st.expander("Admin"):
-        nuevo = st.text_input("Agregar planta")
-        if st.button("Agregar") and nuevo: plantas.append(nuevo); json.dump(plantas, open("plantas_config.json", 'w')); st.rerun()
-
-t1, t2, t3, t4 = st.tabs(["📝 Fallas", "⚡ Mediciones", "📊 Informes", "🔍 Diagnóstico"])
-
-with t1:
-    st.subheader(f"Registro: {planta_sel}")
+        if trabajo is not None: st.error(f"Error al generar: {trabajo.error}")
+        if st.button("📄 GENERAR INFORME PDF", type="primary"):
+            from informes import generar_reporte_completo_pdf
+            cola.enviar(clave, generar_reporte_completo_pdf, planta, df_planta); st.rerun()
+
+# --- FLOTA ---
+def resumen_flota(plantas):
+    # Una fila por planta a partir de los resumenes por planta (rollup de fallas e indice de campañas), sin recorrer filas.
+    rollup = obtener_rollup_fallas(); particion_med = obtener_particion_mediciones(); perdidas = obtener_motor_perdidas().totales()
+    indice = obtener_indice_campanas()
+    hace_30 = pd.Timestamp.now().normalize() - timedelta(days=30); filas = []
+    for planta in dict.fromkeys(list(plantas) + rollup.plantas() + particion_med.plantas()):
+        r = rollup.rango(planta)
+        fila = {'Planta': planta, 'Fallas': int(r['Fallas'].sum()), 'Fallas 30d': int(rollup.rango(planta, hace_30)['Fallas'].sum()),
+                'Pérdida Est. (USD)': round(float(perdidas.get(planta, 0.0)), 1), 'Última Campaña': "-", 'Strings': 0, 'Anomalías': 0, 'Salud %': None}
+        camps = indice.campanas(planta); cajas = indice.cajas.get(camps[0]['id']) if camps else None
+        if cajas is not None and len(cajas):
+            n = int(cajas['Strings'].sum()); malos = int(cajas['Cortes'].sum() + cajas['Bajos'].sum())
+            fila.update({'Última Campaña': camps[0]['etiqueta'], 'Strings': n, 'Anomalías': malos, 'Salud %': round(100 * (n - malos) / n, 1)})
+        filas.append(fila)
+    return pd.DataFrame(filas)
+
+# --- PANEL DE RENDIMIENTO (solo admin: ?admin=<clave>) ---
+def es_admin():
+    clave = os.environ.get("PMGD_ADMIN_CLAVE")
+    if not clave:
+        try: clave = st.secrets.get("admin_clave")
+        except: clave = None
+    return bool(clave) and st.query_params.get("admin") == clave
+
+def panel_rendimiento():
+    with st.expander("⏱️ Rendimiento"):
+        # Un solo interruptor por proceso: mide todas las sesiones y los hilos de fondo (colas de escritura e informes)
+        activo = st.toggle("Instrumentación activa (todo el servidor)", value=metricas.activo(),
+                           help="Afecta a todas las sesiones abiertas y a los trabajos en segundo plano; el historial también es compartido.")
+        if activo != metricas.activo(): metricas.activar(activo); st.rerun()
+        st.caption("Memo de vistas: " + ", ".join(f"{k} {v}" for k, v in obtener_memo_vistas().estadisticas().items()))
+        corridas = metricas.historial()
+        if not corridas: st.caption("Sin mediciones todavía."); return
+        st.caption("Por etapa (ms)")
+        st.dataframe(pd.DataFrame.from_dict(metricas.resumen_etapas(corridas), orient='index').sort_values('ms_total', ascending=False), use_container_width=True)
+        st.caption("Últimas corridas")
+        st.dataframe(pd.DataFrame([{'Tipo': c['tipo'], 'Nombre': c['nombre'], 'ms': c['ms'], 'Etapas': len(c['etapas'])} for c in corridas[-20:][::-1]]), use_container_width=True, hide_index=True)
+        st.download_button("📥 Exportar JSONL", metricas.exportar_jsonl, "metricas_pmgd.jsonl", mime="application/x-ndjson")
+        if st.button("Limpiar historial"): metricas.limpiar(); st.rerun()
+
+# --- SECCIONES AISLADAS Y MEMO DE VISTAS ---
+@st.cache_resource
+def obtener_memo_vistas():
+    return MemoVistas()
+
+def memo(clave, construir):
+    return obtener_memo_vistas().obtener(clave, construir)
+
+def version_hoja(hoja):
+    # Numero de la version de datos que ve este rerun: parte de las claves del memo (guardar publica una nueva).
+    datos_sesion(hoja); return versiones_rerun[hoja].numero
+
+def seccion_aislada(funcion):
+    # Cada seccion es un fragmento: sus widgets re-ejecutan solo la seccion, no la app completa. Al re-ejecutarse
+    # vuelve a tomar la version vigente de los datos.
+    @st.fragment
+    @wraps(funcion)
+    def fragmento(*args):
+        versiones_rerun.clear()
+        return funcion(*args)
+    return fragmento
+
+def figura_carga_manual(df_ed, prom):
+    px = plotly_express()
+    fig = px.bar(df_ed, x='String ID', y='Amperios', color='Diagnostico',
+                 color_discrete_map={'NORMAL': '#2ecc71', 'CORTE (0A)': '#e74c3c', 'BAJA CORRIENTE': '#f39c12'})
+    fig.update_layout(template="plotly", paper_bgcolor='white', plot_bgcolor='white', margin=dict(l=10, r=10, t=40, b=40), height=400)
+    fig.add_hline(y=prom, line_dash="dash", line_color="gray")
+    return fig
+
+def figuras_fallas(rollup, r_f):
+    px = plotly_express()
+    df_heat = r_f.groupby(['Inversor', 'Caja'], observed=True)['Fallas'].sum().reset_index()
+    fig_heat = px.density_heatmap(df_heat, x='Inversor', y='Caja', z='Fallas', title="Mapa de Calor (Concentración)", color_continuous_scale='Reds')
+    fig_heat.update_layout(template="plotly", paper_bgcolor='white', plot_bgcolor='white', height=400)
+    l_cfg = dict(margin=dict(l=10, r=10, t=50, b=10), height=350, paper_bgcolor='white', plot_bgcolor='white')
+    drk = rollup.por_equipo(r_f).rename_axis('Equipo_Full').reset_index(name='Fallas').sort_values('Fallas', ascending=True)
+    frk = px.bar(drk, x='Fallas', y='Equipo_Full', orientation='h', title="Ranking"); frk.update_layout(**l_cfg)
+    fpi = px.pie(r_f.groupby('Inversor', observed=True)['Fallas'].sum().reset_index(), names='Inversor', values='Fallas', title="Inversores"); fpi.update_layout(**l_cfg)
+    fpo = px.pie(r_f.groupby('Polaridad', observed=True)['Fallas'].sum().reset_index(), names='Polaridad', values='Fallas', title="Polaridad", color_discrete_sequence=['#e74c3c', '#3498db'], hole=0.4); fpo.update_traces(textinfo='percent+label', textposition='inside'); fpo.update_layout(showlegend=True, height=380, paper_bgcolor='white', plot_bgcolor='white')
+    return fig_heat, frk, fpi, fpo
+
+def tabla_fallas(planta, desde, hasta, perdida_total):
+    # Filas del periodo con su perdida (para el texto automatico y el Excel).
+    df_f = fallas_planta(planta)
+    if desde is not None: df_f = df_f[df_f['Fecha'] >= desde]
+    if hasta is not None: df_f = df_f[df_f['Fecha'] < hasta]
+    df_f = df_f.assign(Equipo_Full=df_f['Inversor'].astype(str) + " > " + df_f['Caja'].astype(str)).join(obtener_motor_perdidas().perdidas(df_f, desde, hasta))
+    return df_f, generar_analisis_auto(df_f, perdida_total)
+
+def vista_mediciones(dfmp, indice, camp_sel):
+    # Diagnostico, KPIs y graficos de una planta y campaña; se arma una vez por version de datos.
+    from graficos_mediciones import resumen_cajas, resumen_distribucion, figura_cajas, figura_histograma, figura_mapa_strings
+    px = plotly_express()
+    _, _, df_processed = generar_diagnostico_mediciones_pro_local(dfmp)
+    df_processed = df_processed.sort_values(['Equipo', 'String ID'])
+    v = {'huella': version_datos(dfmp), 'df': df_processed, 'strings': len(df_processed),
+         'criticos': int((df_processed['Diagnostico'] == "CORTE (0A)").sum()), 'bajos': int((df_processed['Diagnostico'] == "BAJA CORRIENTE").sum())}
+    # Resumenes calculados aqui: el navegador recibe cuartiles y bins, no un punto por string
+    e_fig = iniciar_etapa("graficos.app", filas=len(df_processed))
+    stats_caja, atip_caja = resumen_cajas(df_processed)
+    v['fig_box'] = figura_cajas(stats_caja, atip_caja, "Distribución de Corriente por Combiner Box"); v['fig_box'].update_layout(height=450)
+    v['fig_hist'] = figura_histograma(resumen_distribucion(df_processed['Amperios'], nbins=20), "Distribución de Frecuencias")
+    v['fig_scat'] = figura_mapa_strings(df_processed, "Mapa de Dispersión (Ordenado)")
+    e_fig.terminar()
+    filtro_problemas = (df_processed['Diagnostico'] == "BAJA CORRIENTE") | (df_processed['Diagnostico'] == "CORTE (0A)")
+    df_bajos = df_processed[filtro_problemas].sort_values('Amperios', ascending=True).head(15)
+    v['fig_bar'] = None
+    if not df_bajos.empty:
+        df_bajos = df_bajos.assign(ID_Full=df_bajos['Equipo'].astype(str) + " : " + df_bajos['String ID'].astype(str))
+        v['fig_bar'] = px.bar(df_bajos, x='Amperios', y='ID_Full', orientation='h', color='Diagnostico', color_discrete_map={'CORTE (0A)': '#e74c3c', 'BAJA CORRIENTE': '#f39c12'})
+    v['tendencia'] = None
+    if camp_sel != "__todo__":
+        df_tc = indice.tendencia_cajas(camp_sel)
+        if not df_tc.empty:
+            fig_tr = px.bar(df_tc.sort_values('Deriva_Pct'), x='Equipo', y='Deriva_Pct', color='Deriva_Pct', color_continuous_scale='RdYlGn', title="Deriva del Promedio por Caja vs Campaña Anterior (%)")
+            v['tendencia'] = (fig_tr, indice.tendencia_strings(camp_sel).sort_values('Deriva_Pct').head(20).round(2))
+    return v
+
+MAX_ABIERTAS = 50  # filas de la lista de fallas abiertas
+
+def boton_reparar(col, r, prefijo):
+    if pd.notna(r.get('Reparacion')): col.caption(f"✔ {r['Reparacion']:%d/%m}"); return
+    with col.popover("🔧", help="Marcar reparada"):
+        fecha = st.date_input("Reparada el", key=f"fr{prefijo}{r['ID']}")
+        if st.button("Cerrar falla", key=f"r{prefijo}{r['ID']}"): marcar_reparada(r['ID'], fecha); st.rerun()
+
+@seccion_aislada
+def seccion_fallas(planta):
+    st.subheader(f"Registro: {planta}")
     with st.form("f1"):
         c1, c2, c3, c4 = st.columns(4)
         f = c1.date_input("Fecha")
@@ -392,189 +477,288 @@ with t1:
         p = c5.selectbox("Pol", ["Positivo (+)", "Negativo (-)"])
         a = c6.number_input("A", 0.0, 30.0)
         n = c7.text_input("Nota")
+        rep = c7.date_input("Reparación", value=None, help="Vacía: la falla sigue abierta y suma pérdida hasta hoy")
         if st.form_submit_button("Guardar"):
-            guardar_falla({'Fecha': pd.to_datetime(f), 'Planta': planta_sel, 'Inversor': f"Inv-{i}", 'Caja': f"CB-{c}", 'String': f"Str-{s}", 'Polaridad': p, 'Amperios': a, 'Nota': n})
-            st.session_state.df_cache = cargar_datos_fusibles()
+            guardar_falla({'Fecha': pd.to_datetime(f), 'Planta': planta, 'Inversor': f"Inv-{i}", 'Caja': f"CB-{c}", 'String': f"Str-{s}", 'Polaridad': p, 'Amperios': a, 'Nota': n,
+                           'Reparacion': pd.to_datetime(rep)})
             st.rerun()
-    df_s = st.session_state.df_cache[st.session_state.df_cache['Planta'] == planta_sel]
+    df_s = fallas_planta(planta)
     if not df_s.empty:
-        for idx, r in df_s.tail(5).sort_index(ascending=False).iterrows():
-            cols = st.columns([1, 2, 2, 1, 1, 1])
+        pendientes = obtener_cola_escritura().ids_pendientes("Sheet1")
+        ultimas = df_s.tail(5).sort_index(ascending=False)
+        for id_tec, (idx, r) in zip(ids_tecnicos(ultimas), ultimas.iterrows()):
+            cols = st.columns([1, 2, 2, 1, 1, 1, 1])
             cols[0].write(r['Fecha'].strftime('%d/%m'))
             cols[1].write(f"{r['Inversor']}>{r['Caja']}")
-            cols[2].write(crear_id_tecnico(r))
+            cols[2].write(id_tec)
             cols[3].write(f"{r['Amperios']}A")
-            cols[4].caption(r['Nota'])
-            if cols[5].button("🗑️", key=f"d{idx}"): borrar_registro(idx); st.rerun()
-
-with t2:
+            cols[4].caption(f"⏳ {r['Nota']}" if r['ID'] in pendientes else r['Nota'])
+            boton_reparar(cols[5], r, "u")
+            if cols[6].button("🗑️", key=f"d{r['ID']}"): borrar_registro(r['ID']); st.rerun()
+        abiertas = df_s[df_s['Reparacion'].isna()] if 'Reparacion' in df_s.columns else df_s
+        with st.expander(f"🔧 Fallas abiertas ({len(abiertas)}): suman pérdida hasta hoy"):
+            primeras = abiertas.sort_values('Fecha').head(MAX_ABIERTAS)
+            for id_tec, (idx, r) in zip(ids_tecnicos(primeras), primeras.iterrows()):
+                cols = st.columns([1, 2, 2, 1, 1])
+                cols[0].write(r['Fecha'].strftime('%d/%m/%y'))
+                cols[1].write(f"{r['Inversor']}>{r['Caja']}")
+                cols[2].write(id_tec)
+                cols[3].write(f"{r['Amperios']}A")
+                boton_reparar(cols[4], r, "a")
+            if len(abiertas) > MAX_ABIERTAS: st.caption(f"Se muestran las {MAX_ABIERTAS} más antiguas.")
+
+@seccion_aislada
+def seccion_mediciones(planta):
     st.subheader("Mediciones")
+    with st.expander("📥 Importar archivo de terreno (CSV / Excel)"): panel_importacion(planta)
     c1, c2, c3 = st.columns(3)
     mi = c1.number_input("Inv", 1, 50, key="mi")
     mc = c2.number_input("Caja", 1, 100, key="mc")
     ns = c3.number_input("Cant", 4, 32, 12)
     mf = c3.date_input("Fecha", key="mf")
-    
     if 'data_med' not in st.session_state or len(st.session_state['data_med']) != ns:
         st.session_state['data_med'] = pd.DataFrame({'String ID': [f"Str-{i+1}" for i in range(ns)], 'Amperios': [0.0] * ns})
-    
+
     ce, cs = st.columns([1, 1])
     df_ed = ce.data_editor(st.session_state['data_med'], height=(35 * ns) + 40, hide_index=True)
     vals = df_ed['Amperios']
     v_cl = vals[vals > 0]
-    
+
     if not v_cl.empty:
         prom = v_cl.mean(); dev = v_cl.std(); cv = (dev / prom) * 100 if prom > 0 else 0
         cs.metric("Promedio Local", f"{prom:.2f} A")
-        
-        def diag_simple(v, p):
-            if v == 0: return "CORTE (0A)"
-            if v < p * (1 - TOLERANCIA_CRITICA): return "BAJA CORRIENTE"
-            return "NORMAL"
-            
-        df_ed['Diagnostico'] = df_ed['Amperios'].apply(lambda x: diag_simple(x, prom))
-        
-        fig = px.bar(df_ed, x='String ID', y='Amperios', color='Diagnostico', 
-                     color_discrete_map={'NORMAL': '#2ecc71', 'CORTE (0A)': '#e74c3c', 'BAJA CORRIENTE': '#f39c12'})
-        fig.update_layout(template="plotly", paper_bgcolor='white', plot_bgcolor='white', margin=dict(l=10, r=10, t=40, b=40), height=400)
-        fig.add_hline(y=prom, line_dash="dash", line_color="gray")
+        df_ed['Diagnostico'] = diagnostico_simple(df_ed['Amperios'], prom, TOLERANCIA_CRITICA)
+        h_ed = huella(df_ed)  # la figura y el PDF cambian solo si cambia la tabla
+        fig = memo(('mediciones.barras', h_ed), lambda: figura_carga_manual(df_ed, prom))
         cs.plotly_chart(fig, use_container_width=True)
-        
-        st.divider(); comm = st.text_area("Notas:"); imgs = st.file_uploader("Fotos", accept_multiple_files=True)
+
+        st.divider(); comm = st.text_area("Notas:"); imgs = st.file_uploader("Fotos", type=["jpg", "jpeg", "png", "webp"], accept_multiple_files=True)
+        if imgs:
+            from fotos import precalentar
+            precalentar(imgs)  # se reducen en segundo plano mientras se completa el formulario
         cb1, cb2 = st.columns(2)
-        if cb1.button("💾 Guardar"): guardar_medicion_masiva(df_ed, planta_sel, f"Inv-{mi}>CB-{mc}", mf)
+        equipo = f"Inv-{mi}>CB-{mc}"; fecha_txt = mf.strftime("%d-%m-%Y")
+        if cb1.button("💾 Guardar"): guardar_medicion_masiva(df_ed, planta, equipo, mf)
         kpis = {'promedio': f"{prom:.1f}", 'dispersion': f"{cv:.1f}%", 'estado': "Carga Manual"}
-        
-        cb2.download_button("📄 PDF Caja", crear_pdf_mediciones_caja(planta_sel, f"Inv-{mi}>CB-{mc}", mf.strftime("%d-%m-%Y"), df_ed, kpis, comm, fig, imgs), f"Med_{mc}.pdf")
 
-with t3:
+        clave_pdf = ('pdf.caja', planta, equipo, fecha_txt, h_ed, comm, tuple((f.file_id, f.size) for f in imgs or []))
+        cb2.download_button("📄 PDF Caja", partial(obtener_memo_vistas().archivo, clave_pdf, pdf_caja, planta, equipo, fecha_txt, df_ed, kpis, comm, fig, imgs), f"Med_{mc}.pdf")
+
+@seccion_aislada
+def seccion_informes(planta):
     st.header("Informes")
     mode = st.radio("Tipo:", ["Fallas", "Mediciones"], horizontal=True); st.divider()
-    
+    from exportar import FORMATOS, MIME, exportar_temporal, parquet_disponible
+
     if mode == "Fallas":
-        # (Codigo Fallas sin cambios)
-        df = st.session_state.df_cache; df_f = df[df['Planta'] == planta_sel].copy()
-        if not df_f.empty:
-            df_f['Equipo_Full'] = df_f['Inversor'] + " > " + df_f['Caja']
+        # KPIs y graficos salen del rollup (planta x inversor x caja x dia/mes); solo el Excel baja a filas.
+        rollup = obtener_rollup_fallas()
+        if not rollup.rango(planta).empty:
             c_f, c_k = st.columns([1, 3])
             with c_f:
                 st.markdown("⏱️ **Filtros**")
                 filtro_t = st.radio("Periodo:", ["Todo", "Este Mes", "Último Trimestre", "Último Semestre", "Último Año", "Mes Específico"])
-                hoy = pd.Timestamp.now(); fecha_texto = "Histórico Completo"
-                if filtro_t == "Este Mes": df_f = df_f[df_f['Fecha'].dt.month == hoy.month]; fecha_texto = f"{obtener_nombre_mes(hoy.month)} {hoy.year}"
-                elif filtro_t == "Último Trimestre": df_f = df_f[df_f['Fecha'] >= (hoy - timedelta(days=90))]; fecha_texto = "Últimos 90 Días"
-                elif filtro_t == "Último Semestre": df_f = df_f[df_f['Fecha'] >= (hoy - timedelta(days=180))]; fecha_texto = "Últimos 180 Días"
-                elif filtro_t == "Último Año": df_f = df_f[df_f['Fecha'] >= (hoy - timedelta(days=365))]; fecha_texto = "Último Año"
+                hoy = pd.Timestamp.now(); fecha_texto = "Histórico Completo"; desde = hasta = None; mensual = False
+                if filtro_t == "Este Mes": desde, hasta, fecha_texto = periodo_mes(hoy.year, hoy.month); mensual = True
+                elif filtro_t == "Último Trimestre": desde = hoy - timedelta(days=90); fecha_texto = "Últimos 90 Días"
+                elif filtro_t == "Último Semestre": desde = hoy - timedelta(days=180); fecha_texto = "Últimos 180 Días"
+                elif filtro_t == "Último Año": desde = hoy - timedelta(days=365); fecha_texto = "Último Año"
                 elif filtro_t == "Mes Específico":
                     mm = st.selectbox("Mes", range(1, 13), index=hoy.month - 1, format_func=obtener_nombre_mes)
                     aa = st.number_input("Año", 2023, 2030, hoy.year)
-                    df_f = df_f[(df_f['Fecha'].dt.month == mm) & (df_f['Fecha'].dt.year == aa)]; fecha_texto = f"{obtener_nombre_mes(mm)} {aa}"
+                    desde, hasta, fecha_texto = periodo_mes(aa, mm); mensual = True
+            # Periodos relativos ("ultimos 90 dias") cambian en cada rerun: la clave usa el dia, no el instante
+            clave = (planta, filtro_t, fecha_texto, hoy.date(), version_hoja("Sheet1"))
+            r_f = rollup.rango(planta, desde, hasta, mensual)
             with c_k:
-                repes = 0; critico = "-"; df_f['Perdida'] = df_f['Amperios'] * (VOLTAJE_DC * PRECIO_MWH * HORAS_SOL_REP / 1000000); perdida_total = f"{df_f['Perdida'].sum():.1f} USD"
-                if not df_f.empty: conteos = df_f['Equipo_Full'].value_counts(); critico = conteos.idxmax(); repes = conteos.max()
-                kpis = {'total': len(df_f), 'promedio': f"{df_f['Amperios'].mean():.1f} A", 'critico': critico, 'repes': repes, 'perdida': perdida_total}
+                kpis = rollup.kpis(planta, desde, hasta, mensual)
+                # Energia perdida dentro del periodo (fallas abiertas hasta hoy), no un dia tipo por falla
+                perdida_total = round(obtener_motor_perdidas().total(planta, desde, hasta), 1); kpis['perdida'] = f"{perdida_total:.1f} USD"
                 k1, k2, k3, k4 = st.columns([1, 1, 1.5, 1])
                 k1.metric("Fallas", kpis['total']); k2.metric("Promedio", kpis['promedio']); k3.metric("Equipo Crítico", kpis['critico']); k4.metric("Perdida Est.", kpis['perdida'])
             st.subheader("Análisis Visual")
-            df_heat = df_f.groupby(['Inversor', 'Caja']).size().reset_index(name='Fallas')
-            fig_heat = px.density_heatmap(df_heat, x='Inversor', y='Caja', z='Fallas', title="Mapa de Calor (Concentración)", color_continuous_scale='Reds')
-            fig_heat.update_layout(template="plotly", paper_bgcolor='white', plot_bgcolor='white', height=400); st.plotly_chart(fig_heat, use_container_width=True)
-            c1, c2, c3 = st.columns(3); l_cfg = dict(margin=dict(l=10, r=10, t=50, b=10), height=350, paper_bgcolor='white', plot_bgcolor='white')
-            drk = df_f.groupby('Equipo_Full').agg(Fallas=('Fecha', 'count')).reset_index().sort_values('Fallas', ascending=True)
-            frk = px.bar(drk, x='Fallas', y='Equipo_Full', orientation='h', title="Ranking"); frk.update_layout(**l_cfg); c1.plotly_chart(frk, use_container_width=True)
-            fpi = px.pie(df_f, names='Inversor', title="Inversores"); fpi.update_layout(**l_cfg); c2.plotly_chart(fpi, use_container_width=True)
-            fpo = px.pie(df_f, names='Polaridad', title="Polaridad", color_discrete_sequence=['#e74c3c', '#3498db'], hole=0.4); fpo.update_traces(textinfo='percent+label', textposition='inside'); fpo.update_layout(showlegend=True, height=380, paper_bgcolor='white', plot_bgcolor='white'); c3.plotly_chart(fpo, use_container_width=True)
-            ia = generar_analisis_auto(df_f, perdida_total); st.info(ia); txt = st.text_area("Conclusiones:")
+            fig_heat, frk, fpi, fpo = memo(('informes.fallas.figuras',) + clave, lambda: figuras_fallas(rollup, r_f))
+            st.plotly_chart(fig_heat, use_container_width=True)
+            c1, c2, c3 = st.columns(3)
+            c1.plotly_chart(frk, use_container_width=True); c2.plotly_chart(fpi, use_container_width=True); c3.plotly_chart(fpo, use_container_width=True)
+            df_f, ia = memo(('informes.fallas.tabla', perdida_total) + clave, lambda: tabla_fallas(planta, desde, hasta, perdida_total))
+            st.info(ia); txt = st.text_area("Conclusiones:")
             c_pdf, c_xls = st.columns(2)
-            with c_xls: excel_data = generar_excel_pro(df_f, planta_sel, fecha_texto, txt); 
-            if excel_data: st.download_button("📥 Excel Datos", excel_data, f"Datos_Fallas_{planta_sel}.xlsx")
+            # El Excel se arma al hacer clic (en streaming), no en cada rerun; una vez por periodo, version y conclusiones.
+            if not df_f.empty:
+                with c_xls: st.download_button("📥 Excel Datos", partial(obtener_memo_vistas().archivo, ('excel.fallas', txt) + clave, excel_fallas, df_f, planta, fecha_texto, txt),
+                                               f"Datos_Fallas_{planta}.xlsx", mime=MIME['xlsx'])
         else: st.info("Sin datos.")
 
     else:
         # --- SECCIÓN MEDICIONES V43 ---
-        dfm = st.session_state.df_med_cache; dfmp = dfm[dfm['Planta'] == planta_sel].copy()
-        
+        dfmp = mediciones_planta(planta)
+
         if not dfmp.empty:
-            stt_glob, col_glob, df_processed = generar_diagnostico_mediciones_pro_local(dfmp)
-            
+            # Campaña: cada inspección se analiza por separado en vez de mezclar años en un mismo promedio
+            indice = obtener_indice_campanas()
+            camps = indice.campanas(planta)
+            etiquetas = {c['id']: f"Campaña {c['etiqueta']}" for c in camps}; etiquetas["__todo__"] = "Histórico completo"
+            camp_sel = st.selectbox("Campaña de inspección:", list(etiquetas), format_func=etiquetas.get)
+            ventana = None if camp_sel == "__todo__" else indice.ventana(camp_sel)
+            if ventana is None: camp_sel = "__todo__"  # la campaña elegida ya no existe en esta version de los datos
+            else:
+                ini, fin = ventana; dia = dfmp['Fecha'].dt.normalize()
+                dfmp = dfmp[(dia >= ini) & (dia <= fin)]
+            v = memo(('informes.mediciones', planta, camp_sel, version_hoja("DB_MEDICIONES")), lambda: vista_mediciones(dfmp, indice, camp_sel))
+            df_processed = v['df']
+
             st.markdown("### 🚦 Resumen Ejecutivo (Audit Master)")
             c_kpi, c_btn = st.columns([3, 1])
             with c_kpi: st.caption(f"Tolerancia Crítica Aplicada: {int(TOLERANCIA_CRITICA*100)}%")
-            with c_btn:
-                pdf_bytes = generar_reporte_completo_pdf(planta_sel, dfmp)
-                st.download_button("📄 GENERAR INFORME PDF", pdf_bytes, f"Informe_Auditoria_{planta_sel}.pdf", type="primary")
+            with c_btn: panel_informe_auditoria(planta, dfmp, v['huella'])
 
-            tot_strings = len(df_processed)
-            tot_criticos = len(df_processed[df_processed['Diagnostico'] == "CORTE (0A)"])
-            tot_bajos = len(df_processed[df_processed['Diagnostico'] == "BAJA CORRIENTE"])
+            tot_strings, tot_criticos, tot_bajos = v['strings'], v['criticos'], v['bajos']
             salud = ((tot_strings - tot_criticos - tot_bajos) / tot_strings) * 100
-            
+
             k1, k2, k3, k4 = st.columns(4)
             k1.metric("Strings Medidos", tot_strings)
             k2.metric("Salud Planta", f"{salud:.1f}%")
             k3.metric("Cortes (0A)", tot_criticos, delta_color="inverse")
             k4.metric("Desviación > 10%", tot_bajos, delta_color="inverse")
-            
+
             st.divider()
-            
+
             st.subheader("1. Dispersión por Caja (Boxplot)")
-            fig_box = px.box(df_processed, x='Equipo', y='Amperios', points="outliers", color="Equipo", title="Distribución de Corriente por Combiner Box")
-            fig_box.update_layout(showlegend=False, height=450)
-            st.plotly_chart(fig_box, use_container_width=True)
-            
+            st.plotly_chart(v['fig_box'], use_container_width=True)
+
             c_hist, c_scat = st.columns(2)
             with c_hist:
                 st.subheader("2. Histograma (Gauss)")
-                fig_hist = px.histogram(df_processed, x="Amperios", nbins=20, title="Distribución de Frecuencias", marginal="box")
-                st.plotly_chart(fig_hist, use_container_width=True)
-                
+                st.plotly_chart(v['fig_hist'], use_container_width=True)
+
             with c_scat:
                 st.subheader("3. Mapa de Strings")
-                df_processed = df_processed.sort_values(['Equipo', 'String ID'])
-                df_processed['Indice'] = range(len(df_processed))
-                
-                fig_scat = px.scatter(df_processed, 
-                                      x='Indice', 
-                                      y='Amperios', 
-                                      color='Amperios', 
-                                      title="Mapa de Dispersión (Ordenado)", 
-                                      color_continuous_scale='RdYlGn',
-                                      hover_data=['Equipo', 'String ID'])
-                st.plotly_chart(fig_scat, use_container_width=True)
+                st.plotly_chart(v['fig_scat'], use_container_width=True)
 
             st.subheader("4. Top Strings con Desviación")
-            filtro_problemas = (df_processed['Diagnostico'] == "BAJA CORRIENTE") | (df_processed['Diagnostico'] == "CORTE (0A)")
-            df_bajos = df_processed[filtro_problemas].sort_values('Amperios', ascending=True).head(15)
-            if not df_bajos.empty:
-                df_bajos['ID_Full'] = df_bajos['Equipo'] + " : " + df_bajos['String ID']
-                fig_bar = px.bar(df_bajos, x='Amperios', y='ID_Full', orientation='h', color='Diagnostico', color_discrete_map={'CORTE (0A)': '#e74c3c', 'BAJA CORRIENTE': '#f39c12'})
-                st.plotly_chart(fig_bar, use_container_width=True)
+            if v['fig_bar'] is not None: st.plotly_chart(v['fig_bar'], use_container_width=True)
             else: st.success("Sin anomalías graves.")
 
+            if camp_sel != "__todo__":
+                st.subheader("5. Tendencia vs Campañas Anteriores")
+                if v['tendencia'] is None: st.info("Primera campaña registrada en esta planta: sin historial para comparar.")
+                else:
+                    fig_tr, df_ts = v['tendencia']
+                    st.plotly_chart(fig_tr, use_container_width=True)
+                    st.caption("Strings con mayor caída respecto de su medición anterior")
+                    st.dataframe(df_ts, use_container_width=True, hide_index=True)
+
             with st.expander("Ver Base de Datos Completa"):
                 st.dataframe(df_processed, use_container_width=True)
+            with st.expander("📦 Exportar Mediciones"):
+                fmts = [f for f in FORMATOS if f != 'parquet' or parquet_disponible()]
+                fmt = st.radio("Formato:", fmts, format_func=FORMATOS.get, horizontal=True, key="fmt_export_med")
+                st.download_button("📥 Descargar", partial(exportar_temporal, dfmp, fmt), f"Mediciones_{planta}.{fmt}", mime=MIME[fmt])
         else:
             st.warning("Sin mediciones registradas.")
 
-with t4:
+@seccion_aislada
+def seccion_diagnostico(planta):
     st.header("🔍 Diagnóstico Técnico Avanzado")
-    df = st.session_state.df_cache; df_d = df[df['Planta'] == planta_sel].copy()
+    df_d = fallas_planta(planta)
     if not df_d.empty:
         c_gh, c_typ = st.columns(2)
         with c_gh:
             st.subheader("👻 Strings Fantasma")
-            df_d['ID_Unico'] = df_d['Inversor'] + " > " + df_d['Caja'] + " > " + df_d['String']
-            counts = df_d['ID_Unico'].value_counts(); ghosts = counts[counts > 1]
-            if not ghosts.empty: st.error(f"Se detectaron {len(ghosts)} strings con fallas múltiples."); st.dataframe(ghosts.rename("Fallas"), use_container_width=True)
+            # Indice por posicion (string + polaridad) con fechas ordenadas: reincidencia y MTBF sin reescanear
+            dias_r = st.number_input("Reincidencia: vuelve a fallar en ≤ días", 1, 365, 30)
+            ghosts = obtener_indice_reincidencia().top(planta, k=None, dias=dias_r)
+            if not ghosts.empty:
+                st.error(f"Se detectaron {len(ghosts)} strings con fallas múltiples ({int((ghosts['Reincidencias'] > 0).sum())} reinciden en ≤ {dias_r} días).")
+                st.dataframe(ghosts.rename(columns={'MTBF_dias': 'MTBF (días)', 'Ultima': 'Última'}).round(1), use_container_width=True, hide_index=True)
             else: st.success("No hay strings reincidentes.")
         with c_typ:
             st.subheader("⚡ Clasificación de Causa")
-            df_d['Tipo_Falla'] = df_d['Amperios'].apply(clasificar_falla)
-            fig_pie_type = px.pie(df_d, names='Tipo_Falla', title="Fatiga vs Sobrecarga", color='Tipo_Falla', color_discrete_map={"Fatiga (<4A)": "#2ecc71", "Sobrecarga (>8A)": "#e74c3c", "Operativa (4-8A)": "#f1c40f"}, hole=0.6)
-            st.plotly_chart(fig_pie_type, use_container_width=True)
+            def figura_causa():
+                px = plotly_express()
+                return px.pie(df_d.assign(Tipo_Falla=clasificar_fallas(df_d['Amperios'])), names='Tipo_Falla', title="Fatiga vs Sobrecarga", color='Tipo_Falla', color_discrete_map={"Fatiga (<4A)": "#2ecc71", "Sobrecarga (>8A)": "#e74c3c", "Operativa (4-8A)": "#f1c40f"}, hole=0.6)
+            st.plotly_chart(memo(('diagnostico.causa', planta, version_hoja("Sheet1")), figura_causa), use_container_width=True)
     else: st.info("Sin datos de fallas.")
     st.divider()
     st.subheader("🗺️ Monitor de Topología")
-    df_meds = st.session_state.df_med_cache; topo_data = obtener_topologia(df_meds, planta_sel)
+    topo_data = memo(('diagnostico.topologia', planta, version_hoja("DB_MEDICIONES")), lambda: obtener_topologia(mediciones_planta(planta), planta))
     if not topo_data.empty: st.dataframe(topo_data, use_container_width=True)
     else: st.warning("No hay mediciones registradas.")
+
+@seccion_aislada
+def seccion_flota(plantas):
+    st.header("🌐 Resumen de Flota")
+    def construir():
+        px = plotly_express()
+        df_flota = resumen_flota(plantas)
+        if df_flota.empty: return df_flota, None
+        fig_fl = px.bar(df_flota, x='Planta', y='Pérdida Est. (USD)', color='Salud %', color_continuous_scale='RdYlGn', range_color=[80, 100], title="Pérdida Estimada y Salud por Planta")
+        return df_flota, fig_fl
+    # Fallas 30d y perdidas de fallas abiertas avanzan con el reloj: la clave incluye la hora
+    clave = ('flota', tuple(plantas), version_hoja("Sheet1"), version_hoja("DB_MEDICIONES"), pd.Timestamp.now().floor('h'))
+    df_flota, fig_fl = memo(clave, construir)
+    if not df_flota.empty:
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Plantas", len(df_flota)); k2.metric("Fallas (30 días)", int(df_flota['Fallas 30d'].sum()))
+        k3.metric("Pérdida Est.", f"{df_flota['Pérdida Est. (USD)'].sum():.1f} USD")
+        n_str = df_flota['Strings'].sum()
+        k4.metric("Salud Flota", f"{100 * (n_str - df_flota['Anomalías'].sum()) / n_str:.1f}%" if n_str else "-")
+        st.plotly_chart(fig_fl, use_container_width=True)
+        st.dataframe(df_flota, use_container_width=True, hide_index=True)
+    else: st.info("Sin datos.")
+
+# --- APP ---
+corrida_rerun = metricas.abrir_corrida("rerun")
+metricas.registrar_etapa("app.imports", (time.perf_counter() - T_INICIO) * 1000, frio=ARRANQUE_FRIO)
+
+PLANTAS_DEF = ["El Roble", "Las Rojas"]
+def cargar_plantas():
+    try: return json.load(open("plantas_config.json"))
+    except: return PLANTAS_DEF
+plantas = cargar_plantas()
+
+st.title("⚡ Monitor Planta Solar")
+if st.button("🔄 Sincronizar"): 
+    obtener_espejo().pedir_recarga(HOJAS_DATOS)  # relee las hojas completas: trae ediciones de filas ya copiadas
+    sincronizar_espejo.clear(); obtener_datos_compartidos().invalidar()  # todas las sesiones pasan a la version nueva al usarla
+    st.rerun()
+avisos = st.container()  # se llena al final, cuando ya se sabe que datos cargo la seccion
+
+with st.sidebar:
+    st.header("Configuración")
+    planta_sel = st.selectbox("Planta:", plantas)
+    cola = obtener_cola_escritura(); n_pend = cola.cantidad_pendiente()
+    if n_pend: st.caption(f"⏳ {n_pend} cambios pendientes de sincronizar" + (f" (reintentando: {cola.ultimo_error})" if cola.ultimo_error else ""))
+    n_fall = cola.cantidad_fallida()
+    if n_fall:
+        st.warning(f"⚠️ {n_fall} cambios no se pudieron escribir en Google tras varios intentos ({cola.ultimo_error or 'ver cola local'}).")
+        if st.button("Reintentar envío"): cola.reintentar_fallidos(); st.rerun()
+    with st.expander("Admin"):
+        nuevo = st.text_input("Agregar planta")
+        if st.button("Agregar") and nuevo: plantas.append(nuevo); json.dump(plantas, open("plantas_config.json", 'w')); st.rerun()
+    if es_admin(): panel_rendimiento()
+if corrida_rerun is not None: corrida_rerun['nombre'] = planta_sel
+
+# Navegacion por secciones: solo corre (y carga datos para) la seccion abierta; cada una es un fragmento aislado.
+SECCIONES = ["📝 Fallas", "⚡ Mediciones", "📊 Informes", "🔍 Diagnóstico", "🌐 Flota"]
+seccion = st.radio("Sección", SECCIONES, horizontal=True, key="seccion", label_visibility="collapsed")
+if seccion == SECCIONES[0]: seccion_fallas(planta_sel)
+elif seccion == SECCIONES[1]: seccion_mediciones(planta_sel)
+elif seccion == SECCIONES[2]: seccion_informes(planta_sel)
+elif seccion == SECCIONES[3]: seccion_diagnostico(planta_sel)
+else: seccion_flota(plantas)
+
+locales = [v.df for v in versiones_rerun.values() if v.df.attrs.get('origen') == "local"]
+if locales: avisos.warning(f"⚠️ Sin conexión con Google Sheets: mostrando copia local ({locales[0].attrs.get('sincronizado')}).")
+invalidas = [v.errores for v in versiones_rerun.values() if v.errores is not None]
+if invalidas:
+    invalidas = pd.concat(invalidas, ignore_index=True)
+    with avisos.expander(f"⚠️ {len(invalidas)} celdas con datos inválidos en la planilla (revisar)"):
+        st.caption("Filas sin fecha válida quedan fuera del análisis; amperios no numéricos se toman como 0.")
+        st.dataframe(invalidas.head(500), use_container_width=True, hide_index=True)
+if 'primer_pintado' not in st.session_state:
+    # Primera pantalla completa de la sesion (imports + datos de la seccion abierta + graficos).
+    st.session_state.primer_pintado = round((time.perf_counter() - T_INICIO) * 1000, 1)
+    metricas.registrar_etapa("app.primer_pintado", st.session_state.primer_pintado, frio=ARRANQUE_FRIO, seccion=seccion)
+metricas.cerrar_corrida(corrida_rerun)
@@ -0,0 +1,96 @@
+# --- INDICE DE REINCIDENCIA (PLANTA x INVERSOR x CAJA x STRING x POLARIDAD) ---
+# Por posicion se guardan sus fechas de falla ordenadas: reincidencias, MTBF y top-K sin reescanear la tabla.
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+CLAVE = ['Planta', 'Inversor', 'Caja', 'String', 'Polaridad']
+_COLUMNAS = CLAVE[1:] + ['Fallas', 'Reincidencias', 'MTBF_dias', 'Ultima']
+_DIA = np.timedelta64(1, 'D')
+
+
+class IndiceReincidencia:
+    def __init__(self):
+        self.fuente = None  # weakref al frame de origen, como en RollupFallas
+        self._lock = threading.Lock()
+        self._fechas = {}   # planta -> {(inversor, caja, string, polaridad): datetime64[ns] ordenado}
+
+    def vigente_para(self, df):
+        return self.fuente is not None and self.fuente() is df
+
+    def asociar(self, df):
+        self.fuente = weakref.ref(df)
+
+    # --- CONSTRUCCION ---
+    def reconstruir(self, df):
+        with self._lock:
+            self._fechas = {}
+            if df.empty or not set(CLAVE + ['Fecha']).issubset(df.columns): return self
+            df = df.dropna(subset=['Fecha']).sort_values('Fecha', kind='stable')
+            fechas = df['Fecha'].to_numpy(dtype='datetime64[ns]')
+            # indices de cada grupo en orden de aparicion: ya quedan ordenados por fecha
+            for clave, pos in df.groupby(CLAVE, observed=True, sort=False).indices.items():
+                self._fechas.setdefault(clave[0], {})[tuple(clave[1:])] = fechas[pos]
+        return self
+
+    def agregar(self, registro, signo=1):
+        # Alta (signo=1) o baja (signo=-1) de una falla: insercion / borrado en el arreglo ordenado de su posicion.
+        planta = registro['Planta']; clave = tuple(registro[c] for c in CLAVE[1:])
+        fecha = np.datetime64(pd.Timestamp(registro['Fecha']), 'ns')
+        with self._lock:
+            posiciones = self._fechas.setdefault(planta, {})
+            f = posiciones.get(clave, np.array([], dtype='datetime64[ns]'))
+            i = int(np.searchsorted(f, fecha, side='left'))
+            if signo > 0: f = np.insert(f, int(np.searchsorted(f, fecha, side='right')), fecha)
+            elif i < len(f) and f[i] == fecha: f = np.delete(f, i)
+            if len(f): posiciones[clave] = f
+            else: posiciones.pop(clave, None)
+
+    def quitar(self, registro):
+        self.agregar(registro, signo=-1)
+
+    # --- CONSULTAS ---
+    @staticmethod
+    def _recorte(f, desde, hasta):
+        # [desde, hasta) por busqueda binaria
+        i = 0 if desde is None else int(np.searchsorted(f, np.datetime64(pd.Timestamp(desde), 'ns'), side='left'))
+        j = len(f) if hasta is None else int(np.searchsorted(f, np.datetime64(pd.Timestamp(hasta), 'ns'), side='left'))
+        return f[i:j]
+
+    def fechas(self, planta, inversor, caja, string, polaridad, desde=None, hasta=None):
+        f = self._fechas.get(planta, {}).get((inversor, caja, string, polaridad))
+        return self._recorte(f, desde, hasta) if f is not None else np.array([], dtype='datetime64[ns]')
+
+    def mtbf(self, planta, inversor, caja, string, polaridad, desde=None, hasta=None):
+        # Dias promedio entre fallas consecutivas; NaN con menos de dos fallas.
+        f = self.fechas(planta, inversor, caja, string, polaridad, desde, hasta)
+        return float((f[-1] - f[0]) / _DIA / (len(f) - 1)) if len(f) > 1 else float('nan')
+
+    def resumen(self, planta, desde=None, hasta=None, dias=30):
+        # Una fila por posicion con fallas en el periodo. Reincidencias: fallas a <= `dias` de la anterior.
+        posiciones = self._fechas.get(planta, {})
+        if not posiciones: return pd.DataFrame(columns=_COLUMNAS)
+        claves = list(posiciones); arreglos = list(posiciones.values())
+        # Todas las posiciones concatenadas (cada una sigue ordenada) y el grupo de cada fecha: consulta vectorizada
+        f = np.concatenate(arreglos); g = np.repeat(np.arange(len(claves)), [len(a) for a in arreglos])
+        dentro = np.ones(len(f), dtype=bool)
+        if desde is not None: dentro &= f >= np.datetime64(pd.Timestamp(desde), 'ns')
+        if hasta is not None: dentro &= f < np.datetime64(pd.Timestamp(hasta), 'ns')
+        f, g = f[dentro], g[dentro]
+        n = np.bincount(g, minlength=len(claves))
+        mismo = g[1:] == g[:-1]; brechas = np.diff(f)
+        reinc = np.bincount(g[1:][mismo & (brechas <= np.timedelta64(int(dias), 'D'))], minlength=len(claves))
+        con = np.flatnonzero(n); fin = np.cumsum(n)[con] - 1; ini = fin - n[con] + 1
+        span = (f[fin] - f[ini]) / _DIA
+        r = pd.DataFrame([claves[i] for i in con], columns=CLAVE[1:])
+        r['Fallas'] = n[con]; r['Reincidencias'] = reinc[con]
+        r['MTBF_dias'] = np.where(n[con] > 1, span / np.maximum(n[con] - 1, 1), np.nan); r['Ultima'] = f[fin]
+        return r
+
+    def top(self, planta, k=10, desde=None, hasta=None, dias=30, minimo=2):
+        # Peores posiciones: mas fallas, luego mas reincidencias, luego la falla mas reciente. k=None: todas.
+        r = self.resumen(planta, desde, hasta, dias)
+        r = r[r['Fallas'] >= minimo].sort_values(['Fallas', 'Reincidencias', 'Ultima'], ascending=False, ignore_index=True)
+        return r if k is None else r.head(k)
@@ -0,0 +1,75 @@
+# --- RENDER DE GRAFICOS (KALEIDO) EN PARALELO CON CACHE POR CONTENIDO ---
+# Se mantiene un pequeño pool de procesos kaleido vivos; los PNG se guardan por hash de la figura.
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cache_disco
+from metricas import etapa
+
+DIR_CACHE = os.environ.get("PMGD_CACHE_GRAFICOS", ".cache_graficos")
+MAX_CACHE_MB = float(os.environ.get("PMGD_CACHE_GRAFICOS_MB", "200"))
+TRABAJADORES = int(os.environ.get("PMGD_TRABAJADORES_RENDER", "2"))
+
+_pool = None
+_scopes = queue.Queue()
+_lock_pool = threading.Lock()
+
+
+def _nuevo_scope():
+    # Cada PlotlyScope levanta su propio proceso de chromium y lo reutiliza entre llamadas.
+    try:
+        import plotly
+        from kaleido.scopes.plotly import PlotlyScope
+    except ImportError: return None
+    # Igual que plotly.io: usar el plotly.js empaquetado en vez del CDN.
+    js = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+    return PlotlyScope(plotlyjs=js) if os.path.exists(js) else PlotlyScope()
+
+
+def _render(spec_json, opciones):
+    scope = _scopes.get()
+    try:
+        if scope is None:
+            import plotly.io as pio
+            return pio.to_image(pio.from_json(spec_json), format="png", **opciones)
+        return scope.transform(json.loads(spec_json), format="png", **opciones)
+    finally: _scopes.put(scope)
+
+
+def _obtener_pool():
+    # Los hilos solo esperan a kaleido (otro proceso), asi que no compiten por el GIL.
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            for _ in range(TRABAJADORES): _scopes.put(_nuevo_scope())
+            _pool = ThreadPoolExecutor(max_workers=TRABAJADORES, thread_name_prefix="kaleido")
+        return _pool
+
+
+# --- CACHE EN DISCO (cache_disco) ---
+def clave_figura(spec_json, opciones):
+    return cache_disco.clave(spec_json, json.dumps(opciones, sort_keys=True))
+
+
+# --- API ---
+def renderizar_figuras(figuras, **opciones):
+    specs = [f.to_json() for f in figuras]
+    claves = [clave_figura(s, opciones) for s in specs]
+    pngs = [cache_disco.leer(DIR_CACHE, c, ".png") for c in claves]
+    pendientes = [i for i, p in enumerate(pngs) if p is None]
+    with etapa("graficos.render", figuras=len(figuras), cacheadas=len(figuras) - len(pendientes)) as e:
+        if pendientes:
+            pool = _obtener_pool()
+            futuros = {i: pool.submit(_render, specs[i], opciones) for i in pendientes}
+            for i, fut in futuros.items():
+                pngs[i] = fut.result()
+                cache_disco.escribir(DIR_CACHE, claves[i], pngs[i], ".png", MAX_CACHE_MB)
+        if e: e.anotar(bytes=sum(len(p) for p in pngs))
+    return pngs
+
+
+def renderizar_figura(figura, **opciones):
+    return renderizar_figuras([figura], **opciones)[0]
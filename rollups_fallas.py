@@ -0,0 +1,102 @@
+# --- ROLLUPS DE FALLAS (PLANTA x INVERSOR x CAJA x DIA / MES) ---
+# Conteo y suma de amperios por grupo, ordenados por fecha para consultar rangos con searchsorted. La perdida en USD
+# sale de perdidas.MotorPerdidas (depende de la ventana fuera de servicio, no solo de los amperios).
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from esquemas import concatenar
+
+DIMENSIONES = ['Inversor', 'Caja', 'Polaridad']
+_COLUMNAS = ['Dia'] + DIMENSIONES + ['Fallas', 'Amperios']
+
+
+def _vacia():
+    # Mismos tipos que deja reconstruir, para que altas y consultas sobre una planta sin fallas no caigan a object
+    return pd.DataFrame({'Dia': pd.Series(dtype='datetime64[ns]'), **{d: pd.Series(dtype='category') for d in DIMENSIONES},
+                         'Fallas': pd.Series(dtype='int64'), 'Amperios': pd.Series(dtype='float32')})
+
+
+class RollupFallas:
+    def __init__(self):
+        self.fuente = None  # weakref al frame de origen, para saber si hay que reconstruir
+        self._lock = threading.Lock()
+        self._dia = {}    # planta -> DataFrame ordenado por Dia
+        self._mes = {}    # planta -> DataFrame ordenado por Dia (primer dia del mes)
+
+    def vigente_para(self, df):
+        return self.fuente is not None and self.fuente() is df
+
+    def asociar(self, df):
+        self.fuente = weakref.ref(df)
+
+    # --- CONSTRUCCION ---
+    def _agrupar(self, df, dia):
+        g = df.assign(Dia=dia).groupby(['Planta', 'Dia'] + DIMENSIONES, observed=True, sort=True)
+        r = g.agg(Fallas=('Amperios', 'size'), Amperios=('Amperios', 'sum')).reset_index()
+        return {p: t.drop(columns='Planta').reset_index(drop=True) for p, t in r.groupby('Planta', observed=True, sort=False)}
+
+    def reconstruir(self, df):
+        with self._lock:
+            if df.empty or 'Fecha' not in df.columns: self._dia, self._mes = {}, {}; return self
+            df = df.dropna(subset=['Fecha'])
+            self._dia = self._agrupar(df, df['Fecha'].dt.normalize())
+            self._mes = self._agrupar(df, df['Fecha'].dt.to_period('M').dt.to_timestamp())
+        return self
+
+    def _aplicar(self, tablas, planta, dia, registro, signo):
+        t = tablas.get(planta)
+        if t is None: t = _vacia()
+        clave = (t['Dia'] == dia)
+        for d in DIMENSIONES: clave &= (t[d] == registro[d])
+        amp = float(registro['Amperios']) * signo
+        if clave.any():
+            i = clave.idxmax()
+            t.loc[i, 'Fallas'] += signo; t.loc[i, 'Amperios'] = np.float32(t.loc[i, 'Amperios'] + amp)
+            if t.loc[i, 'Fallas'] <= 0: t = t.drop(index=i)
+        elif signo > 0:
+            fila = {'Dia': dia, **{d: registro[d] for d in DIMENSIONES}, 'Fallas': 1, 'Amperios': amp}
+            pos = int(np.searchsorted(t['Dia'].values, np.datetime64(dia), side='right')) if len(t) else 0
+            t = concatenar([t.iloc[:pos], pd.DataFrame([fila]).astype({'Amperios': 'float32'}), t.iloc[pos:]])
+        tablas[planta] = t.reset_index(drop=True)
+
+    def agregar(self, registro, signo=1):
+        # Mantiene ambos rollups al guardar (signo=1) o borrar (signo=-1) una falla.
+        fecha = pd.Timestamp(registro['Fecha'])
+        with self._lock:
+            self._aplicar(self._dia, registro['Planta'], fecha.normalize(), registro, signo)
+            self._aplicar(self._mes, registro['Planta'], fecha.to_period('M').to_timestamp(), registro, signo)
+
+    def quitar(self, registro):
+        self.agregar(registro, signo=-1)
+
+    # --- CONSULTAS ---
+    def plantas(self):
+        return list(self._dia)
+
+    def rango(self, planta, desde=None, hasta=None, mensual=False):
+        # [desde, hasta) sobre la tabla ordenada: busqueda binaria, sin escanear el historial.
+        t = (self._mes if mensual else self._dia).get(planta)
+        if t is None or t.empty: return _vacia()
+        dias = t['Dia'].values
+        i = 0 if desde is None else int(np.searchsorted(dias, np.datetime64(pd.Timestamp(desde)), side='left'))
+        j = len(t) if hasta is None else int(np.searchsorted(dias, np.datetime64(pd.Timestamp(hasta)), side='left'))
+        return t.iloc[i:j]
+
+    def kpis(self, planta, desde=None, hasta=None, mensual=False):
+        r = self.rango(planta, desde, hasta, mensual)
+        total = int(r['Fallas'].sum())
+        kpis = {'total': total, 'promedio': f"{r['Amperios'].sum() / total:.1f} A" if total else "-",
+                'critico': "-", 'repes': 0}
+        if total:
+            por_equipo = self.por_equipo(r)
+            kpis['critico'] = por_equipo.idxmax(); kpis['repes'] = int(por_equipo.max())
+        return kpis
+
+    @staticmethod
+    def por_equipo(r):
+        g = r.groupby(['Inversor', 'Caja'], observed=True, sort=False)['Fallas'].sum()
+        g.index = [f"{i} > {c}" for i, c in g.index]
+        return g
@@ -0,0 +1,5 @@
+# --- PRUEBAS: los modulos de la app viven en la raiz del repositorio ---
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
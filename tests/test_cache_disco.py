@@ -0,0 +1,35 @@
+# --- CACHE EN DISCO: CLAVES, ESCRITURA ATOMICA Y EXPULSION LRU ---
+import hashlib
+import os
+
+import cache_disco
+
+
+def test_clave_igual_a_sha256_de_las_partes_concatenadas():
+    # Mismas claves que antes de compartir el modulo: las caches existentes siguen sirviendo
+    assert cache_disco.clave("{}", b"\x00\x01") == hashlib.sha256(b"{}\x00\x01").hexdigest()
+
+
+def test_escribir_y_leer(tmp_path):
+    directorio = str(tmp_path / "sub")
+    assert cache_disco.leer(directorio, "k", ".png") is None
+    cache_disco.escribir(directorio, "k", b"datos", ".png", 1)
+    assert cache_disco.leer(directorio, "k", ".png") == b"datos"
+    assert os.listdir(directorio) == ["k.png"]  # sin temporales
+
+
+def test_podar_expulsa_lo_usado_hace_mas_tiempo(tmp_path):
+    directorio = str(tmp_path)
+    for i, k in enumerate("abc"):
+        cache_disco.escribir(directorio, k, b"x" * 400_000, ".jpg", 10)
+        os.utime(cache_disco.ruta(directorio, k, ".jpg"), (1000 + i, 1000 + i))
+    cache_disco.leer(directorio, "a", ".jpg")  # uso reciente: sobrevive
+    (tmp_path / "otro.png").write_bytes(b"y" * 2_000_000)  # otro sufijo: no cuenta
+    cache_disco.podar(directorio, 1, ".jpg")
+    assert sorted(os.listdir(directorio)) == ["a.jpg", "c.jpg", "otro.png"]
+
+
+def test_sin_disco_sigue_sin_cache(tmp_path):
+    archivo = tmp_path / "no_es_directorio"; archivo.write_bytes(b"")
+    cache_disco.escribir(str(archivo), "k", b"datos", ".png", 1)
+    assert cache_disco.leer(str(archivo), "k", ".png") is None
@@ -0,0 +1,78 @@
+# --- CAMPAÑAS: CORTE POR BRECHA E INDICE INCREMENTAL CONTRA RECONSTRUCCION ---
+import numpy as np
+import pandas as pd
+import pytest
+
+from campanas import BRECHA_DIAS, IndiceCampanas, IndicesPorVersion, agrupar_fechas
+
+
+def _mediciones(fechas, planta="P1", semilla=0):
+    rng = np.random.default_rng(semilla)
+    filas = [{'Fecha': pd.Timestamp(f), 'Planta': planta, 'Equipo': f"Inv-{i}>CB-1", 'String ID': f"Str-{s}",
+              'Amperios': 0.0 if rng.random() < 0.1 else round(float(rng.uniform(5, 7)), 2)}
+             for f in fechas for i in (1, 2) for s in range(1, 7)]
+    return pd.DataFrame(filas).astype({'Planta': 'category', 'Amperios': 'float32'})
+
+
+def _igual(a, b):
+    assert a._ventanas == b._ventanas
+    assert a.cajas.keys() == b.cajas.keys() == a.strings.keys()
+    for c in a.cajas:
+        pd.testing.assert_frame_equal(a.cajas[c], b.cajas[c])
+        pd.testing.assert_series_equal(a.strings[c], b.strings[c])
+
+
+@pytest.mark.parametrize("dias, ventanas", [
+    (BRECHA_DIAS, 1),          # brecha justo en el limite: misma campaña
+    (BRECHA_DIAS + 1, 2),      # un dia mas: campaña nueva
+])
+def test_corte_en_la_brecha(dias, ventanas):
+    inicio = pd.Timestamp("2025-03-01")
+    assert len(agrupar_fechas([inicio, inicio + pd.Timedelta(days=dias)])) == ventanas
+
+
+def test_agrupar_fechas():
+    f = pd.to_datetime(["2025-01-01", "2025-01-02", "2025-03-01", "2025-03-10", "2025-06-01"])
+    assert agrupar_fechas(f) == [(f[0], f[1]), (f[2], f[3]), (f[4], f[4])]
+    assert agrupar_fechas([]) == []
+
+
+def test_incremental_igual_a_reconstruir():
+    # Lotes que abren campañas nuevas, extienden la ultima y la unen con la anterior (fecha puente).
+    lotes = [["2025-01-01", "2025-01-02"], ["2025-03-01"], ["2025-01-10"], ["2025-01-16", "2025-01-31"], ["2025-02-15"], ["2025-06-01", "2025-06-05"]]
+    df = pd.DataFrame(); incremental = IndiceCampanas()
+    for n, lote in enumerate(lotes):
+        df = pd.concat([df, _mediciones(lote, semilla=n), _mediciones(lote, planta="P2", semilla=n + 10)], ignore_index=True)
+        df = df.astype({'Planta': 'category'})
+        incremental.actualizar(df)
+        completo = IndiceCampanas(); completo.actualizar(df)
+        _igual(incremental, completo)
+    assert [c['etiqueta'] for c in incremental.campanas("P1")] == ["01/06/2025 - 05/06/2025", "01/01/2025 - 01/03/2025"]
+
+
+def test_recarga_mas_corta_reconstruye():
+    indice = IndiceCampanas(); df = _mediciones(["2025-01-01", "2025-05-01"])
+    indice.actualizar(df)
+    corta = df[df['Fecha'] == "2025-05-01"].reset_index(drop=True)
+    indice.actualizar(corta)
+    completo = IndiceCampanas(); completo.actualizar(corta)
+    _igual(indice, completo)
+
+
+def test_version_derivada_no_toca_la_anterior():
+    df = _mediciones(["2025-01-01"])
+    versiones = IndicesPorVersion()
+    v1 = versiones.obtener(1, df, linaje="a")
+    v2 = versiones.obtener(2, pd.concat([df, _mediciones(["2025-04-01"], semilla=3)], ignore_index=True), linaje="a")
+    assert len(v1.campanas("P1")) == 1 and len(v2.campanas("P1")) == 2
+    assert versiones.obtener(1, df, linaje="a") is v1
+
+
+def test_tendencia_contra_campana_anterior():
+    df = pd.concat([_mediciones(["2025-01-01"]), _mediciones(["2025-04-01"], semilla=1)], ignore_index=True)
+    indice = IndiceCampanas(); indice.actualizar(df)
+    ultima, primera = (c['id'] for c in indice.campanas("P1"))
+    t = indice.tendencia_strings(ultima).set_index(['Equipo', 'String ID'])
+    np.testing.assert_allclose(t['Anterior'], indice.strings[primera].reindex(t.index), rtol=1e-6)
+    np.testing.assert_allclose(t['Deriva_A'], t['Actual'] - t['Anterior'], rtol=1e-6)
+    assert indice.tendencia_strings(primera).empty
@@ -0,0 +1,117 @@
+# --- COLA DE ESCRITURA: ENVIO, BAJAS SOBRE FILAS ANTIGUAS Y OPERACIONES APARCADAS ---
+import pytest
+
+import cola_escritura
+from cola_escritura import ColaEscritura
+from espejo_local import EspejoLocal
+from herramientas.hoja_local import HojaLocal, LibroLocal
+
+ENCABEZADO = ['Fecha', 'Planta', 'Inversor', 'Caja', 'String', 'Polaridad', 'Amperios', 'Nota']
+
+
+def _fila(n, nota=""):
+    return ['01/03/2025', 'Planta 1', '1', str(n), '1', '+', '0', nota]
+
+
+@pytest.fixture
+def hoja():
+    # Hoja antigua: sin columna ID y con dos filas identicas (caja 2)
+    hoja = HojaLocal(ENCABEZADO, [_fila(1), _fila(2), _fila(2), _fila(3)])
+    LibroLocal([hoja])
+    return hoja
+
+
+@pytest.fixture
+def cola(hoja, tmp_path):
+    ruta = str(tmp_path / "espejo.db"); espejo = EspejoLocal(ruta)
+    espejo.sincronizar("Sheet1", hoja)
+    return ColaEscritura(espejo, lambda nombre: hoja, ruta, automatico=False)
+
+
+def _cajas(hoja):
+    return [f[3] for f in hoja.get_values()[1:]]
+
+
+def test_alta_visible_antes_de_enviar_y_escrita_despues(hoja, cola):
+    [nuevo] = cola.encolar_inserciones("Sheet1", [dict(zip(ENCABEZADO, _fila(9)))])
+    vista = cola.superponer("Sheet1", cola.espejo.dataframe("Sheet1"))
+    assert nuevo in set(vista['ID']) and len(hoja.get_values()) == 5
+    cola.vaciar()
+    assert _cajas(hoja)[-1] == "9" and nuevo in set(cola.espejo.dataframe("Sheet1")['ID'])
+    assert cola.cantidad_pendiente() == 0
+
+
+def test_baja_de_fila_antigua_tras_agregar_columnas(hoja, cola):
+    ids = list(cola.espejo.dataframe("Sheet1")['ID'])
+    victima = ids[2]  # la segunda de las filas identicas
+    hoja.update_cell(1, len(ENCABEZADO) + 1, 'Reparacion')  # otra app agrego una columna entretanto
+    cola.encolar_borrado("Sheet1", victima)
+    cola.vaciar()
+    assert _cajas(hoja) == ["1", "2", "3"]
+    assert list(cola.espejo.dataframe("Sheet1")['ID']) == [ids[0], ids[1], ids[3]]
+
+
+def test_ids_fijados_en_la_hoja_resisten_ediciones(hoja, cola):
+    ids = list(cola.espejo.dataframe("Sheet1")['ID'])
+    cola.encolar_inserciones("Sheet1", [dict(zip(ENCABEZADO, _fila(9)))]); cola.vaciar()
+    encabezado = hoja.get_values()[0]
+    assert 'ID' in encabezado and [f[encabezado.index('ID')] for f in hoja.get_values()[1:5]] == ids
+    # Con el ID escrito, editar el contenido de la fila ya no cambia su ID
+    hoja.update_cell(5, encabezado.index('Nota') + 1, "editada")
+    cola.espejo.pedir_recarga(["Sheet1"])
+    cola.encolar_borrado("Sheet1", ids[3]); cola.vaciar()
+    assert _cajas(hoja) == ["1", "2", "2", "9"]
+
+
+def test_cambio_de_celdas_por_id(hoja, cola):
+    victima = list(cola.espejo.dataframe("Sheet1")['ID'])[0]
+    cola.encolar_actualizacion("Sheet1", victima, {'Reparacion': "05/03/2025"})
+    vista = cola.superponer("Sheet1", cola.espejo.dataframe("Sheet1"))
+    assert vista.set_index('ID').loc[victima, 'Reparacion'] == "05/03/2025"
+    cola.vaciar()
+    encabezado = hoja.get_values()[0]
+    assert hoja.get_values()[1][encabezado.index('Reparacion')] == "05/03/2025"
+    assert cola.espejo.dataframe("Sheet1").set_index('ID').loc[victima, 'Reparacion'] == "05/03/2025"
+
+
+def test_envio_fallido_se_anota_y_se_aparca(hoja, cola, monkeypatch):
+    monkeypatch.setattr(cola_escritura, "MAX_INTENTOS", 2)
+    def caida(nombre): raise ConnectionError("sin red")
+    cola.abrir_hoja = caida
+    [nuevo] = cola.encolar_inserciones("Sheet1", [dict(zip(ENCABEZADO, _fila(9)))])
+    for _ in range(2):
+        with pytest.raises(ConnectionError): cola.vaciar()
+    error, intentos, estado = cola._con.execute("SELECT error, intentos, estado FROM pendientes").fetchone()
+    assert (error, intentos, estado) == ("ConnectionError: sin red", 2, "fallido")
+    assert cola.cantidad_pendiente() == 0 and cola.cantidad_fallida() == 1
+    assert cola.vaciar() == 0  # aparcada: no se reintenta sola
+    assert nuevo in set(cola.superponer("Sheet1", cola.espejo.dataframe("Sheet1"))['ID'])
+    cola.abrir_hoja = lambda nombre: hoja
+    cola.reintentar_fallidos(); cola.vaciar()
+    assert cola.cantidad_fallida() == 0 and _cajas(hoja)[-1] == "9"
+
+
+@pytest.mark.parametrize("maximo", [1, 3])
+def test_pasa_a_fallido_al_llegar_a_max_intentos(hoja, cola, monkeypatch, maximo):
+    monkeypatch.setattr(cola_escritura, "MAX_INTENTOS", maximo)
+    def lenta(nombre): raise TimeoutError("lenta")
+    cola.abrir_hoja = lenta
+    cola.encolar_inserciones("Sheet1", [dict(zip(ENCABEZADO, _fila(9)))])
+    cola.encolar_borrado("Sheet1", list(cola.espejo.dataframe("Sheet1")['ID'])[0])
+    for intento in range(1, maximo + 1):
+        with pytest.raises(TimeoutError): cola.vaciar()
+        estados = cola._con.execute("SELECT operacion, intentos, estado FROM pendientes ORDER BY id").fetchall()
+        estado = "fallido" if intento == maximo else "pendiente"
+        assert estados == [("insertar", intento, estado), ("borrar", intento, estado)]
+    assert cola.vaciar() == 0 and cola.cantidad_fallida() == 2
+
+
+def test_borrar_un_alta_pendiente_la_anula_sin_tocar_google(hoja, cola):
+    antes = hoja.get_values()
+    [nuevo] = cola.encolar_inserciones("Sheet1", [dict(zip(ENCABEZADO, _fila(9)))])
+    cola.encolar_actualizacion("Sheet1", nuevo, {'Nota': "revisar"})
+    cola.encolar_borrado("Sheet1", nuevo)
+    assert cola._con.execute("SELECT COUNT(*) FROM pendientes").fetchone()[0] == 0
+    assert nuevo not in set(cola.superponer("Sheet1", cola.espejo.dataframe("Sheet1"))['ID'])
+    cola.abrir_hoja = lambda nombre: pytest.fail("no deberia abrir la hoja")
+    assert cola.vaciar() == 0 and hoja.get_values() == antes
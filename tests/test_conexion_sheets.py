@@ -0,0 +1,77 @@
+# --- GESTOR DE CONEXION: UNA AUTORIZACION, REINTENTO ANTE 401 Y LECTURAS EN PARALELO ---
+import time
+
+import pytest
+
+from conexion_sheets import GestorConexion
+from herramientas.hoja_local import ClienteLocal, HojaLocal, LibroLocal
+
+LATENCIA = 0.2
+
+
+class _Respuesta:
+    def __init__(self, status_code): self.status_code = status_code
+
+
+class ErrorApi(Exception):
+    # Como gspread.exceptions.APIError: trae la respuesta HTTP
+    def __init__(self, status_code): super().__init__(f"HTTP {status_code}"); self.response = _Respuesta(status_code)
+
+
+@pytest.fixture
+def autorizaciones():
+    return []
+
+
+@pytest.fixture
+def gestor(autorizaciones):
+    def autorizar(creds):
+        hojas = [HojaLocal(['A'], [[1], [2]], titulo=t, latencia=LATENCIA) for t in ("Sheet1", "DB_MEDICIONES", "Otra")]
+        cliente = ClienteLocal([LibroLocal(hojas)]); autorizaciones.append(cliente)
+        return cliente
+    return GestorConexion(lambda: "llaves", autorizar, "DB_FUSIBLES")
+
+
+def test_autoriza_una_vez_y_reutiliza_las_hojas(gestor, autorizaciones):
+    assert gestor.hoja("Sheet1") is gestor.hoja("Sheet1")
+    gestor.ejecutar("DB_MEDICIONES", lambda hoja: hoja.get_values())
+    assert len(autorizaciones) == 1 and autorizaciones[0].timeout == gestor.timeout
+
+
+def test_reintenta_una_vez_ante_401(gestor, autorizaciones):
+    vistas = []
+    def leer(hoja):
+        vistas.append(hoja)
+        if len(vistas) == 1: raise ErrorApi(401)
+        return hoja.get_values()
+    assert gestor.ejecutar("Sheet1", leer) == [['A'], ['1'], ['2']]
+    assert len(autorizaciones) == 2 and vistas[0] is not vistas[1]  # handle nuevo del cliente re-autorizado
+
+
+def test_otros_errores_no_reautorizan(gestor, autorizaciones):
+    def leer(hoja): raise ErrorApi(500)
+    with pytest.raises(ErrorApi): gestor.ejecutar("Sheet1", leer)
+    assert len(autorizaciones) == 1
+
+
+def test_401_repetido_se_propaga(gestor, autorizaciones):
+    def leer(hoja): raise ErrorApi(401)
+    with pytest.raises(ErrorApi): gestor.ejecutar("Sheet1", leer)
+    assert len(autorizaciones) == 2
+
+
+def test_en_paralelo_cuesta_lo_de_la_hoja_mas_lenta(gestor, autorizaciones):
+    nombres = ["Sheet1", "DB_MEDICIONES", "Otra"]
+    t0 = time.perf_counter()
+    resultados = gestor.en_paralelo(nombres, lambda nombre, hoja: (nombre, hoja.title, len(hoja.get_values())))
+    transcurrido = time.perf_counter() - t0
+    assert resultados == {n: (n, n, 3) for n in nombres}
+    assert transcurrido < LATENCIA * len(nombres) * 0.8 and len(autorizaciones) == 1
+
+
+def test_en_paralelo_devuelve_el_error_de_cada_hoja(gestor):
+    def leer(nombre, hoja):
+        if nombre == "Otra": raise ErrorApi(500)
+        return hoja.get_values()
+    resultados = gestor.en_paralelo(["Sheet1", "Otra"], leer)
+    assert resultados["Sheet1"] == [['A'], ['1'], ['2']] and isinstance(resultados["Otra"], ErrorApi)
@@ -0,0 +1,79 @@
+# --- DATOS COMPARTIDOS: VERSIONES, VISTAS DE SOLO LECTURA Y ESCRITURAS SERIALIZADAS ---
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datos_compartidos import DatosCompartidos, vista
+
+
+def _frame():
+    return pd.DataFrame({'Fecha': pd.to_datetime(["2025-01-01", "2025-01-02", None]), 'Planta': pd.Categorical(["A", "B", "A"]),
+                         'Amperios': np.array([1.0, 2.0, 3.0], dtype=np.float32), 'ID': ["a", "b", "c"],
+                         'Fecha_Local': pd.to_datetime(["2025-01-01", "2025-01-02", "2025-01-03"]).tz_localize("America/Santiago"),
+                         'Cantidad': pd.array([1, None, 3], dtype="Int64")})
+
+
+@pytest.fixture
+def version():
+    return DatosCompartidos().obtener("Sheet1", lambda: (_frame(), []))
+
+
+@pytest.mark.parametrize("escribir", [
+    lambda df: df.loc.__setitem__((0, 'Amperios'), 9.0),
+    lambda df: df.loc.__setitem__((df['Amperios'] > 1, 'Amperios'), 0.0),
+    lambda df: df.iloc.__setitem__((0, 2), 9.0),
+    lambda df: df.at.__setitem__((1, 'ID'), "z"),
+    lambda df: df.loc.__setitem__((0, 'Planta'), "B"),
+    lambda df: df['Amperios'].values.__setitem__(0, 9.0),
+    lambda df: df['Cantidad'].array.__setitem__(0, 9),
+    lambda df: df.replace({'ID': {"a": "z"}}, inplace=True),
+], ids=["loc", "loc_mascara", "iloc", "at", "categoria", "values", "nulable", "replace_inplace"])
+def test_escribir_en_sitio_sobre_una_vista_falla(version, escribir):
+    df = vista(version)
+    with pytest.raises((ValueError, TypeError)): escribir(df)
+    pd.testing.assert_frame_equal(version.df, _frame())
+
+
+def test_fechas_tampoco_se_escriben(version):
+    df = vista(version)
+    with pytest.raises(Exception): df.loc[0, 'Fecha'] = pd.Timestamp("2020-01-01")
+    assert version.df.loc[0, 'Fecha'] == pd.Timestamp("2025-01-01")
+
+
+def test_columnas_nuevas_o_reemplazadas_solo_cambian_la_vista(version):
+    df = vista(version)
+    df['Amperios'] = df['Amperios'] * 2; df['Extra'] = 1
+    otra = df.assign(ID="x")
+    assert list(version.df.columns) == list(_frame().columns) and list(version.df['Amperios']) == [1.0, 2.0, 3.0]
+    assert list(otra['ID']) == ["x"] * 3 and list(df['Amperios']) == [2.0, 4.0, 6.0]
+    df.loc[0, 'Amperios'] = 0.0  # columna reemplazada: ya es de la sesion
+    assert version.df.loc[0, 'Amperios'] == 1.0
+
+
+def test_actualizar_publica_y_congela_la_version_nueva():
+    datos = DatosCompartidos(); datos.obtener("Sheet1", lambda: (_frame(), []))
+    anterior, nueva = datos.actualizar("Sheet1", lambda v: pd.concat([v.df, _frame().iloc[:1]], ignore_index=True), lambda: (_frame(), []))
+    assert nueva.numero > anterior.numero and len(nueva.df) == 4 and datos.vigente("Sheet1") is nueva
+    assert nueva.creado == anterior.creado  # el linaje sigue: la recarga por TTL no se adelanta
+    df = vista(nueva)
+    with pytest.raises(ValueError): df.loc[3, 'Amperios'] = 0.0
+
+
+def test_actualizar_tras_invalidar_carga_primero():
+    datos = DatosCompartidos(); cargas = []
+    def cargar(): cargas.append(1); return _frame(), []
+    datos.obtener("Sheet1", cargar); datos.invalidar()
+    _, nueva = datos.actualizar("Sheet1", lambda v: v.df.iloc[:2], cargar)
+    assert len(cargas) == 2 and len(nueva.df) == 2
+
+
+def test_una_sola_carga_para_sesiones_concurrentes():
+    datos = DatosCompartidos(); cargas = []; inicio = threading.Barrier(6)
+    def cargar(): cargas.append(1); return _frame(), []
+    def sesion(): inicio.wait(); datos.obtener("Sheet1", cargar)
+    hilos = [threading.Thread(target=sesion) for _ in range(6)]
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    assert len(cargas) == 1
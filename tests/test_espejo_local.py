@@ -0,0 +1,80 @@
+# --- ESPEJO LOCAL: DELTA, ANCLA Y RECARGA COMPLETA CONTRA UNA HOJA EN MEMORIA ---
+import pytest
+
+import espejo_local
+from espejo_local import EspejoLocal
+from herramientas.hoja_local import HojaLocal
+
+ENCABEZADO = ['Fecha', 'Planta', 'Inversor', 'Caja', 'String', 'Polaridad', 'Amperios', 'Nota', 'ID']
+
+
+def _fila(n, nota=""):
+    return ['01/03/2025', 'Planta 1', '1', str(n), '1', '+', '0', nota, f"id{n}"]
+
+
+@pytest.fixture
+def hoja():
+    return HojaLocal(ENCABEZADO, [_fila(n) for n in range(1, 6)])
+
+
+@pytest.fixture
+def espejo(tmp_path):
+    return EspejoLocal(str(tmp_path / "espejo.db"))
+
+
+def test_primera_sincronizacion_copia_todo(hoja, espejo):
+    assert espejo.sincronizar("Sheet1", hoja) == 5
+    df = espejo.dataframe("Sheet1")
+    assert list(df['ID']) == [f"id{n}" for n in range(1, 6)] and espejo.marca("Sheet1") == 5
+
+
+def test_delta_trae_solo_las_filas_nuevas(hoja, espejo):
+    espejo.sincronizar("Sheet1", hoja)
+    hoja.append_rows([_fila(6), _fila(7)])
+    assert espejo.sincronizar("Sheet1", hoja) == 2
+    assert list(espejo.dataframe("Sheet1")['ID'])[-2:] == ["id6", "id7"]
+
+
+def test_edicion_de_fila_anterior_llega_con_la_recarga_pedida(hoja, espejo):
+    espejo.sincronizar("Sheet1", hoja)
+    hoja.update_cell(3, ENCABEZADO.index('Nota') + 1, "reparada")  # fila 3 = id2, lejos del ancla
+    espejo.sincronizar("Sheet1", hoja)
+    assert espejo.dataframe("Sheet1").set_index('ID').loc["id2", 'Nota'] == ""  # el delta no la ve
+    espejo.pedir_recarga(["Sheet1"])
+    assert espejo.sincronizar("Sheet1", hoja) == 5
+    assert espejo.dataframe("Sheet1").set_index('ID').loc["id2", 'Nota'] == "reparada"
+    # La recarga pedida se consume: la siguiente vuelve a ser delta
+    hoja.append_row(_fila(6))
+    assert espejo.sincronizar("Sheet1", hoja) == 1
+
+
+def test_edicion_de_fila_anterior_llega_al_vencer_la_recarga(hoja, espejo, monkeypatch):
+    espejo.sincronizar("Sheet1", hoja)
+    hoja.update_cell(2, ENCABEZADO.index('Nota') + 1, "editada")
+    monkeypatch.setattr(espejo_local, "RECARGA_CADA", 0)
+    espejo.sincronizar("Sheet1", hoja)
+    assert espejo.dataframe("Sheet1").set_index('ID').loc["id1", 'Nota'] == "editada"
+
+
+def test_ancla_cambiada_recarga_completo(hoja, espejo):
+    espejo.sincronizar("Sheet1", hoja)
+    hoja.delete_rows(2)  # alguien borro una fila arriba: la ultima fila conocida se corre
+    assert espejo.sincronizar("Sheet1", hoja) == 4
+    assert list(espejo.dataframe("Sheet1")['ID']) == [f"id{n}" for n in range(2, 6)]
+
+
+def test_borrado_replicado_mantiene_el_delta(hoja, espejo):
+    espejo.sincronizar("Sheet1", hoja)
+    hoja.delete_rows(3); espejo.borrar_fila("Sheet1", 3)
+    hoja.append_row(_fila(6))
+    assert espejo.sincronizar("Sheet1", hoja) == 1
+    assert list(espejo.dataframe("Sheet1")['ID']) == ["id1", "id3", "id4", "id5", "id6"]
+
+
+def test_filas_antiguas_sin_id_no_cambian_al_agregar_columnas(espejo):
+    hoja = HojaLocal(ENCABEZADO[:-1], [_fila(n)[:-1] for n in range(1, 4)])
+    espejo.sincronizar("Sheet1", hoja)
+    antes = list(espejo.dataframe("Sheet1")['ID'])
+    hoja.update_cell(1, len(ENCABEZADO), 'Reparacion')
+    espejo.pedir_recarga(["Sheet1"]); espejo.sincronizar("Sheet1", hoja)
+    assert list(espejo.dataframe("Sheet1")['ID']) == antes and len(set(antes)) == 3
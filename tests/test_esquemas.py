@@ -0,0 +1,62 @@
+# --- ESQUEMAS: TIPOS DECLARADOS Y FRAME DE ERRORES ---
+import numpy as np
+import pandas as pd
+
+from esquemas import COLUMNAS_ERRORES, ESQUEMA_FALLAS, ESQUEMA_MEDICIONES, aplicar_esquema, concatenar, parsear_fechas
+
+
+def _mediciones(filas):
+    return pd.DataFrame(filas, columns=['Fecha', 'Planta', 'Equipo', 'String_ID', 'Amperios', 'ID'])
+
+
+def test_parsear_fechas_en_varios_formatos():
+    texto = pd.Series(["2025-03-01", "01/03/2025", "01-03-2025", "2025-03-01 10:30:00", "", None, "marzo"])
+    r = parsear_fechas(texto)
+    assert list(r.iloc[:3]) == [pd.Timestamp("2025-03-01")] * 3
+    assert r.iloc[3] == pd.Timestamp("2025-03-01 10:30") and r.iloc[4:].isna().all()
+
+
+def test_tipos_declarados():
+    df, errores = aplicar_esquema(_mediciones([["2025-03-01", "P1", "Inv-1>CB-1", "Str-1", "6.5", "a"]]), ESQUEMA_MEDICIONES, "DB_MEDICIONES")
+    assert errores.empty and list(errores.columns) == COLUMNAS_ERRORES
+    assert 'String ID' in df.columns  # encabezado antiguo
+    assert df['Fecha'].dtype == 'datetime64[ns]' and df['Amperios'].dtype == np.float32
+    assert all(isinstance(df[c].dtype, pd.CategoricalDtype) for c in ('Planta', 'Equipo', 'String ID'))
+
+
+def test_fechas_invalidas_se_excluyen_e_informan():
+    df, errores = aplicar_esquema(_mediciones([
+        ["2025-03-01", "P1", "E", "S", "6", "a"],
+        ["31/02/2025", "P1", "E", "S", "6", "b"],        # formato conocido, fecha imposible
+        ["", "P1", "E", "S", "6", "c"],
+        ["  02/03/2025 ", "P1", "E", "S", "6", "d"],    # espacios sobrantes: se recupera
+    ]), ESQUEMA_MEDICIONES, "DB_MEDICIONES")
+    assert list(df['ID']) == ["a", "d"] and df['Fecha'].iloc[1] == pd.Timestamp("2025-03-02")
+    esperado = pd.DataFrame({'Hoja': "DB_MEDICIONES", 'Fila': [4, 3], 'Columna': "Fecha", 'Valor': ["", "31/02/2025"],
+                             'Problema': ["fecha vacía (fila excluida)", "fecha con formato desconocido (fila excluida)"]})
+    pd.testing.assert_frame_equal(errores, esperado, check_dtype=False)
+
+
+def test_amperios_invalidos_valen_cero_e_informan():
+    df, errores = aplicar_esquema(_mediciones([
+        ["2025-03-01", "P1", "E", "S", "abc", "a"], ["2025-03-01", "P1", "E", "S", "", "b"], ["2025-03-01", "P1", "E", "S", "7.25", "c"],
+    ]), ESQUEMA_MEDICIONES, "DB_MEDICIONES")
+    assert list(df['Amperios']) == [0.0, 0.0, 7.25]
+    assert errores[['Fila', 'Columna', 'Valor', 'Problema']].values.tolist() == [[2, 'Amperios', 'abc', "no numérico (se usa 0)"]]
+
+
+def test_reparacion_opcional():
+    filas = pd.DataFrame({'Fecha': ["2025-03-01"] * 3, 'Amperios': ["1"] * 3, 'Reparacion': ["2025-03-05", "", "pronto"]})
+    df, errores = aplicar_esquema(filas, ESQUEMA_FALLAS, "Sheet1")
+    assert len(df) == 3 and df['Reparacion'].iloc[0] == pd.Timestamp("2025-03-05") and df['Reparacion'].iloc[1:].isna().all()
+    assert errores['Valor'].tolist() == ["pronto"] and errores['Problema'].iloc[0] == "fecha con formato desconocido (se ignora)"
+    assert {'Planta', 'Nota', 'ID'} <= set(df.columns)  # columnas faltantes se agregan vacias
+
+
+def test_concatenar_conserva_category_y_float32():
+    a, _ = aplicar_esquema(_mediciones([["2025-03-01", "P1", "E1", "S1", "1", "a"]]), ESQUEMA_MEDICIONES)
+    b = pd.DataFrame({'Fecha': [pd.Timestamp("2025-03-02")], 'Planta': ["P2"], 'Equipo': ["E1"], 'String ID': ["S2"],
+                      'Amperios': [2.0], 'ID': ["b"]})
+    r = concatenar([a, b])
+    assert list(r.columns) == list(a.columns) and r['Amperios'].dtype == np.float32
+    assert isinstance(r['Planta'].dtype, pd.CategoricalDtype) and list(r['Planta']) == ["P1", "P2"]
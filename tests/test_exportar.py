@@ -0,0 +1,34 @@
+# --- EXPORTACIONES: BYTES PARA DESCARGAS Y ERRORES VISIBLES ---
+import io
+
+import pandas as pd
+import pytest
+
+from exportar import exportar, exportar_temporal, parquet_disponible
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'Fecha': pd.date_range("2025-01-01", periods=12, freq="D"), 'Equipo': [f"CB-{i % 3}" for i in range(12)],
+                         'Amperios': [float(i) if i != 4 else None for i in range(12)]})
+
+
+@pytest.mark.parametrize("formato", ["xlsx", "csv", "parquet"])
+def test_exportar_temporal_entrega_bytes_legibles(df, formato):
+    if formato == "parquet" and not parquet_disponible(): pytest.skip("sin pyarrow")
+    datos = exportar_temporal(df, formato)
+    assert isinstance(datos, bytes) and datos
+    leer = {'xlsx': pd.read_excel, 'csv': pd.read_csv, 'parquet': pd.read_parquet}[formato]
+    leido = leer(io.BytesIO(datos))
+    assert len(leido) == len(df) and leido['Amperios'].isna().sum() == 1
+
+
+def test_exportar_por_bloques_igual_a_uno_solo(df, tmp_path):
+    exportar(df, str(tmp_path / "a.csv"), "csv", tam_bloque=5); exportar(df, str(tmp_path / "b.csv"), "csv", tam_bloque=100)
+    assert (tmp_path / "a.csv").read_bytes() == (tmp_path / "b.csv").read_bytes()
+
+
+def test_excel_de_fallas_no_oculta_errores(df):
+    informes = pytest.importorskip("informes")
+    assert informes.generar_excel_pro(df.iloc[:0], "Planta 1", "Enero", "") is None  # sin fallas
+    with pytest.raises(KeyError): informes.generar_excel_pro(df, "Planta 1", "Enero", "")  # faltan Inversor, Caja...
@@ -0,0 +1,61 @@
+# --- FOTOS: REDUCCION, ORIENTACION, PRESUPUESTO DEL LOTE Y CACHE EN DISCO ---
+import io
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import fotos
+from fotos import NIVELES, dimensiones, procesar_foto, procesar_fotos
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(fotos, "DIR_CACHE", str(tmp_path))
+    return tmp_path
+
+
+def _imagen(ancho, alto, modo="RGB", formato="JPEG", orientacion=None):
+    img = Image.new(modo, (ancho, alto), (200, 30, 30) if modo == "RGB" else (200, 30, 30, 128))
+    for x in range(0, ancho, 7): img.putpixel((x, x * alto // ancho), (0, 0, 0) if modo == "RGB" else (0, 0, 0, 255))  # algo de detalle
+    datos = io.BytesIO(); exif = Image.Exif()
+    if orientacion: exif[0x0112] = orientacion
+    img.save(datos, formato, **({'exif': exif} if orientacion else {}))
+    return datos.getvalue()
+
+
+def test_reduce_al_lado_mayor():
+    jpg = procesar_foto(_imagen(3000, 2000), lado=800, calidad=70)
+    assert jpg[:2] == b"\xff\xd8" and dimensiones(jpg) == (800, 533)
+
+
+def test_endereza_segun_exif():
+    assert dimensiones(procesar_foto(_imagen(300, 200, orientacion=6))) == (200, 300)
+
+
+def test_png_con_transparencia_sale_jpeg():
+    jpg = procesar_foto(_imagen(120, 80, modo="RGBA", formato="PNG"))
+    with Image.open(io.BytesIO(jpg)) as img: assert img.format == "JPEG" and img.mode == "RGB"
+
+
+def test_archivo_ilegible(cache):
+    assert procesar_foto(b"no es una imagen") is None
+    assert not os.listdir(cache)
+
+
+def test_segunda_llamada_sale_de_la_cache(cache, monkeypatch):
+    datos = _imagen(400, 300)
+    primero = procesar_foto(datos)
+    assert len(os.listdir(cache)) == 1
+    monkeypatch.setattr(Image, "open", lambda *a, **k: pytest.fail("no deberia decodificar"))
+    assert procesar_foto(datos) == primero
+
+
+def test_lote_baja_de_nivel_hasta_el_presupuesto():
+    lote = [_imagen(2400, 1800), b"ilegible", _imagen(1800, 2400)]
+    completos = procesar_fotos(lote)
+    assert completos[1] is None and max(dimensiones(completos[0])) == NIVELES[0][0]
+    reducidos = procesar_fotos(lote, presupuesto=1)  # imposible: queda en el nivel mas bajo
+    assert [max(dimensiones(j)) for j in (reducidos[0], reducidos[2])] == [NIVELES[-1][0]] * 2
+    assert dimensiones(reducidos[2])[1] > dimensiones(reducidos[2])[0]  # mismo orden que la entrada
@@ -0,0 +1,63 @@
+# --- IMPORTADOR: SINONIMOS DE COLUMNAS, DEDUPLICACION Y LECTURA POR BLOQUES ---
+import io
+
+import pandas as pd
+import pytest
+
+from importador import analizar, leer_encabezado, registros, sugerir_mapeo
+
+ENCABEZADO = ["Date", "Site", "Inverter", "N° Caja", "String", "Corriente (A)"]
+FILAS = [
+    ["01/03/2025", "Peñaflor", "1", "2", "1", "6,5"],
+    ["01/03/2025", "Peñaflor", "1", "2", "2", "0"],
+    ["01/03/2025", "Peñaflor", "1", "2", "1", "6,8"],     # repetida en el archivo: manda la ultima
+    ["01/03/2025", "Peñaflor", "1", "2", "3", "6,1"],     # ya cargada
+    ["01/03/2025", "", "1", "2", "4", "6,0"],             # sin planta
+    ["32/03/2025", "Peñaflor", "1", "2", "5", "6,0"],     # fecha invalida
+    ["02/03/2025", "Peñaflor", "Inv-2", "CB-1", "Str-1", "x"],
+]
+EXISTENTES = pd.DataFrame({'Fecha': [pd.Timestamp("2025-03-01")], 'Planta': ["Peñaflor"], 'Equipo': ["Inv-1>CB-2"],
+                           'String ID': ["Str-3"], 'Amperios': [6.1]}).astype({c: 'category' for c in ('Planta', 'Equipo', 'String ID')})
+
+
+def _csv():
+    texto = "\n".join(";".join(f) for f in [ENCABEZADO] + FILAS) + "\n"
+    return io.BytesIO(texto.encode("latin-1"))
+
+
+def _excel():
+    datos = io.BytesIO()
+    pd.DataFrame(FILAS, columns=ENCABEZADO).to_excel(datos, index=False)
+    return datos
+
+
+@pytest.mark.parametrize("columnas, esperado", [
+    (ENCABEZADO, {'Fecha': "Date", 'Planta': "Site", 'Equipo': None, 'String ID': "String", 'Amperios': "Corriente (A)",
+                  'Inversor': "Inverter", 'Caja': "N° Caja"}),
+    (["timestamp", "PMGD", "Combiner Box", "Str", "Idc"], {'Fecha': "timestamp", 'Planta': "PMGD", 'Equipo': "Combiner Box",
+                                                           'String ID': "Str", 'Amperios': "Idc", 'Inversor': None, 'Caja': None}),
+])
+def test_sinonimos_de_columnas(columnas, esperado):
+    assert sugerir_mapeo(columnas) == esperado
+
+
+def test_encabezado_csv_latin1_con_punto_y_coma():
+    assert leer_encabezado(_csv(), "terreno.csv") == ENCABEZADO
+
+
+@pytest.mark.parametrize("archivo, nombre", [(_csv, "terreno.csv"), (_excel, "terreno.xlsx")])
+@pytest.mark.parametrize("tamano", [2, 1000])
+def test_analizar_deduplica_y_reporta(archivo, nombre, tamano):
+    r = analizar(archivo(), nombre, sugerir_mapeo(ENCABEZADO), existentes=EXISTENTES, tamano=tamano)
+    nuevas = r['nuevas']
+    assert (r['leidas'], r['duplicadas'], r['ya_cargadas']) == (7, 1, 1)
+    assert nuevas[['Equipo', 'String ID']].astype(str).values.tolist() == [["Inv-1>CB-2", "Str-2"], ["Inv-1>CB-2", "Str-1"], ["Inv-2>CB-1", "Str-1"]]
+    assert nuevas['Amperios'].tolist() == pytest.approx([0.0, 6.8, 0.0])
+    assert sorted(r['errores']['Fila']) == [6, 7, 8]  # fila del archivo: sin planta, fecha invalida, amperios no numericos
+    assert len(r['diagnostico']) == 3
+
+
+def test_registros_para_la_cola():
+    nuevas = analizar(_csv(), "terreno.csv", sugerir_mapeo(ENCABEZADO))['nuevas']
+    regs = registros(nuevas)
+    assert regs[0] == {'Fecha': "2025-03-01", 'Planta': "Peñaflor", 'Equipo': "Inv-1>CB-2", 'String ID': "Str-2", 'Amperios': 0.0}
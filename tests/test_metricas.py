@@ -0,0 +1,33 @@
+# --- METRICAS: DECORADOR Y ETAPAS POR CORRIDA ---
+import pytest
+
+import metricas
+
+
+@pytest.fixture
+def activas():
+    anterior = metricas.activo(); metricas.activar(True); metricas.limpiar()
+    yield
+    metricas.activar(anterior); metricas.limpiar()
+
+
+@metricas.medir("prueba.suma")
+def sumar(a, b=1):
+    """Suma."""
+    return a + b
+
+
+def test_medir_conserva_los_datos_de_la_funcion():
+    assert sumar.__name__ == "sumar" and sumar.__doc__ == "Suma." and sumar.__qualname__ == "sumar"
+    assert sumar.__module__ == __name__ and sumar.__wrapped__(1) == 2
+
+
+def test_medir_registra_la_etapa_en_la_corrida(activas):
+    with metricas.corrida("informe", "x"): assert sumar(2, b=3) == 5
+    corrida, = metricas.historial()
+    assert [e['etapa'] for e in corrida['etapas']] == ["prueba.suma"] and corrida['ms'] is not None
+
+
+def test_apagada_no_guarda_nada():
+    metricas.activar(False)
+    assert sumar(1) == 2 and not metricas.etapa("x") and metricas.abrir_corrida("rerun") is None
@@ -0,0 +1,110 @@
+# --- MOTOR DE DIAGNOSTICO: MISMAS ETIQUETAS E IDS QUE LAS FUNCIONES FILA A FILA QUE REEMPLAZA ---
+import numpy as np
+import pandas as pd
+import pytest
+
+from motor_diagnostico import (TOLERANCIA_CRITICA, clasificar_fallas, diagnosticar_mediciones, diagnosticar_strings,
+                               diagnostico_simple, ids_tecnicos)
+
+
+# --- REFERENCIA: las funciones originales de pmgd_monitor.py, sin cambios ---
+def clasificar_falla(amp):
+    if amp < 4.0: return "Fatiga (<4A)"
+    elif amp > 8.0: return "Sobrecarga (>8A)"
+    else: return "Operativa (4-8A)"
+
+
+def analizar_string_local(row):
+    val = row['Amperios']
+    ref_caja = row['Promedio_Caja']
+    if val == 0: return "CORTE (0A)"
+    if ref_caja == 0: return "NORMAL"
+    tolerancia = TOLERANCIA_CRITICA
+    if val < (ref_caja * (1 - tolerancia)): return "BAJA CORRIENTE"
+    elif val > (ref_caja * (1 + tolerancia)): return "SOBRECORRIENTE"
+    else: return "NORMAL"
+
+
+def diag_simple(v, p):
+    if v == 0: return "CORTE (0A)"
+    if v < p * (1 - TOLERANCIA_CRITICA): return "BAJA CORRIENTE"
+    return "NORMAL"
+
+
+def crear_id_tecnico(row):
+    try: return f"{str(row['Inversor']).replace('Inv-','')}-{str(row['Caja']).replace('CB-','')}-{str(row['String']).replace('Str-','')} {'(+)' if 'Positivo' in str(row['Polaridad']) else '(-)'}"
+    except: return "Error"
+
+
+# --- CASOS BORDE ---
+AMPERIOS = [0.0, np.nan, 3.999, 4.0, 6.0, 8.0, 8.001, 25.0, -1.0]
+
+
+def _mediciones():
+    # Cajas con promedio exacto 10 (9 y 11 quedan justo en la tolerancia), todo en cero, todo NaN, promedio 0 con
+    # valores no nulos, una con un NaN entre valores y una caja de un solo string.
+    filas = [("CB-1", 9.0), ("CB-1", 11.0), ("CB-1", 10.0),
+             ("CB-2", 0.0), ("CB-2", 0.0),
+             ("CB-3", np.nan), ("CB-3", np.nan),
+             ("CB-4", -1.0), ("CB-4", 1.0),
+             ("CB-5", np.nan), ("CB-5", 5.0), ("CB-5", 3.0), ("CB-5", 0.0),
+             ("CB-6", 7.5)]
+    return pd.DataFrame(filas, columns=['Equipo', 'Amperios'])
+
+
+def test_caja_en_la_tolerancia_exacta():
+    df = _mediciones()
+    prom = df.groupby('Equipo')['Amperios'].transform('mean')
+    assert prom[0] * (1 - TOLERANCIA_CRITICA) == 9.0  # el caso borde es real, no un redondeo
+    assert list(diagnosticar_strings(df['Amperios'], prom)[:3]) == ["NORMAL"] * 3
+
+
+def test_clasificar_fallas_igual_a_fila_a_fila():
+    s = pd.Series(AMPERIOS, index=range(10, 10 + len(AMPERIOS)))
+    esperado = s.map(clasificar_falla)
+    pd.testing.assert_series_equal(clasificar_fallas(s), esperado, check_dtype=False)
+    assert list(clasificar_fallas(AMPERIOS)) == list(esperado)  # tambien con listas
+
+
+@pytest.mark.parametrize("categorica", [False, True])
+def test_diagnosticar_mediciones_igual_a_fila_a_fila(categorica):
+    base = _mediciones()
+    esperado = base.assign(Promedio_Caja=base.groupby('Equipo')['Amperios'].transform('mean'))
+    esperado['Diagnostico'] = esperado.apply(analizar_string_local, axis=1)
+    df = base.copy()
+    if categorica: df['Equipo'] = pd.Categorical(df['Equipo'], categories=sorted(set(df['Equipo'])) + ["CB-99"])
+    r = diagnosticar_mediciones(df)
+    assert list(r['Diagnostico']) == list(esperado['Diagnostico'])
+    np.testing.assert_array_equal(r['Promedio_Caja'].to_numpy(float), esperado['Promedio_Caja'].to_numpy(float))
+
+
+def test_diagnostico_simple_igual_a_fila_a_fila():
+    for prom in (10.0, 0.0, 6.5):
+        s = pd.Series(AMPERIOS + [9.0, 5.85])
+        assert list(diagnostico_simple(s, prom)) == [diag_simple(v, prom) for v in s]
+
+
+def _equipos():
+    return pd.DataFrame({
+        'Inversor': ['Inv-1', 'Inv-12', None, np.nan, 'Inv-3', '7'],
+        'Caja': ['CB-1', 'CB-2', 'CB-3', None, np.nan, 'CB-Inv-4'],
+        'String': ['Str-1', None, np.nan, 'Str-4', '', 'Str-Str-6'],
+        'Polaridad': ['Positivo (+)', 'Negativo (-)', None, np.nan, 'Positivo', 'positivo'],
+        'Amperios': [1.0, 2.0, 3.0, np.nan, 0.0, 5.0]})
+
+
+@pytest.mark.parametrize("categorica", [False, True])
+def test_ids_tecnicos_igual_a_fila_a_fila(categorica):
+    df = _equipos()
+    if categorica:
+        for c in ('Inversor', 'Caja', 'String', 'Polaridad'): df[c] = df[c].astype('category')
+    esperado = [crear_id_tecnico(r) for _, r in df.iterrows()]
+    assert list(ids_tecnicos(df)) == esperado
+    assert list(df.apply(crear_id_tecnico, axis=1)) == esperado
+
+
+def test_ids_tecnicos_con_numeros_y_sin_string_id():
+    # Sin columna 'String ID' (fallas) y con columnas numericas: str() de cada celda
+    df = pd.DataFrame({'Inversor': [1, 2], 'Caja': [3.0, np.nan], 'String': [5, 6], 'Polaridad': ['Positivo (+)', 'Negativo (-)'],
+                       'Nota': ['a', 'b']})
+    assert list(ids_tecnicos(df)) == [crear_id_tecnico(r) for _, r in df.iterrows()] == ["1-3.0-5 (+)", "2-nan-6 (-)"]
@@ -0,0 +1,53 @@
+# --- PARTICION POR PLANTA: TRAMOS TRAS ALTAS Y BAJAS CONTRA RECONSTRUCCION ---
+import numpy as np
+import pandas as pd
+import pytest
+
+from particiones import ParticionPlantas, ordenar_por_planta
+
+
+def _filas(planta, n, inicio, rng):
+    return pd.DataFrame({'Planta': pd.Categorical([planta] * n), 'Amperios': rng.uniform(0, 10, n).astype(np.float32),
+                         'ID': [f"r{inicio + k}" for k in range(n)]}, index=range(inicio, inicio + n))
+
+
+def _base(rng):
+    partes = [_filas(p, n, 100 * k, rng) for k, (p, n) in enumerate([("P2", 4), ("P1", 3), ("P3", 5)])]
+    return ordenar_por_planta(pd.concat(partes).astype({'Planta': 'category'}))
+
+
+def _verificar(particion, df):
+    particion.asociar(df)
+    assert particion._tramos == ParticionPlantas().reconstruir(df)._tramos
+    for planta in df['Planta'].unique():
+        pd.testing.assert_frame_equal(particion.planta(planta), df[df['Planta'] == planta])
+
+
+def test_tramos_contiguos():
+    df = _base(np.random.default_rng(0))
+    particion = ParticionPlantas().reconstruir(df)
+    assert particion._tramos == {"P1": (0, 3), "P2": (3, 7), "P3": (7, 12)}
+    particion.asociar(df)
+    assert particion.filas("P2") == 4 and particion.planta("Otra").empty
+
+
+def test_frame_sin_ordenar():
+    df = pd.DataFrame({'Planta': ["P1", "P2", "P1"]})
+    with pytest.raises(ValueError): ParticionPlantas().reconstruir(df)
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_altas_y_bajas_igualan_la_reconstruccion(semilla):
+    rng = np.random.default_rng(semilla)
+    df = _base(rng); particion = ParticionPlantas().reconstruir(df); siguiente = 1000
+    for _ in range(40):
+        if len(df) and rng.random() < 0.4:
+            # Baja de una fila (como borrar_registro): filtrado por ID y quitar() de su planta
+            fila = df.iloc[int(rng.integers(len(df)))]
+            df = df[df['ID'] != fila['ID']]; particion.quitar({'Planta': fila['Planta']})
+        else:
+            # Alta de n filas de una planta (como agregar_mediciones), incluida una planta nueva
+            planta = rng.choice(["P1", "P2", "P3", "P4"]); n = int(rng.integers(1, 4))
+            df = particion.insertar(df, _filas(planta, n, siguiente, rng)); siguiente += n
+            particion.desplazar(planta, n)
+        _verificar(particion, df)
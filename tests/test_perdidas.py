@@ -0,0 +1,116 @@
+# --- PERDIDAS: VALORES CALCULADOS A MANO Y MOTOR INCREMENTAL CONTRA RECONSTRUCCION ---
+import numpy as np
+import pandas as pd
+import pytest
+
+import perdidas
+from analisis import PRECIO_MWH, VOLTAJE_DC
+from perdidas import MotorPerdidas, perdidas_fallas
+
+# Horas sol pico de un dia de cada mes: el perfil de un dia suma exactamente eso, asi una ventana de dias completos
+# vale dias * HSP * A * V / 1e6 * precio.
+HSP = [5.0, 5.0, 6.0, 6.0, 6.0, 6.0, 6.0, 6.0, 6.0, 6.0, 6.0, 6.0]
+PERFILES = {'P1': {'hsp_mensual': HSP}, 'P2': {'hsp_mensual': [2 * h for h in HSP]}}
+
+
+def usd(amperios, hsp):
+    return amperios * VOLTAJE_DC * hsp / 1e6 * PRECIO_MWH
+
+
+def _fallas(filas, planta='P1'):
+    return pd.DataFrame([{'Planta': planta, 'Fecha': pd.Timestamp(f), 'Reparacion': pd.Timestamp(r) if r else pd.NaT, 'Amperios': a, 'ID': f"f{i}"}
+                         for i, (f, r, a) in enumerate(filas)])
+
+
+def test_perfil_de_un_dia_suma_sus_horas_sol():
+    np.testing.assert_allclose(perdidas.perfil_horario(HSP).sum(axis=1), HSP)
+
+
+@pytest.mark.parametrize("reparacion, desde, hasta, ahora, hsp", [
+    ("2025-03-04", None, None, None, 3 * 6.0),                            # cerrada: 3 dias de marzo
+    (None, None, None, "2025-03-05", 4 * 6.0),                            # abierta: hasta ahora
+    ("2025-03-04", "2025-03-02", "2025-03-03", None, 6.0),                # recortada a un dia del periodo
+    (None, "2025-03-03", None, "2025-03-10", 7 * 6.0),                    # abierta, recortada al inicio
+    ("2025-03-04", "2025-04-01", "2025-05-01", None, 0.0),                # periodo posterior a la reparacion
+    ("2025-02-20", None, None, None, 0.0),                                # reparada "antes" de fallar
+])
+def test_perdida_a_mano(reparacion, desde, hasta, ahora, hsp):
+    df = _fallas([("2025-03-01", reparacion, 10.0)])
+    r = perdidas_fallas(df, desde, hasta, ahora, PERFILES)
+    assert r['Perdida'].iloc[0] == pytest.approx(usd(10.0, hsp))
+
+
+def test_perdida_entre_meses_y_dentro_de_la_hora():
+    # 27 y 28 de febrero (5 HSP) + 1 de marzo (6 HSP)
+    df = _fallas([("2025-02-27", "2025-03-02", 4.0)])
+    assert perdidas_fallas(df, perfiles=PERFILES)['Perdida'].iloc[0] == pytest.approx(usd(4.0, 2 * 5.0 + 6.0))
+    # El perfil es simetrico alrededor de las 13:30: desde ahi hasta medianoche es medio dia (interpolando en la hora)
+    df = _fallas([("2025-03-10 13:30", "2025-03-11", 4.0)])
+    assert perdidas_fallas(df, perfiles=PERFILES)['Perdida'].iloc[0] == pytest.approx(usd(4.0, 3.0))
+    assert perdidas_fallas(df, perfiles=PERFILES)['Dias_Fuera'].iloc[0] == pytest.approx(10.5 / 24)
+
+
+def test_plantas_con_perfiles_distintos_en_una_pasada():
+    df = pd.concat([_fallas([("2025-03-01", "2025-03-02", 10.0)], 'P1'), _fallas([("2025-03-01", "2025-03-02", 10.0)], 'P2')], ignore_index=True)
+    np.testing.assert_allclose(perdidas_fallas(df, perfiles=PERFILES)['Perdida'], [usd(10.0, 6.0), usd(10.0, 12.0)])
+
+
+# --- MOTOR ---
+def _flota(n=60, semilla=3):
+    rng = np.random.default_rng(semilla)
+    fecha = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 200 * 24, n), unit='h')
+    dias = pd.to_timedelta(rng.integers(1, 40 * 24, n), unit='h')
+    return pd.DataFrame({'Planta': rng.choice(['P1', 'P2'], n), 'Fecha': fecha, 'Reparacion': (fecha + dias).where(rng.random(n) < 0.7),
+                         'Amperios': rng.uniform(0, 12, n).round(1), 'ID': [f"f{i}" for i in range(n)]})
+
+
+PERIODOS = [(None, None), ("2025-03-01", "2025-04-01"), ("2025-06-15 07:20", None)]
+
+
+def test_totales_igual_a_total_y_a_las_perdidas_por_falla():
+    df = _flota(); m = MotorPerdidas(PERFILES).reconstruir(df)
+    for desde, hasta in PERIODOS:
+        totales = m.totales(desde, hasta)
+        por_falla = m.perdidas(df, desde, hasta)['Perdida'].groupby(df['Planta']).sum()
+        for p in ('P1', 'P2'):
+            assert totales[p] == pytest.approx(m.total(p, desde, hasta)) == pytest.approx(por_falla[p])
+
+
+def test_totales_usa_la_cache_de_total(monkeypatch):
+    m = MotorPerdidas(PERFILES).reconstruir(_flota()); llamadas = []
+    original = perdidas.perdidas_fallas
+    monkeypatch.setattr(perdidas, "perdidas_fallas", lambda *a, **k: llamadas.append(1) or original(*a, **k))
+    primero = m.totales("2025-03-01", "2025-04-01")
+    assert m.totales("2025-03-01 00:40", "2025-04-01") == primero  # mismos limites a la hora
+    m.total('P1', "2025-03-01", "2025-04-01"); m.total('P2', "2025-03-01", "2025-04-01")
+    assert len(llamadas) == 1
+    m.agregar({'Planta': 'P1', 'Fecha': "2025-03-05", 'Amperios': 5.0, 'ID': "nueva"})
+    assert m.totales("2025-03-01", "2025-04-01")['P1'] > primero['P1'] and len(llamadas) == 2
+
+
+def test_cache_acotada(monkeypatch):
+    monkeypatch.setattr(perdidas, "MAX_TOTALES", 5)
+    m = MotorPerdidas(PERFILES).reconstruir(_flota())
+    for d in range(1, 20): m.total('P1', f"2025-03-{d:02d}")
+    assert len(m._totales) == 5
+
+
+def test_altas_y_bajas_igual_a_reconstruir():
+    df = _flota(80); rng = np.random.default_rng(7)
+    m = MotorPerdidas(PERFILES).reconstruir(df.iloc[:40]); vivas = df.iloc[:40]
+    for i in range(40, 80):
+        m.agregar(df.iloc[i].to_dict()); vivas = pd.concat([vivas, df.iloc[[i]]])
+        if rng.random() < 0.4:
+            baja = vivas.iloc[int(rng.integers(len(vivas)))]
+            m.quitar(baja.to_dict()); vivas = vivas[vivas['ID'] != baja['ID']]
+        if i % 10 == 0: m.totales()  # consultas intercaladas: las altas pendientes se concatenan entre medio
+    esperado = MotorPerdidas(PERFILES).reconstruir(vivas)
+    for desde, hasta in PERIODOS:
+        assert m.totales(desde, hasta) == pytest.approx(esperado.totales(desde, hasta))
+
+
+def test_baja_sin_id_quita_una_sola_coincidencia():
+    df = _fallas([("2025-03-01", "2025-03-04", 10.0), ("2025-03-01", "2025-03-04", 10.0), ("2025-03-02", None, 3.0)]).drop(columns='ID')
+    m = MotorPerdidas(PERFILES).reconstruir(df)
+    m.quitar({'Planta': 'P1', 'Fecha': pd.Timestamp("2025-03-01"), 'Reparacion': pd.Timestamp("2025-03-04"), 'Amperios': 10.0})
+    assert m.total('P1', None, "2025-03-02") == pytest.approx(usd(10.0, 6.0))  # queda una de las dos duplicadas
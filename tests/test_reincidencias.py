@@ -0,0 +1,76 @@
+# --- REINCIDENCIAS: RESUMEN, MTBF Y TOP-K CONTRA GROUPBY, ALTAS/BAJAS CONTRA RECONSTRUCCION ---
+import numpy as np
+import pandas as pd
+import pytest
+
+from reincidencias import CLAVE, IndiceReincidencia
+
+
+def _registro(rng):
+    return {'Fecha': pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(rng.integers(0, 200))), 'Planta': rng.choice(["P1", "P2"]),
+            'Inversor': f"Inv-{rng.integers(1, 3)}", 'Caja': f"CB-{rng.integers(1, 3)}", 'String': f"Str-{rng.integers(1, 4)}",
+            'Polaridad': rng.choice(["Positivo (+)", "Negativo (-)"])}
+
+
+def _fallas(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame([_registro(rng) for _ in range(n)]).astype({c: 'category' for c in CLAVE})
+
+
+def _esperado(df, planta, desde=None, hasta=None, dias=30):
+    # Referencia directa: groupby por posicion sobre las filas del periodo
+    d = df[df['Planta'] == planta]
+    if desde is not None: d = d[d['Fecha'] >= desde]
+    if hasta is not None: d = d[d['Fecha'] < hasta]
+    filas = []
+    for clave, g in d.groupby(CLAVE[1:], observed=True):
+        f = g['Fecha'].sort_values()
+        filas.append({**dict(zip(CLAVE[1:], clave)), 'Fallas': len(f), 'Reincidencias': int((f.diff() <= pd.Timedelta(days=dias)).sum()),
+                      'MTBF_dias': (f.iloc[-1] - f.iloc[0]) / pd.Timedelta(days=1) / (len(f) - 1) if len(f) > 1 else np.nan,
+                      'Ultima': f.iloc[-1]})
+    return pd.DataFrame(filas)
+
+
+def _ordenar(r):
+    return r.astype({c: str for c in CLAVE[1:]}).sort_values(CLAVE[1:]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("desde, hasta", [(None, None), ("2025-02-01", "2025-05-01"), ("2025-06-01", None)])
+def test_resumen_igual_a_groupby(desde, hasta):
+    df = _fallas(300)
+    indice = IndiceReincidencia().reconstruir(df)
+    for planta in ("P1", "P2"):
+        r = indice.resumen(planta, desde, hasta)
+        pd.testing.assert_frame_equal(_ordenar(r), _ordenar(_esperado(df, planta, desde, hasta)), check_dtype=False)
+
+
+def test_top_ordena_como_groupby():
+    df = _fallas(300, semilla=1)
+    top = IndiceReincidencia().reconstruir(df).top("P1", k=5)
+    esperado = _esperado(df, "P1").query("Fallas >= 2").sort_values(['Fallas', 'Reincidencias', 'Ultima'], ascending=False)
+    assert list(top['Fallas']) == list(esperado['Fallas'].head(5))
+    assert list(top['Ultima']) == list(esperado['Ultima'].head(5))
+
+
+def test_mtbf_a_mano():
+    df = pd.DataFrame([{'Fecha': pd.Timestamp(f), 'Planta': "P1", 'Inversor': "Inv-1", 'Caja': "CB-1", 'String': "Str-1", 'Polaridad': "+"}
+                       for f in ("2025-01-01", "2025-01-11", "2025-01-31")])
+    indice = IndiceReincidencia().reconstruir(df)
+    assert indice.mtbf("P1", "Inv-1", "CB-1", "Str-1", "+") == pytest.approx(15.0)
+    assert indice.mtbf("P1", "Inv-1", "CB-1", "Str-1", "+", desde="2025-01-05") == pytest.approx(20.0)
+    assert np.isnan(indice.mtbf("P1", "Inv-1", "CB-1", "Str-1", "+", hasta="2025-01-05"))
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_altas_y_bajas_al_azar_igualan_la_reconstruccion(semilla):
+    rng = np.random.default_rng(semilla)
+    vivos = [_registro(rng) for _ in range(40)]
+    indice = IndiceReincidencia().reconstruir(pd.DataFrame(vivos))
+    for _ in range(150):
+        if vivos and rng.random() < 0.4: indice.quitar(vivos.pop(int(rng.integers(len(vivos)))))
+        else: vivos.append(_registro(rng)); indice.agregar(vivos[-1])
+    completo = IndiceReincidencia().reconstruir(pd.DataFrame(vivos))
+    for planta in ("P1", "P2"):
+        a, b = indice._fechas.get(planta, {}), completo._fechas.get(planta, {})
+        assert a.keys() == b.keys()
+        for clave in a: np.testing.assert_array_equal(a[clave], b[clave])
@@ -0,0 +1,68 @@
+# --- ROLLUP DE FALLAS: ALTAS Y BAJAS INCREMENTALES CONTRA RECONSTRUCCION ---
+import numpy as np
+import pandas as pd
+import pytest
+
+from rollups_fallas import DIMENSIONES, RollupFallas
+
+
+def _registro(rng, i):
+    return {'Fecha': pd.Timestamp("2025-01-01") + pd.Timedelta(days=int(rng.integers(0, 90))), 'Planta': rng.choice(["P1", "P2"]),
+            'Inversor': f"Inv-{rng.integers(1, 3)}", 'Caja': f"CB-{rng.integers(1, 3)}", 'Polaridad': rng.choice(["Positivo (+)", "Negativo (-)"]),
+            'Amperios': round(float(rng.uniform(0, 10)), 1), 'ID': f"f{i}"}
+
+
+def _frame(registros):
+    df = pd.DataFrame(registros, columns=['Fecha', 'Planta'] + DIMENSIONES + ['Amperios', 'ID'])
+    return df.astype({c: 'category' for c in ['Planta'] + DIMENSIONES}).astype({'Amperios': 'float32'})
+
+
+def _normalizar(t):
+    t = t.astype({d: str for d in DIMENSIONES}).sort_values(['Dia'] + DIMENSIONES).reset_index(drop=True)
+    return t.astype({'Amperios': 'float64'})
+
+
+def _comparar(incremental, completo):
+    for tablas in ("_dia", "_mes"):
+        a, b = getattr(incremental, tablas), getattr(completo, tablas)
+        for planta in set(a) | set(b):
+            ta, tb = a.get(planta), b.get(planta)
+            if ta is None or tb is None:
+                assert (ta if tb is None else tb).empty; continue
+            assert ta['Dia'].is_monotonic_increasing
+            pd.testing.assert_frame_equal(_normalizar(ta), _normalizar(tb), check_exact=False, rtol=1e-5)
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_altas_y_bajas_al_azar_igualan_la_reconstruccion(semilla):
+    rng = np.random.default_rng(semilla)
+    vivos = [_registro(rng, i) for i in range(30)]
+    rollup = RollupFallas().reconstruir(_frame(vivos))
+    for i in range(30, 110):
+        if vivos and rng.random() < 0.4: rollup.quitar(vivos.pop(int(rng.integers(len(vivos)))))
+        else: vivos.append(_registro(rng, i)); rollup.agregar(vivos[-1])
+    _comparar(rollup, RollupFallas().reconstruir(_frame(vivos)))
+
+
+def test_altas_sobre_rollup_vacio_conservan_los_tipos():
+    rng = np.random.default_rng(0); registros = [_registro(rng, i) for i in range(10)]
+    rollup = RollupFallas().reconstruir(_frame([]))
+    for r in registros: rollup.agregar(r)
+    base = RollupFallas().reconstruir(_frame(registros))
+    for planta, t in rollup._dia.items():
+        assert t.dtypes.map(str).to_dict() == base._dia[planta].dtypes.map(str).to_dict()
+
+
+def test_kpis_de_planta_sin_fallas():
+    rollup = RollupFallas().reconstruir(_frame([]))
+    assert rollup.kpis("P1") == {'total': 0, 'promedio': "-", 'critico': "-", 'repes': 0}
+    assert rollup.rango("P1")['Dia'].dtype == 'datetime64[ns]'
+
+
+def test_kpis_tras_borrar_la_ultima_falla():
+    r = {'Fecha': pd.Timestamp("2025-02-03"), 'Planta': "P1", 'Inversor': "Inv-1", 'Caja': "CB-2", 'Polaridad': "Positivo (+)", 'Amperios': 4.0}
+    rollup = RollupFallas().reconstruir(_frame([]))
+    rollup.agregar(r); rollup.agregar({**r, 'Amperios': 2.0})
+    assert rollup.kpis("P1") == {'total': 2, 'promedio': "3.0 A", 'critico': "Inv-1 > CB-2", 'repes': 2}
+    rollup.quitar(r); rollup.quitar({**r, 'Amperios': 2.0})
+    assert rollup.kpis("P1")['promedio'] == "-"